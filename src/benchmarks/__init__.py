@@ -0,0 +1,3 @@
+from .review_generator import ReviewGenerator, REVIEW_COLUMNS
+from .results import StageResult, find_regressions, load_baseline, save_baseline
+from .stages import STAGES, run_stage
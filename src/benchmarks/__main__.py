@@ -0,0 +1,171 @@
+import argparse
+import concurrent.futures as fut
+import multiprocessing
+import os
+import sys
+import tempfile
+from benchmarks import (
+    STAGES,
+    ReviewGenerator,
+    StageResult,
+    find_regressions,
+    load_baseline,
+    run_stage,
+    save_baseline,
+)
+
+
+def print_results(results: list[StageResult], baseline: dict[str, StageResult]):
+    print(
+        f"{'stage':<20}{'items/s':>14}{'MB/s':>10}{'seconds':>10}{'peak RSS MB':>13}{'vs baseline':>13}"
+    )
+    for result in results:
+        megabytes = result.get_megabytes_per_second()
+        rss = result.peak_rss_kb
+        change = ""
+        old = baseline.get(result.stage)
+        if old is not None and old.get_items_per_second() > 0:
+            change = f"{result.get_items_per_second() / old.get_items_per_second() - 1:+.1%}"
+        print(
+            f"{result.stage:<20}"
+            f"{result.get_items_per_second():>14,.0f}"
+            f"{'-' if megabytes is None else f'{megabytes:.1f}':>10}"
+            f"{result.seconds:>10.3f}"
+            f"{'-' if rss is None else f'{rss / 1024:.0f}':>13}"
+            f"{change:>13}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks the parsers and the plot on a generated CSV of Steam reviews.",
+    )
+    arg_parser.add_argument(
+        "--rows",
+        type=int,
+        default=100000,
+        help="How many reviews to generate. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--size-mb",
+        type=float,
+        help="Generate this many megabytes instead of a number of rows.",
+    )
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--game-count", type=int, default=1000)
+    arg_parser.add_argument(
+        "--review-words",
+        type=int,
+        default=30,
+        help="The average number of words per review, the width of the rows. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--multiline-rate",
+        type=float,
+        default=0.05,
+        help="The share of reviews spanning several lines. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--bad-line-rate",
+        type=float,
+        default=0.001,
+        help="The share of broken rows. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help="Comma separated list of the stages to run. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Every stage runs this many times, the fastest run counts. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--frames",
+        type=int,
+        default=200,
+        help="How many frames the plot stage draws. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--baseline", help="A baseline to compare with, see --save-baseline."
+    )
+    arg_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write the results to the --baseline file instead of comparing with it.",
+    )
+    arg_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="How much slower (or bigger) a stage can get before it counts as a regression. (default: %(default)s)",
+    )
+    args = arg_parser.parse_args()
+
+    stages = args.stages.split(",")
+    for stage in stages:
+        if stage not in STAGES:
+            arg_parser.error(f"unknown stage '{stage}'")
+    if args.save_baseline and args.baseline is None:
+        arg_parser.error("--save-baseline needs --baseline")
+
+    generator = ReviewGenerator(
+        args.seed,
+        args.game_count,
+        args.review_words,
+        args.multiline_rate,
+        args.bad_line_rate,
+    )
+    row_count = None if args.size_mb is not None else args.rows
+    max_bytes = None if args.size_mb is None else int(args.size_mb * 1_000_000)
+    # Results are only comparable if they were made with the same data.
+    config = generator.get_config() | {
+        "rows": row_count,
+        "max_bytes": max_bytes,
+        "frames": args.frames,
+    }
+
+    baseline = {}
+    if args.baseline is not None and not args.save_baseline:
+        baseline_config, baseline = load_baseline(args.baseline)
+        if baseline_config != config:
+            arg_parser.error(
+                f"the baseline was made with other settings: {baseline_config}"
+            )
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "reviews.csv")
+        rows = generator.write_to_path(path, row_count, max_bytes)
+        print(
+            f"Generated {rows:,} rows ({os.path.getsize(path) / 1_000_000:.1f} MB)",
+            flush=True,
+        )
+
+        # Every stage gets a fresh process, so they don't share caches or memory and the peak RSS is their own.
+        results = []
+        with fut.ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1,
+        ) as pool:
+            for stage in stages:
+                results.append(
+                    pool.submit(
+                        run_stage, stage, path, args.repeat, args.frames
+                    ).result()
+                )
+
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, config, results)
+        print(f"Saved the baseline to '{args.baseline}'")
+    elif args.baseline is not None:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,111 @@
+import json
+import sys
+from typing import Self
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, there is no peak RSS there.
+    resource = None
+
+# Bumped whenever the baseline files change in a way older ones can't be read anymore.
+_BASELINE_VERSION = 1
+
+
+def get_peak_rss_kb() -> int | None:
+    # The high-water mark of this process, worker processes (of the multiprocess parser) aren't included.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class StageResult:
+    __slots__ = ("stage", "seconds", "item_count", "byte_count", "peak_rss_kb")
+
+    def __init__(
+        self,
+        stage: str,
+        seconds: float,
+        item_count: int,
+        byte_count: int | None,
+        peak_rss_kb: int | None,
+    ) -> None:
+        self.stage = stage
+        # The fastest of the repeats.
+        self.seconds = seconds
+        # Rows for most stages, tokens for the lexers and frames for the plot.
+        self.item_count = item_count
+        # Only stages that read the file have a byte count.
+        self.byte_count = byte_count
+        self.peak_rss_kb = peak_rss_kb
+
+    def get_items_per_second(self) -> float:
+        return self.item_count / self.seconds if self.seconds > 0 else 0.0
+
+    def get_megabytes_per_second(self) -> float | None:
+        if self.byte_count is None or self.seconds <= 0:
+            return None
+        return self.byte_count / self.seconds / 1_000_000
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @staticmethod
+    def from_dict(values: dict) -> Self:
+        return StageResult(**values)
+
+
+def save_baseline(path: str, config: dict, results: list[StageResult]):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "version": _BASELINE_VERSION,
+                "config": config,
+                "results": [result.to_dict() for result in results],
+            },
+            file,
+            indent=2,
+        )
+
+
+# Returns the config the baseline was made with and its results, by stage.
+def load_baseline(path: str) -> tuple[dict, dict[str, StageResult]]:
+    with open(path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline.get("version") != _BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version in '{path}'!")
+    results = [StageResult.from_dict(values) for values in baseline["results"]]
+    return baseline["config"], {result.stage: result for result in results}
+
+
+# Returns a message for every stage that got slower (or uses more memory) than 'tolerance' allows,
+# like 0.1 for 10%. Stages that aren't in the baseline are skipped.
+def find_regressions(
+    results: list[StageResult],
+    baseline: dict[str, StageResult],
+    tolerance: float,
+) -> list[str]:
+    regressions = []
+    for result in results:
+        old = baseline.get(result.stage)
+        if old is None:
+            continue
+
+        old_speed = old.get_items_per_second()
+        new_speed = result.get_items_per_second()
+        if new_speed < old_speed * (1 - tolerance):
+            regressions.append(
+                f"{result.stage}: {new_speed:,.0f}/s is {1 - new_speed / old_speed:.1%} slower than {old_speed:,.0f}/s"
+            )
+
+        if (
+            old.peak_rss_kb is not None
+            and result.peak_rss_kb is not None
+            and result.peak_rss_kb > old.peak_rss_kb * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{result.stage}: peak RSS of {result.peak_rss_kb:,} KB is {result.peak_rss_kb / old.peak_rss_kb - 1:.1%} more than {old.peak_rss_kb:,} KB"
+            )
+    return regressions
@@ -0,0 +1,109 @@
+import random
+from itertools import accumulate
+from typing import TextIO
+
+# Same columns (and order) as the Steam review dumps.
+REVIEW_COLUMNS = ("game", "author_playtime_forever", "review", "language", "voted_up")
+
+_LANGUAGES = ("english", "schinese", "russian", "spanish", "german", "brazilian")
+_WORDS = (
+    "game fun good bad great story graphics buy hours friends worth price boring bugs multiplayer "
+    "recommend not very 10/10 好玩"
+).split()
+
+
+# Writes a CSV that looks like the Steam review dumps, always the same one for the same arguments.
+# Like the real thing a few games get most of the reviews, the reviews are quoted when they have to be,
+# and they can span several lines.
+class ReviewGenerator:
+    def __init__(
+        self,
+        seed: int = 0,
+        game_count: int = 1000,
+        review_words: int = 30,
+        multiline_rate: float = 0.05,
+        bad_line_rate: float = 0.0,
+    ) -> None:
+        self.seed = seed
+        self.game_count = game_count
+        # The average number of words per review, which is what makes the rows wide or narrow.
+        self.review_words = review_words
+        # The share of reviews with a newline in them.
+        self.multiline_rate = multiline_rate
+        # The share of rows that are broken in some way, see _break_row.
+        self.bad_line_rate = bad_line_rate
+
+    def get_config(self) -> dict:
+        return {
+            "seed": self.seed,
+            "game_count": self.game_count,
+            "review_words": self.review_words,
+            "multiline_rate": self.multiline_rate,
+            "bad_line_rate": self.bad_line_rate,
+        }
+
+    def _create_review(self, rng: random.Random) -> str:
+        words = rng.choices(_WORDS, k=rng.randint(1, self.review_words * 2 - 1))
+        if rng.random() < 0.3:
+            words[rng.randrange(len(words))] += ","
+        if rng.random() < self.multiline_rate:
+            words[rng.randrange(len(words))] += "\n"
+        review = " ".join(words)
+        if "," in review or "\n" in review:
+            return f'"{review}"'
+        return review
+
+    def _break_row(self, rng: random.Random, values: list[str]) -> list[str]:
+        match rng.randrange(3):
+            case 0:
+                values.append("oops")  # Too many values.
+            case 1:
+                values[1] = ""  # Empty value.
+            case 2:
+                values[1] = "n/a"  # Parses, but isn't a number.
+        return values
+
+    # Writes the header and rows until there are 'row_count' rows or 'max_bytes' (roughly, in UTF-8) were written,
+    # whichever comes first. Returns the number of rows.
+    def write(
+        self, file: TextIO, row_count: int | None = None, max_bytes: int | None = None
+    ) -> int:
+        if row_count is None and max_bytes is None:
+            raise ValueError("Either row_count or max_bytes is needed!")
+
+        rng = random.Random(self.seed)
+        # Every tenth game has a name that isn't ASCII, like in the real data.
+        games = [
+            f"游戏 {i}" if i % 10 == 0 else f"Game {i}" for i in range(self.game_count)
+        ]
+        # Zipf like, the first games get by far the most reviews.
+        popularity = list(accumulate(1 / (i + 1) for i in range(self.game_count)))
+
+        header = ",".join(REVIEW_COLUMNS) + "\n"
+        file.write(header)
+        # In bytes, not the characters file.write returns, since the games and reviews aren't all ASCII.
+        written = len(header.encode())
+        rows = 0
+        while (row_count is None or rows < row_count) and (
+            max_bytes is None or written < max_bytes
+        ):
+            values = [
+                rng.choices(games, cum_weights=popularity)[0],
+                str(int(rng.expovariate(1 / 20000))),
+                self._create_review(rng),
+                rng.choice(_LANGUAGES),
+                "True" if rng.random() < 0.8 else "False",
+            ]
+            if rng.random() < self.bad_line_rate:
+                values = self._break_row(rng, values)
+            line = ",".join(values) + "\n"
+            file.write(line)
+            written += len(line.encode())
+            rows += 1
+        return rows
+
+    def write_to_path(
+        self, path: str, row_count: int | None = None, max_bytes: int | None = None
+    ) -> int:
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            return self.write(file, row_count, max_bytes)
@@ -0,0 +1,227 @@
+import os
+import re
+import time
+from collections.abc import Callable
+from itertools import islice
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.lexing.lexer import CsvLexer
+from csv_parsing.lexing.block_lexer import BlockCsvLexer
+from csv_parsing.lexing.token import CsvTokenType
+from csv_parsing.parsing.parser_backend import ParserBackend, create_parser
+from csv_parsing.row import CsvRow
+from csv_parsing.utils import row_to_dict, row_to_view
+from csv_parsing.validator import CsvTypeValidator, FastCsvTypeValidator
+from .results import StageResult, get_peak_rss_kb
+
+# What the values of the generated reviews look like, for the validation stages.
+REVIEW_PATTERNS = {
+    "game": re.compile(r".+"),
+    "author_playtime_forever": re.compile(r"\d+$"),
+    "review": re.compile(r".*", re.DOTALL),
+    "language": re.compile(r"[a-z]+$"),
+    "voted_up": re.compile(r"(True|False)$"),
+}
+
+
+# Throws away the warnings. Unlike an open os.devnull it can be pickled, which the multiprocess parser needs.
+class _NullWriter:
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+# Everything the stages share, the parsed rows are only parsed once (and only if a stage needs them).
+class BenchmarkContext:
+    def __init__(self, path: str, frame_count: int) -> None:
+        self.path = path
+        self.file_size = os.path.getsize(path)
+        self.frame_count = frame_count
+        # Bad lines are part of what is measured, but the warnings shouldn't flood the output.
+        self.print_error_to = _NullWriter()
+        self._rows = None
+
+    def get_rows(self) -> list[CsvRow]:
+        if self._rows is None:
+            self._rows = _parse(self, ParserBackend.FUSED)[0]
+        return self._rows
+
+
+def _lex(context: BenchmarkContext, create_lexer: Callable) -> tuple[int, int]:
+    with open(context.path, encoding="utf-8") as file:
+        tokens = 0
+        for token in create_lexer(file).lex():
+            if token.type == CsvTokenType.END_OF_FILE:
+                break
+            tokens += 1
+    return tokens, context.file_size
+
+
+def _parse(context: BenchmarkContext, backend: ParserBackend) -> tuple[list, int]:
+    parser = create_parser(
+        context.path,
+        BadLineMode.WARNING,
+        context.print_error_to,
+        backend,
+        allow_multiline_strings=True,
+    )
+    return list(parser.parse()), context.file_size
+
+
+def _count_parsed(context: BenchmarkContext, backend: ParserBackend):
+    rows, byte_count = _parse(context, backend)
+    return len(rows), byte_count
+
+
+def _validate(context: BenchmarkContext, validator: CsvTypeValidator):
+    rows = context.get_rows()
+    for _ in validator.validate(rows):
+        pass
+    return len(rows), None
+
+
+def _to_dicts(context: BenchmarkContext, _):
+    rows = context.get_rows()
+    for row in rows:
+        row_to_dict(row)
+    return len(rows), None
+
+
+# The first 'count' rows (or all of them) as views, except for the broken ones the plot can't take (see
+# ReviewGenerator._break_row).
+def _get_plot_views(context: BenchmarkContext, count: int | None = None) -> list:
+    views = (
+        view
+        for view in map(row_to_view, context.get_rows())
+        if view["author_playtime_forever"].isdigit()
+    )
+    return list(islice(views, count))
+
+
+# The first 'frame_count' rows unless 'views' are given, one per frame unless the plot is batched.
+def _create_plot(context: BenchmarkContext, views: list | None = None):
+    # Only imported here, so the other stages don't pay for importing matplotlib.
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from plots import Plot
+    from plots.animated import TopNBarPlot
+
+    # Same fonts as main.py, they make a difference for the text on the bars.
+    Plot.set_fonts(["Verdana", "Microsoft JhengHei", "sans-serif"])
+
+    if views is None:
+        views = _get_plot_views(context, context.frame_count)
+    plot = (
+        TopNBarPlot(
+            views,
+            lambda item: item["game"],
+            lambda item: int(item["author_playtime_forever"]) / 1000,
+            figsize=(12, 9),
+        )
+        .set_xticks_title("Hours played (thousands)")
+        .set_title("Top 20 games by hours played per Steam review")
+    )
+    return plot, views
+
+
+def _create_batched_plot(context: BenchmarkContext):
+    # All of the rows this time.
+    views = _get_plot_views(context)
+    plot, _ = _create_plot(context, views)
+    from plots.animated import BatchMode
+
+    # Folds every row into 'frame_count' frames, like BatchMode.COUNT does for the animation.
+    plot.set_batching(BatchMode.COUNT, max(len(views) // context.frame_count, 1))
+    return plot, views
+
+
+# Goes through the frames like the animation would, see AnimatedPlot.run_frames.
+def _run_frames(prepared, blit: bool = False, render_every_frame: bool = True):
+    plot, _ = prepared
+    folded = plot.run_frames(blit, render_every_frame)
+    plot.close()
+    return folded, None
+
+
+# Updates the plot for every frame, but only renders the last one.
+def _update_plot(context: BenchmarkContext, prepared):
+    return _run_frames(prepared, render_every_frame=False)
+
+
+def _draw_plot(context: BenchmarkContext, prepared):
+    return _run_frames(prepared)
+
+
+def _draw_plot_blit(context: BenchmarkContext, prepared):
+    return _run_frames(prepared, blit=True)
+
+
+def _no_setup(context: BenchmarkContext):
+    return None
+
+
+# Every stage has a setup, which isn't timed and runs before every repeat, and the run that is timed.
+# The run returns how many items it went through and how many bytes of the file it read (if any).
+STAGES: dict[str, tuple[Callable, Callable]] = {
+    "lex": (
+        _no_setup,
+        lambda context, _: _lex(context, lambda file: CsvLexer(file, True)),
+    ),
+    "lex_block": (
+        _no_setup,
+        lambda context, _: _lex(context, lambda file: BlockCsvLexer(file, True)),
+    ),
+    "parse_python": (
+        _no_setup,
+        lambda context, _: _count_parsed(context, ParserBackend.PYTHON),
+    ),
+    "parse_fused": (
+        _no_setup,
+        lambda context, _: _count_parsed(context, ParserBackend.FUSED),
+    ),
+    "parse_stdlib": (
+        _no_setup,
+        lambda context, _: _count_parsed(context, ParserBackend.STDLIB),
+    ),
+    "parse_multiprocess": (
+        _no_setup,
+        lambda context, _: _count_parsed(context, ParserBackend.MULTIPROCESS),
+    ),
+    "validate": (
+        lambda context: CsvTypeValidator(
+            REVIEW_PATTERNS, BadLineMode.WARNING, context.print_error_to
+        ),
+        _validate,
+    ),
+    "validate_fast": (
+        lambda context: FastCsvTypeValidator(
+            REVIEW_PATTERNS,
+            BadLineMode.WARNING,
+            context.print_error_to,
+            cached_columns=["game", "language", "voted_up"],
+        ),
+        _validate,
+    ),
+    "row_to_dict": (_no_setup, _to_dicts),
+    "top_n_update": (_create_plot, _update_plot),
+    "top_n_draw": (_create_plot, _draw_plot),
+    "top_n_draw_batched": (_create_batched_plot, _draw_plot),
+    "top_n_draw_blit": (_create_plot, _draw_plot_blit),
+}
+
+
+# Runs a stage 'repeat' times and keeps the fastest run, which is the least disturbed by whatever else is running.
+# Meant to run in a fresh process per stage, so the peak RSS is that of the stage (and its setup).
+def run_stage(
+    stage: str, path: str, repeat: int = 3, frame_count: int = 200
+) -> StageResult:
+    setup, run = STAGES[stage]
+    context = BenchmarkContext(path, frame_count)
+    best = None
+    for _ in range(repeat):
+        prepared = setup(context)
+        start = time.perf_counter()
+        item_count, byte_count = run(context, prepared)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return StageResult(stage, best, item_count, byte_count, get_peak_rss_kb())
@@ -4,3 +4,7 @@ from enum import Enum
 class BadLineMode(Enum):
     ERROR = 0
     WARNING = 1
+    # Bad lines are recorded (see BadLineCollector) instead of printed.
+    COLLECT = 2
+    # Bad lines are dropped without a word, only had_errors tells that there were any.
+    SKIP = 3
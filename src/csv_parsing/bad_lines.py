@@ -0,0 +1,151 @@
+import json
+from typing import Self, TextIO
+from .error import CsvError
+from .bad_line_mode import BadLineMode
+
+# How many bad lines a collector keeps in memory, the ones after that are only counted.
+DEFAULT_MAX_BAD_LINES = 10000
+# How many bad lines are written to the sidecar file at once.
+DEFAULT_SIDECAR_BATCH_SIZE = 1024
+
+
+# One bad line, as found by a parser or validator in BadLineMode.COLLECT.
+class BadLine:
+    __slots__ = ("line_num", "column", "reason", "raw_line")
+
+    def __init__(
+        self,
+        line_num: int | None,
+        column: int | None,
+        reason: str,
+        raw_line: str | None = None,
+    ) -> None:
+        # Where the error was found, same as in the message of the error.
+        # Unknown for errors found after parsing (like validating) if the parser didn't keep its debug tokens.
+        self.line_num = line_num
+        self.column = column
+        self.reason = reason
+        # The (first) line of the row the error is in, None for errors found after the row was parsed.
+        self.raw_line = raw_line
+
+    @staticmethod
+    def from_error(error: CsvError, raw_line: str | None = None) -> Self:
+        token = getattr(error, "token", None)
+        if token is None:
+            return BadLine(None, None, error.message, raw_line)
+        return BadLine(token.line_num, token.char_index, error.message, raw_line)
+
+    def to_dict(self) -> dict:
+        return {
+            "line": self.line_num,
+            "column": self.column,
+            "reason": self.reason,
+            "raw_line": self.raw_line,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> Self:
+        return BadLine(data["line"], data["column"], data["reason"], data["raw_line"])
+
+    def __repr__(self) -> str:
+        return f"BadLine({self.line_num}, {self.column}, {self.reason!r}, {self.raw_line!r})"
+
+
+# Collects the bad lines of BadLineMode.COLLECT, either in memory (only the first 'max_records' are kept, the rest are
+# only counted) or in a sidecar file, which gets one JSON object per line written in batches of 'batch_size'.
+# The sidecar is never closed here, call flush (or use the collector as a context manager) once parsing is done.
+class BadLineCollector:
+    def __init__(
+        self,
+        max_records: int = DEFAULT_MAX_BAD_LINES,
+        sidecar: TextIO | None = None,
+        batch_size: int = DEFAULT_SIDECAR_BATCH_SIZE,
+    ) -> None:
+        self.max_records = max_records
+        self.batch_size = batch_size
+        self._sidecar = sidecar
+
+        # With a sidecar these are only the ones that haven't been written yet.
+        self._records: list[BadLine] = []
+        self._count = 0
+
+    def add(self, record: BadLine):
+        self._count += 1
+        if self._sidecar is None:
+            if len(self._records) < self.max_records:
+                self._records.append(record)
+            return
+
+        self._records.append(record)
+        if len(self._records) >= self.batch_size:
+            self.flush()
+
+    def add_error(self, error: CsvError, raw_line: str | None = None):
+        self.add(BadLine.from_error(error, raw_line))
+
+    # Adds everything 'other' collected, like the bad lines a worker process found in its chunk.
+    def merge(self, other: "BadLineCollector"):
+        for record in other._records:
+            self.add(record)
+        # The ones 'other' only counted.
+        self._count += other._count - len(other._records)
+
+    def flush(self):
+        if self._sidecar is None or len(self._records) == 0:
+            return
+        self._sidecar.writelines(
+            json.dumps(record.to_dict(), ensure_ascii=False) + "\n"
+            for record in self._records
+        )
+        self._records.clear()
+        self._sidecar.flush()
+
+    # Every bad line, including the ones that weren't kept.
+    def get_count(self) -> int:
+        return self._count
+
+    def get_records(self) -> list[BadLine]:
+        return self._records
+
+    # Only the records that are still in memory, the ones already written to the sidecar are only counted.
+    def to_dict(self) -> dict:
+        return {
+            "count": self._count,
+            "records": [record.to_dict() for record in self._records],
+        }
+
+    # The records are all kept, whatever the default 'max_records' is.
+    @staticmethod
+    def from_dict(data: dict) -> Self:
+        collector = BadLineCollector(max_records=len(data["records"]))
+        for record in data["records"]:
+            collector.add(BadLine.from_dict(record))
+        collector._count = data["count"]
+        return collector
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+
+# What the parsers and validators do with a bad line, 'bad_lines' is only used (and has to be there) in
+# BadLineMode.COLLECT.
+def handle_bad_line(
+    error: CsvError,
+    bad_line_mode: BadLineMode,
+    print_error_to: TextIO | None,
+    bad_lines: BadLineCollector | None,
+    raw_line: str | None = None,
+):
+    match bad_line_mode:
+        case BadLineMode.ERROR:
+            raise error
+        case BadLineMode.WARNING:
+            print(
+                f"BAD LINE WARNING!\n{error.get_printable_message()}",
+                file=print_error_to,
+            )
+        case BadLineMode.COLLECT:
+            bad_lines.add_error(error, raw_line)
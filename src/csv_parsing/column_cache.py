@@ -0,0 +1,409 @@
+import array
+import hashlib
+import json
+import mmap
+import os
+from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
+from itertools import accumulate
+from typing import Self
+from .bad_lines import BadLineCollector
+from .columnar import ColumnBatch, DEFAULT_BATCH_SIZE
+from .error import CsvError
+from .row import CsvRow
+from .parsing.base_parser import BaseCsvParser
+from .parsing.csv_header import CsvHeader
+from .value_type import ValueType
+
+# File layout:
+#   magic
+#   the buffers of every batch, and then of every dictionary (each one starts 8 byte aligned)
+#   metadata (JSON) describing where everything is
+#   metadata size (unsigned 64 bit int)
+#   magic
+# The metadata goes at the end so batches can be written as they come out of the parser.
+_MAGIC = b"CSVCOLS\0"
+_VERSION = 5
+_ALIGNMENT = 8
+_SIZE_FORMAT = "Q"
+_SIZE_BYTES = array.array(_SIZE_FORMAT).itemsize
+
+# How much of the start and end of the source file is hashed, hashing all of a multi-GB file would defeat the point.
+_HASH_SAMPLE_BYTES = 1 << 20
+
+
+# Used to tell if the cache still belongs to the CSV file it was made from.
+def _get_source_info(path: str) -> dict:
+    with open(path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(file.read(_HASH_SAMPLE_BYTES))
+        if stat.st_size > _HASH_SAMPLE_BYTES:
+            file.seek(max(_HASH_SAMPLE_BYTES, stat.st_size - _HASH_SAMPLE_BYTES))
+            digest.update(file.read())
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": digest.hexdigest(),
+    }
+
+
+# Only the columns that aren't strings, by name.
+def _get_value_type_names(header: CsvHeader | None) -> dict[str, str]:
+    if header is None:
+        return {}
+    return {
+        header.lookup_column_type(i): header.lookup_value_type(i).name
+        for i in range(header.get_column_count())
+        if header.lookup_value_type(i) != ValueType.STRING
+    }
+
+
+# Returns None if the file isn't a cache, or if the metadata is cut short or otherwise corrupt (like after a crash while
+# writing it in place, or another program writing to it). Those caches are stale, not errors.
+def _read_metadata(buffer: memoryview) -> dict | None:
+    if (
+        buffer[: len(_MAGIC)] != _MAGIC
+        or buffer[len(buffer) - len(_MAGIC) :] != _MAGIC
+    ):
+        return None
+
+    metadata_end = len(buffer) - len(_MAGIC) - _SIZE_BYTES
+    try:
+        metadata_size = buffer[metadata_end : metadata_end + _SIZE_BYTES].cast(
+            _SIZE_FORMAT
+        )[0]
+        if metadata_size > metadata_end - len(_MAGIC):
+            return None
+        # json.JSONDecodeError (and the UnicodeDecodeError for bytes that aren't UTF-8) are ValueErrors too.
+        metadata = json.loads(
+            bytes(buffer[metadata_end - metadata_size : metadata_end])
+        )
+    except (ValueError, IndexError):
+        return None
+    return metadata if isinstance(metadata, dict) else None
+
+
+class _CacheWriter:
+    def __init__(self, file) -> None:
+        self._file = file
+        self._offset = 0
+        self._write(_MAGIC)
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._offset += len(data)
+
+    # Writes a buffer and returns where it ended up, for the metadata.
+    def write_buffer(self, data: bytes | array.array) -> list[int]:
+        padding = -self._offset % _ALIGNMENT
+        if padding != 0:
+            self._write(bytes(padding))
+        offset = self._offset
+        self._write(data if isinstance(data, bytes) else data.tobytes())
+        return [offset, self._offset - offset]
+
+    def write_strings(self, values: Sequence[str]) -> list:
+        # Character (not byte) offsets, so a value can be sliced straight out of the decoded payload.
+        text = "".join(values)
+        typecode = "I" if len(text) < 1 << 32 else _SIZE_FORMAT
+        offsets = array.array(typecode, accumulate(map(len, values), initial=0))
+        return [
+            self.write_buffer(offsets),
+            self.write_buffer(text.encode("utf-8")),
+            typecode,
+        ]
+
+    def finish(self, metadata: dict):
+        data = json.dumps(metadata).encode("utf-8")
+        self._write(data)
+        self._write(array.array(_SIZE_FORMAT, [len(data)]).tobytes())
+        self._write(_MAGIC)
+
+
+# A string column read from the cache, only decoded once something actually reads it.
+class CachedStringColumn(Sequence[str]):
+    __slots__ = ("_offsets", "_payload", "_text")
+
+    def __init__(self, offsets: memoryview, payload: memoryview) -> None:
+        self._offsets = offsets
+        self._payload = payload
+        self._text = None
+
+    def _get_text(self) -> str:
+        if self._text is None:
+            self._text = str(self._payload, "utf-8")
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError(index)
+        return self._get_text()[self._offsets[index] : self._offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        text = self._get_text()
+        offsets = self._offsets
+        for i in range(len(offsets) - 1):
+            yield text[offsets[i] : offsets[i + 1]]
+
+
+# Parsed rows stored column by column in a binary file next to the CSV, so later runs can skip parsing altogether.
+# The file is memory mapped, numeric columns and dictionary codes are used straight from the mapping without copying.
+class ColumnCache:
+    def __init__(self, cache_path: str, metadata: dict, buffer: memoryview) -> None:
+        self._cache_path = cache_path
+        self._metadata = metadata
+        self._buffer = buffer
+        self._header = CsvHeader(metadata["header"]).with_value_types(
+            {
+                column_type: ValueType[value_type]
+                for column_type, value_type in metadata["value_types"].items()
+            }
+        )
+        self._typecodes = metadata["typecodes"]
+
+        self._dictionaries = []
+        for buffers in metadata["dictionaries"]:
+            self._dictionaries.append(list(self._get_strings(buffers)))
+
+    @staticmethod
+    def get_cache_path(path: str) -> str:
+        return path + ".colcache"
+
+    # Parses the CSV file with the parser from 'create_parser' and writes the result to the cache.
+    # 'key' is stored with the cache so it can be told apart from caches made with other settings
+    # (other columns, other filters, etc.) that affect what the parser produces.
+    @staticmethod
+    def write(
+        path: str,
+        create_parser: Callable[[], BaseCsvParser],
+        key: str = "",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        numeric_columns: dict[str, str] | None = None,
+        dictionary_columns: Iterable[str] | None = None,
+    ):
+        # Taken before parsing, so changes to the file while we parse it make the cache invalid right away.
+        source = _get_source_info(path)
+        cache_path = ColumnCache.get_cache_path(path)
+        temp_path = cache_path + ".tmp"
+
+        parser = create_parser()
+        try:
+            with open(temp_path, "wb") as file:
+                ColumnCache._write_batches(
+                    file,
+                    parser,
+                    source,
+                    key,
+                    batch_size,
+                    numeric_columns,
+                    dictionary_columns,
+                )
+        except BaseException:
+            # A cache that failed half way (like on an error in BadLineMode.ERROR) would only be left lying around.
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        finally:
+            parser.close()
+        # So a half written cache is never picked up.
+        os.replace(temp_path, cache_path)
+
+    @staticmethod
+    def _write_batches(
+        file,
+        parser: BaseCsvParser,
+        source: dict,
+        key: str,
+        batch_size: int,
+        numeric_columns: dict[str, str] | None,
+        dictionary_columns: Iterable[str] | None,
+    ):
+        header = None
+        typecodes = None
+        batches = []
+        # The batches from one parse share their dictionaries, so every distinct dictionary is only written once at the end.
+        dictionaries = []
+        dictionary_ids = {}
+        writer = _CacheWriter(file)
+        for batch in parser.parse_columnar(
+            batch_size, numeric_columns, dictionary_columns
+        ):
+            if header is None:
+                header = batch.get_header()
+                # Columns typed on the header are stored as numbers too, not just the 'numeric_columns'.
+                typecodes = [
+                    (
+                        column.typecode
+                        if isinstance(column, array.array) and dictionary is None
+                        else None
+                    )
+                    for column, dictionary in zip(batch._columns, batch._dictionaries)
+                ]
+
+            columns = []
+            column_dictionaries = []
+            for i in range(header.get_column_count()):
+                column = batch._columns[i]
+                dictionary = batch._dictionaries[i]
+                if isinstance(column, array.array):
+                    columns.append([writer.write_buffer(column)])
+                else:
+                    columns.append(writer.write_strings(column))
+
+                if dictionary is None:
+                    column_dictionaries.append(None)
+                    continue
+                if id(dictionary) not in dictionary_ids:
+                    dictionary_ids[id(dictionary)] = len(dictionaries)
+                    dictionaries.append(dictionary)
+                column_dictionaries.append(dictionary_ids[id(dictionary)])
+
+            # Only there when some rows are shorter than the header, see ColumnBatch.get_missing_mask.
+            row_lengths = None
+            if batch._row_lengths is not None:
+                row_lengths = writer.write_buffer(batch._row_lengths)
+            batches.append(
+                {
+                    "row_count": batch.get_row_count(),
+                    "columns": columns,
+                    "dictionaries": column_dictionaries,
+                    "row_lengths": row_lengths,
+                }
+            )
+
+        bad_lines = parser.get_bad_lines()
+        writer.finish(
+            {
+                "version": _VERSION,
+                "source": source,
+                "key": key,
+                "numeric_columns": numeric_columns or {},
+                "dictionary_columns": sorted(dictionary_columns or ()),
+                "header": header.column_decls if header is not None else [],
+                "value_types": _get_value_type_names(header),
+                "typecodes": typecodes or [],
+                "batches": batches,
+                "dictionaries": [
+                    writer.write_strings(dictionary) for dictionary in dictionaries
+                ],
+                # So loading the cache reports the same bad lines as parsing did.
+                "bad_lines": bad_lines.to_dict() if bad_lines is not None else None,
+            }
+        )
+
+    # Returns None if there is no cache for the file, or if it was made from another version of the file or with other settings.
+    @staticmethod
+    def load(
+        path: str,
+        key: str = "",
+        numeric_columns: dict[str, str] | None = None,
+        dictionary_columns: Iterable[str] | None = None,
+    ) -> Self | None:
+        cache_path = ColumnCache.get_cache_path(path)
+        try:
+            with open(cache_path, "rb") as file:
+                if os.fstat(file.fileno()).st_size < len(_MAGIC) * 2 + _SIZE_BYTES:
+                    return None
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        buffer = memoryview(mapping)
+        metadata = _read_metadata(buffer)
+        if (
+            metadata is None
+            or metadata.get("version") != _VERSION
+            or metadata["key"] != key
+            or metadata["numeric_columns"] != (numeric_columns or {})
+            or metadata["dictionary_columns"] != sorted(dictionary_columns or ())
+            or metadata["source"] != _get_source_info(path)
+        ):
+            # Otherwise the mapping stays open until the garbage collector gets to it.
+            buffer.release()
+            mapping.close()
+            return None
+        return ColumnCache(cache_path, metadata, buffer)
+
+    # Loads the cache for the file, or parses the file and writes the cache first if it is missing or out of date.
+    @staticmethod
+    def open(
+        path: str,
+        create_parser: Callable[[], BaseCsvParser],
+        key: str = "",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        numeric_columns: dict[str, str] | None = None,
+        dictionary_columns: Iterable[str] | None = None,
+    ) -> Self:
+        # It is used more than once, so it can't be a one-shot iterator.
+        dictionary_columns = list(dictionary_columns or ())
+        cache = ColumnCache.load(path, key, numeric_columns, dictionary_columns)
+        if cache is None:
+            ColumnCache.write(
+                path,
+                create_parser,
+                key,
+                batch_size,
+                numeric_columns,
+                dictionary_columns,
+            )
+            cache = ColumnCache.load(path, key, numeric_columns, dictionary_columns)
+            if cache is None:
+                raise CsvError(f"The CSV file changed while caching it! '{path}'")
+        return cache
+
+    def _get_buffer(self, location: list[int], typecode: str) -> memoryview:
+        offset, size = location
+        return self._buffer[offset : offset + size].cast(typecode)
+
+    def _get_strings(self, buffers: list) -> CachedStringColumn:
+        offsets, payload, typecode = buffers
+        return CachedStringColumn(
+            self._get_buffer(offsets, typecode), self._get_buffer(payload, "B")
+        )
+
+    def get_header(self) -> CsvHeader:
+        return self._header
+
+    # The bad lines found while parsing the file for the cache, None if the parser wasn't in BadLineMode.COLLECT.
+    def get_bad_lines(self) -> BadLineCollector | None:
+        bad_lines = self._metadata["bad_lines"]
+        return BadLineCollector.from_dict(bad_lines) if bad_lines is not None else None
+
+    def get_row_count(self) -> int:
+        return sum(batch["row_count"] for batch in self._metadata["batches"])
+
+    def stream_batches(self) -> Generator[ColumnBatch]:
+        for batch in self._metadata["batches"]:
+            columns = []
+            dictionaries = []
+            for i, buffers in enumerate(batch["columns"]):
+                dictionary_index = batch["dictionaries"][i]
+                if dictionary_index is not None:
+                    columns.append(self._get_buffer(buffers[0], "I"))
+                    dictionaries.append(self._dictionaries[dictionary_index])
+                elif self._typecodes[i] is not None:
+                    columns.append(self._get_buffer(buffers[0], self._typecodes[i]))
+                    dictionaries.append(None)
+                else:
+                    columns.append(self._get_strings(buffers))
+                    dictionaries.append(None)
+
+            row_lengths = None
+            if batch["row_lengths"] is not None:
+                row_lengths = self._get_buffer(batch["row_lengths"], "I")
+            yield ColumnBatch(
+                self._header, columns, dictionaries, batch["row_count"], row_lengths
+            )
+
+    def stream_rows(self) -> Generator[CsvRow]:
+        for batch in self.stream_batches():
+            yield from batch.stream_rows()
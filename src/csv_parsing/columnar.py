@@ -0,0 +1,321 @@
+import array
+from collections.abc import Callable, Generator, Iterable
+from itertools import compress, zip_longest
+from .error import CsvError
+from .row import CsvRow
+from .conversion import create_conversion_error
+from .parsing.csv_header import CsvHeader
+from .value_type import (
+    CONVERSION_ERRORS,
+    ValueType,
+    get_column_format,
+    get_column_to_row,
+)
+
+DEFAULT_BATCH_SIZE = 65536
+
+_FLOAT_TYPECODES = ("f", "d")
+
+
+# A batch of rows stored column by column.
+# Numeric columns are arrays, dictionary encoded columns are arrays of codes into a dictionary list,
+# and everything else is a plain list of strings.
+class ColumnBatch:
+    __slots__ = ("_header", "_columns", "_dictionaries", "_row_count", "_row_lengths")
+
+    def __init__(
+        self,
+        header: CsvHeader,
+        columns: list[array.array | list[str]],
+        dictionaries: list[list[str] | None],
+        row_count: int,
+        row_lengths: array.array | memoryview | None = None,
+    ) -> None:
+        self._header = header
+        self._columns = columns
+        self._dictionaries = dictionaries
+        self._row_count = row_count
+        # How many values every row has, only set if some of them are shorter than the header.
+        # The values a short row doesn't have are still in the columns (as something the column can store, see
+        # ColumnBatchBuilder.finish), this is what tells them apart.
+        self._row_lengths = row_lengths
+
+    def _get_index(self, column_type: str) -> int:
+        index = self._header.lookup_column_index(column_type)
+        if index is None:
+            raise KeyError(column_type)
+        return index
+
+    def get_header(self) -> CsvHeader:
+        return self._header
+
+    def get_row_count(self) -> int:
+        return self._row_count
+
+    # NOTE: For dictionary encoded columns this returns the codes, see get_dictionary.
+    def get_column(self, column_type: str) -> array.array | list[str]:
+        return self._columns[self._get_index(column_type)]
+
+    # The dictionary is shared by every batch from the same parse (so codes stay stable between batches),
+    # which means it can also contain values that only show up in later batches.
+    def get_dictionary(self, column_type: str) -> list[str] | None:
+        return self._dictionaries[self._get_index(column_type)]
+
+    # Which rows don't have a value in the column because they are too short, or None if all of them have one.
+    def get_missing_mask(self, column_type: str) -> list[bool] | None:
+        return self._get_missing_mask(self._get_index(column_type))
+
+    def _get_missing_mask(self, index: int) -> list[bool] | None:
+        row_lengths = self._row_lengths
+        if row_lengths is None or min(row_lengths, default=index + 1) > index:
+            return None
+        return [length <= index for length in self._row_lengths]
+
+    def _decode_column(self, index: int) -> list:
+        column = self._columns[index]
+        dictionary = self._dictionaries[index]
+        if dictionary is None:
+            return list(column)
+        return [dictionary[code] for code in column]
+
+    # The values a row doesn't have are None.
+    def decode_column(self, column_type: str) -> list:
+        index = self._get_index(column_type)
+        column = self._decode_column(index)
+        missing = self._get_missing_mask(index)
+        if missing is None:
+            return column
+        return [
+            None if is_missing else value for value, is_missing in zip(column, missing)
+        ]
+
+    # A new batch with only the rows that are True in 'mask'.
+    def select_rows(self, mask: list[bool]) -> "ColumnBatch":
+        columns = []
+        for column in self._columns:
+            if isinstance(column, array.array):
+                columns.append(array.array(column.typecode, compress(column, mask)))
+            elif isinstance(column, memoryview):
+                columns.append(array.array(column.format, compress(column, mask)))
+            else:
+                columns.append(list(compress(column, mask)))
+        row_lengths = self._row_lengths
+        if row_lengths is not None:
+            row_lengths = array.array("I", compress(row_lengths, mask))
+        return ColumnBatch(
+            self._header, columns, self._dictionaries, sum(mask), row_lengths
+        )
+
+    # Turns the batch back into rows. Columns with a value type in the header get the same values the row parsers
+    # would have given them, other numeric columns are converted back to strings.
+    def stream_rows(self) -> Generator[CsvRow]:
+        columns = []
+        for i in range(len(self._columns)):
+            column = self._decode_column(i)
+            # Numeric columns are either arrays, or memoryviews when they come from a ColumnCache.
+            if (
+                isinstance(self._columns[i], (array.array, memoryview))
+                and self._dictionaries[i] is None
+            ):
+                value_type = self._header.lookup_value_type(i)
+                if value_type == ValueType.STRING:
+                    column = list(map(str, column))
+                elif (to_row := get_column_to_row(value_type)) is not None:
+                    column = list(map(to_row, column))
+            columns.append(column)
+
+        if self._row_lengths is None:
+            for values in zip(*columns):
+                yield CsvRow(self._header, values)
+            return
+        # Short rows only ever lack the last columns, so they are cut back to the values they had.
+        for values, length in zip(zip(*columns), self._row_lengths):
+            yield CsvRow(self._header, values[:length])
+
+
+def _raise_error(error: CsvError):
+    raise error
+
+
+# Returns the codes of the values, adding the ones that aren't in the dictionary yet.
+def _encode(
+    dictionary: list[str], dictionary_indices: dict[str, int], values: Iterable[str]
+) -> array.array:
+    def encode(value: str) -> int:
+        code = dictionary_indices.get(value)
+        if code is None:
+            code = dictionary_indices[value] = len(dictionary)
+            dictionary.append(value)
+        return code
+
+    return array.array("I", map(encode, values))
+
+
+# Columns with a value type in the header are converted to arrays in bulk when the batch is finished,
+# as are the 'numeric_columns' (which override the value types).
+# Values that can't be converted go to 'handle_error' and their rows are left out of the batch.
+class ColumnBatchBuilder:
+    def __init__(
+        self,
+        header: CsvHeader,
+        numeric_columns: dict[str, str] | None = None,
+        dictionary_columns: Iterable[str] | None = None,
+        handle_error: Callable[[CsvError], None] | None = None,
+    ) -> None:
+        self._header = header
+        self._rows = []
+        self._handle_error = handle_error or _raise_error
+
+        column_count = header.get_column_count()
+        # Maps each column index to the array typecode it should be stored as and what converts the values to it
+        # (None for strings).
+        self._formats = [
+            get_column_format(header.lookup_value_type(i)) for i in range(column_count)
+        ]
+        for column_type, typecode in (numeric_columns or {}).items():
+            convert = float if typecode in _FLOAT_TYPECODES else int
+            self._formats[self._get_index(column_type)] = (typecode, convert)
+
+        self._dictionaries = [None] * column_count
+        self._dictionary_indices = [None] * column_count
+        for column_type in dictionary_columns or ():
+            index = self._get_index(column_type)
+            if self._formats[index] is not None:
+                continue  # Numeric columns are stored as numbers, not codes.
+            self._dictionaries[index] = []
+            self._dictionary_indices[index] = {}
+
+    def _get_index(self, column_type: str) -> int:
+        index = self._header.lookup_column_index(column_type)
+        if index is None:
+            raise CsvError(f"Unknown column type! '{column_type}'")
+        return index
+
+    def push_row(self, values: tuple[str, ...]):
+        self._rows.append(values)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _build_numeric_column(
+        self, index: int, values: tuple[str, ...], bad_rows: set[int]
+    ) -> array.array | None:
+        # Returns None if some of the values are bad, after reporting them and adding their rows to 'bad_rows'.
+        typecode, convert = self._formats[index]
+        try:
+            return array.array(typecode, map(convert, values))
+        except CONVERSION_ERRORS:
+            pass
+
+        # Only now go through them one by one, to find the bad ones.
+        for row_index, value in enumerate(values):
+            try:
+                array.array(typecode, [convert(value)])
+            except CONVERSION_ERRORS:
+                self._handle_error(create_conversion_error(self._header, index, value))
+                bad_rows.add(row_index)
+        return None
+
+    def _build_dictionary_column(self, index: int, values: tuple[str, ...]) -> array.array:
+        return _encode(
+            self._dictionaries[index], self._dictionary_indices[index], values
+        )
+
+    # What the values short rows don't have are stored as, something every column can convert.
+    def _get_missing_value(self, index: int) -> str:
+        return "" if self._formats[index] is None else "0"
+
+    def finish(self) -> ColumnBatch:
+        row_count = len(self._rows)
+        column_count = self._header.get_column_count()
+
+        # Transposing with zip keeps the row->column shuffle in C.
+        row_lengths = None
+        if min(map(len, self._rows), default=column_count) >= column_count:
+            transposed = list(zip(*self._rows))
+        else:
+            # The values short rows don't have are padded with something the column can store, the row lengths tell
+            # them apart from real values (see ColumnBatch.get_missing_mask).
+            row_lengths = array.array("I", map(len, self._rows))
+            transposed = list(zip_longest(*self._rows))
+            transposed.extend([(None,) * row_count] * (column_count - len(transposed)))
+            for i, values in enumerate(transposed):
+                if None in values:
+                    missing_value = self._get_missing_value(i)
+                    transposed[i] = [
+                        missing_value if value is None else value for value in values
+                    ]
+        self._rows = []
+
+        numeric_columns = {}
+        bad_rows = set()
+        for i, values in enumerate(transposed):
+            if self._formats[i] is not None:
+                numeric_columns[i] = self._build_numeric_column(i, values, bad_rows)
+
+        if len(bad_rows) != 0:
+            mask = [row_index not in bad_rows for row_index in range(row_count)]
+            transposed = [list(compress(values, mask)) for values in transposed]
+            if row_lengths is not None:
+                row_lengths = array.array("I", compress(row_lengths, mask))
+            row_count -= len(bad_rows)
+            # Everything that is left converts fine now.
+            for i in numeric_columns:
+                numeric_columns[i] = self._build_numeric_column(i, transposed[i], bad_rows)
+
+        columns = []
+        for i, values in enumerate(transposed):
+            if i in numeric_columns:
+                columns.append(numeric_columns[i])
+            elif self._dictionaries[i] is not None:
+                columns.append(self._build_dictionary_column(i, values))
+            else:
+                columns.append(list(values))
+
+        return ColumnBatch(
+            self._header, columns, self._dictionaries, row_count, row_lengths
+        )
+
+
+# Moves the codes of batches built with dictionaries of their own (like the ones from the workers of the
+# MultiProcessCsvParser) to dictionaries shared by all of them, so the codes stay stable between batches again.
+class DictionaryMerger:
+    def __init__(self) -> None:
+        self._dictionaries = None
+        self._dictionary_indices = None
+
+    def merge(self, batches: list[ColumnBatch]) -> list[ColumnBatch]:
+        # Batches from the same builder share their dictionaries, so each of them only has to be looked up once.
+        # Keyed by id, which is fine since they are all alive until we return.
+        remaps = {}
+        merged = []
+        for batch in batches:
+            if self._dictionaries is None:
+                encoded = [dictionary is not None for dictionary in batch._dictionaries]
+                self._dictionaries = [
+                    [] if is_encoded else None for is_encoded in encoded
+                ]
+                self._dictionary_indices = [
+                    {} if is_encoded else None for is_encoded in encoded
+                ]
+
+            columns = list(batch._columns)
+            for i, dictionary in enumerate(batch._dictionaries):
+                if dictionary is None:
+                    continue
+                remap = remaps.get(id(dictionary))
+                if remap is None:
+                    remap = remaps[id(dictionary)] = _encode(
+                        self._dictionaries[i], self._dictionary_indices[i], dictionary
+                    )
+                columns[i] = array.array("I", map(remap.__getitem__, columns[i]))
+            merged.append(
+                ColumnBatch(
+                    batch._header,
+                    columns,
+                    self._dictionaries,
+                    batch._row_count,
+                    batch._row_lengths,
+                )
+            )
+        return merged
@@ -0,0 +1,67 @@
+import bz2
+import gzip
+import lzma
+from enum import Enum
+from typing import BinaryIO, TextIO
+from .lexing.block_reader import DEFAULT_BLOCK_SIZE
+from .lexing.decompression_reader import DecompressionReader
+
+
+class Compression(Enum):
+    NONE = 0
+    GZIP = 1
+    BZ2 = 2
+    XZ = 3
+
+
+# The first bytes of each format, which is more reliable than the extension.
+_MAGIC_BYTES = {
+    Compression.GZIP: b"\x1f\x8b",
+    Compression.BZ2: b"BZh",
+    Compression.XZ: b"\xfd7zXZ\x00",
+}
+
+# Only used for files that are too short to have any magic bytes.
+_EXTENSIONS = {
+    ".gz": Compression.GZIP,
+    ".bz2": Compression.BZ2,
+    ".xz": Compression.XZ,
+}
+
+_OPENERS = {
+    Compression.GZIP: gzip.open,
+    Compression.BZ2: bz2.open,
+    Compression.XZ: lzma.open,
+}
+
+
+def detect_compression(path: str) -> Compression:
+    with open(path, "rb") as file:
+        start = file.read(max(map(len, _MAGIC_BYTES.values())))
+    for compression, magic in _MAGIC_BYTES.items():
+        if start.startswith(magic):
+            return compression
+    if len(start) < len(_MAGIC_BYTES[Compression.GZIP]):
+        for extension, compression in _EXTENSIONS.items():
+            if path.endswith(extension):
+                return compression
+    return Compression.NONE
+
+
+def _open_compressed(path: str, compression: Compression) -> BinaryIO:
+    return _OPENERS[compression](path, "rb")
+
+
+# Opens a CSV file for the parsers, which can be compressed with gzip, bz2 or xz.
+# Compressed files are decompressed in a background thread, so it happens while the parser works on the previous block.
+def open_csv_source(
+    path: str,
+    encoding: str = "utf-8",
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> TextIO | DecompressionReader:
+    compression = detect_compression(path)
+    if compression == Compression.NONE:
+        return open(path, encoding=encoding)
+    return DecompressionReader(
+        lambda: _open_compressed(path, compression), encoding, block_size
+    )
@@ -0,0 +1,67 @@
+from collections.abc import Callable, Generator, Iterable
+from operator import call
+from typing import override
+from .error import CsvError
+from .lexing.token import CsvToken
+from .parsing.csv_header import CsvHeader
+from .row import CsvRow
+from .value_type import CONVERSION_ERRORS
+
+
+class CsvConversionError(CsvError):
+    def __init__(self, message: str, token: CsvToken | None) -> None:
+        self.token = token
+        super().__init__(message)
+
+    @override
+    def get_printable_message(self) -> str:
+        # We only know where the value came from if the parser kept its debug tokens.
+        if self.token is None:
+            return self.message
+        return f"{self.message}\n\tat line {self.token.line_num}, column {self.token.char_index}"
+
+
+def create_conversion_error(
+    header: CsvHeader, index: int, value: str, token: CsvToken | None = None
+) -> CsvConversionError:
+    return CsvConversionError(
+        f"Could not convert value '{value}' of column '{header.lookup_column_type(index)}' to {header.lookup_value_type(index).name}!",
+        token,
+    )
+
+
+def _find_conversion_error(row: CsvRow) -> CsvConversionError:
+    header = row.get_header()
+    tokens = row.debug_get_tokens()
+    for i, (convert, value) in enumerate(zip(header.get_converters(), row.get_raw_values())):
+        try:
+            convert(value)
+        except CONVERSION_ERRORS:
+            return create_conversion_error(
+                header, i, value, tokens[i] if tokens is not None else None
+            )
+
+
+# Converts the values of the rows to the value types of their header.
+# Rows with a value that can't be converted go to 'handle_error' (which decides if we keep going) and are dropped.
+def convert_rows(
+    rows: Iterable[CsvRow], handle_error: Callable[[CsvError], None]
+) -> Generator[CsvRow]:
+    last_header = None
+    converters = None
+    for row in rows:
+        header = row.get_header()
+        # Rows from the same parse share their header, so this is almost always the same as last time.
+        if header is not last_header:
+            last_header = header
+            converters = header.get_converters()
+        if converters is None:
+            yield row
+            continue
+
+        try:
+            values = tuple(map(call, converters, row.get_raw_values()))
+        except CONVERSION_ERRORS:
+            handle_error(_find_conversion_error(row))
+            continue
+        yield CsvRow(header, values, row.debug_get_tokens())
@@ -6,5 +6,17 @@ class CsvError(Exception):
     def __repr__(self) -> str:
         return self.get_printable_message()
 
+    # Exceptions are unpickled by calling the class with 'args', which doesn't fit the constructors of the subclasses.
+    # Needed for errors raised in the worker processes of the multi-process parser.
+    def __reduce__(self):
+        return (_restore_error, (type(self), self.__dict__))
+
     def get_printable_message(self) -> str:
         return f"{self.message}"
+
+
+def _restore_error(error_type: type[CsvError], state: dict) -> CsvError:
+    error = error_type.__new__(error_type)
+    error.__dict__.update(state)
+    Exception.__init__(error, error.get_printable_message())
+    return error
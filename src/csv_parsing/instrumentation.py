@@ -0,0 +1,297 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Generator, Iterable
+from typing import TextIO
+from .profile_mode import ProfileMode
+
+# How often the ThroughputReporter prints by default, in seconds.
+DEFAULT_REPORT_INTERVAL = 5.0
+# How many functions (or lines) a profile prints by default.
+DEFAULT_PROFILE_LIMIT = 25
+
+
+# The counters and the timer of a single stage, like "parse" or "frames".
+# The time is inclusive: a stage that pulls its items from another one (see PipelineStats.time_items)
+# also pays for the time of that one, get_own_seconds takes it off again.
+class StageStats:
+    __slots__ = (
+        "name",
+        "inner",
+        "item_count",
+        "byte_count",
+        "error_count",
+        "seconds",
+        "timed_count",
+        "max_seconds",
+    )
+
+    def __init__(self, name: str, inner: "StageStats | None" = None) -> None:
+        self.name = name
+        self.inner = inner
+        # Rows for the parsers and validators, tokens for the lexer, chunks for the worker processes, etc.
+        self.item_count = 0
+        self.byte_count = 0
+        self.error_count = 0
+        self.seconds = 0.0
+        # How many times the timer ran, and the longest it took. For chunks that is the latency of a single chunk.
+        self.timed_count = 0
+        self.max_seconds = 0.0
+
+    def add_time(self, seconds: float):
+        self.seconds += seconds
+        self.timed_count += 1
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def get_own_seconds(self) -> float:
+        if self.inner is None:
+            return self.seconds
+        return max(self.seconds - self.inner.seconds, 0.0)
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.item_count,
+            "bytes": self.byte_count,
+            "errors": self.error_count,
+            "seconds": self.seconds,
+            "own_seconds": self.get_own_seconds(),
+            "timed": self.timed_count,
+            "max_seconds": self.max_seconds,
+        }
+
+
+# Profiles a single stage, only while that stage is actually running.
+class _StageProfiler:
+    def __init__(self, mode: ProfileMode) -> None:
+        self._mode = mode
+        self._profile = cProfile.Profile() if mode == ProfileMode.CPROFILE else None
+
+    def enable(self):
+        if self._profile is not None:
+            self._profile.enable()
+        elif not tracemalloc.is_tracing():
+            # Stopping it would throw the traces away, so it keeps tracing (everything) until the report.
+            tracemalloc.start()
+
+    def disable(self):
+        if self._profile is not None:
+            self._profile.disable()
+
+    def report(self, name: str, print_to: TextIO | None, limit: int):
+        out = io.StringIO()
+        if self._profile is not None:
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(
+                limit
+            )
+        elif tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            for statistic in snapshot.statistics("lineno")[:limit]:
+                print(statistic, file=out)
+        print(
+            f"PROFILE of '{name}' ({self._mode.name})\n{out.getvalue()}",
+            file=print_to or sys.stderr,
+        )
+
+
+# Counters and timers for every stage of a run, from reading the file to drawing the frames.
+# Everything that can report to it takes it as an optional 'stats' argument (or has a set_stats method),
+# without one nothing is counted and the only cost is a check for None outside of the per row work.
+# The stages can be read while the run is going, from any thread.
+class PipelineStats:
+    def __init__(
+        self,
+        total_bytes: int | None = None,
+        profile_stages: dict[str, ProfileMode] | None = None,
+        print_profile_to: TextIO | None = None,
+        profile_limit: int = DEFAULT_PROFILE_LIMIT,
+    ) -> None:
+        # The size of the input, for the ETA. None if it isn't known (like with a compressed file).
+        self.total_bytes = total_bytes
+        # These stages are profiled while they run, the report is printed once the stage is done.
+        self._profile_stages = profile_stages or {}
+        self._print_profile_to = print_profile_to
+        self._profile_limit = profile_limit
+
+        self._profilers: dict[str, _StageProfiler] = {}
+
+        self._stages: dict[str, StageStats] = {}
+        self._started = time.monotonic()
+
+    # Returns the stage with that name, creating it the first time.
+    # 'inner' is the stage it pulls its items from, if any.
+    def get_stage(self, name: str, inner: str | None = None) -> StageStats:
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = StageStats(
+                name, None if inner is None else self.get_stage(inner)
+            )
+        return stage
+
+    def get_stages(self) -> list[StageStats]:
+        return list(self._stages.values())
+
+    def get_elapsed_seconds(self) -> float:
+        return time.monotonic() - self._started
+
+    def add_error(self, name: str):
+        self.get_stage(name).error_count += 1
+
+    def _get_profiler(self, name: str) -> _StageProfiler | None:
+        mode = self._profile_stages.get(name)
+        if mode is None:
+            return None
+        profiler = self._profilers.get(name)
+        if profiler is None:
+            profiler = self._profilers[name] = _StageProfiler(mode)
+        return profiler
+
+    # Times (and counts) every item of 'items' as stage 'name'.
+    def time_items[T](
+        self, name: str, items: Iterable[T], inner: str | None = None
+    ) -> Generator[T]:
+        stage = self.get_stage(name, inner)
+        profiler = self._get_profiler(name)
+        if profiler is not None:
+            yield from self._profile_items(stage, items, profiler)
+            return
+
+        clock = time.perf_counter
+        iterator = iter(items)
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stage.add_time(clock() - start)
+                return
+            stage.add_time(clock() - start)
+            stage.item_count += 1
+            yield item
+
+    def _profile_items[T](
+        self, stage: StageStats, items: Iterable[T], profiler: _StageProfiler
+    ) -> Generator[T]:
+        clock = time.perf_counter
+        iterator = iter(items)
+        try:
+            while True:
+                start = clock()
+                profiler.enable()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    profiler.disable()
+                    stage.add_time(clock() - start)
+                stage.item_count += 1
+                yield item
+        finally:
+            self.report_profile(stage.name)
+
+    # Times a single call as stage 'name', like drawing one frame.
+    def time_call(self, name: str, function, *args):
+        stage = self.get_stage(name)
+        profiler = self._get_profiler(name)
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return function(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            stage.add_time(time.perf_counter() - start)
+            stage.item_count += 1
+
+    # Prints the profile of a stage and starts over. Stages timed with time_items are reported when they end,
+    # the ones timed with time_call (which don't have an end) only when this is called.
+    def report_profile(self, name: str):
+        profiler = self._profilers.pop(name, None)
+        if profiler is not None:
+            profiler.report(name, self._print_profile_to, self._profile_limit)
+
+    def report_profiles(self):
+        for name in list(self._profilers):
+            self.report_profile(name)
+
+    def snapshot(self) -> dict[str, dict]:
+        return {stage.name: stage.to_dict() for stage in self.get_stages()}
+
+    # How much of the input was read per second so far, and the estimated seconds left (None if unknown).
+    def get_progress(self, read_stage: str = "read") -> tuple[float, float | None]:
+        stage = self._stages.get(read_stage)
+        elapsed = self.get_elapsed_seconds()
+        if stage is None or elapsed <= 0:
+            return 0.0, None
+        rate = stage.byte_count / elapsed
+        if self.total_bytes is None or rate <= 0:
+            return rate, None
+        return rate, max(self.total_bytes - stage.byte_count, 0) / rate
+
+    def format_report(self) -> str:
+        lines = [
+            f"{'stage':<12}{'items':>12}{'MB':>10}{'errors':>8}{'seconds':>10}{'own':>10}{'max ms':>10}"
+        ]
+        for stage in self.get_stages():
+            lines.append(
+                f"{stage.name:<12}{stage.item_count:>12,}{stage.byte_count / 1_000_000:>10.1f}{stage.error_count:>8,}"
+                f"{stage.seconds:>10.2f}{stage.get_own_seconds():>10.2f}{stage.max_seconds * 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+# Prints the throughput (and the ETA, if the size of the input is known) every 'interval' seconds from a background thread.
+class ThroughputReporter:
+    def __init__(
+        self,
+        stats: PipelineStats,
+        interval: float = DEFAULT_REPORT_INTERVAL,
+        print_to: TextIO | None = None,
+        rows_stage: str = "parse",
+    ) -> None:
+        self._stats = stats
+        self._interval = interval
+        self._print_to = print_to
+        self._rows_stage = rows_stage
+        self._stop_requested = threading.Event()
+        self._thread = None
+
+    def format_progress(self) -> str:
+        rate, eta = self._stats.get_progress()
+        rows = self._stats.get_stage(self._rows_stage)
+        elapsed = self._stats.get_elapsed_seconds()
+        message = (
+            f"{elapsed:.0f}s: {rows.item_count:,} rows, {rows.error_count:,} errors, "
+            f"{rate / 1_000_000:.1f} MB/s"
+        )
+        if eta is not None:
+            message += f", ETA {eta:.0f}s"
+        return message
+
+    def _run(self):
+        while not self._stop_requested.wait(self._interval):
+            print(self.format_progress(), file=self._print_to or sys.stderr, flush=True)
+
+    def start(self):
+        # A daemon, so it never keeps the process alive on its own.
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_requested.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,74 @@
+from collections.abc import Iterable
+from typing import Self
+from .parsing.csv_header import CsvHeader
+
+# Columns like the game name or the language only have a few thousand distinct values,
+# columns with more than this (like the review text) stop being interned once the pool is full.
+DEFAULT_INTERN_POOL_SIZE = 65536
+
+
+# Hands out the same string object for every copy of a value, so repeated values only take up memory once
+# and comparing or hashing them (e.g. as dict keys) mostly comes down to an identity check.
+class StringPool:
+    __slots__ = ("_values", "_max_size")
+
+    def __init__(self, max_size: int = DEFAULT_INTERN_POOL_SIZE) -> None:
+        self._values: dict[str, str] = {}
+        self._max_size = max_size
+
+    def intern(self, value: str) -> str:
+        interned = self._values.get(value)
+        if interned is not None:
+            return interned
+        # Once full, new values are passed through as is, so a column with mostly unique values can't grow it forever.
+        if len(self._values) < self._max_size:
+            self._values[value] = value
+        return value
+
+    def get_size(self) -> int:
+        return len(self._values)
+
+
+# One pool per interned column of a header.
+class InternedColumns:
+    __slots__ = ("pools", "_interned")
+
+    def __init__(
+        self, header: CsvHeader, column_types: Iterable[str], pool_size: int
+    ) -> None:
+        # Indexed by column (None for columns that aren't interned), so the parsers can check a value by its column index.
+        self.pools: list[StringPool | None] = [None] * header.get_column_count()
+        for index in header.resolve_columns(column_types):
+            self.pools[index] = StringPool(pool_size)
+        self._interned = [
+            (index, pool) for index, pool in enumerate(self.pools) if pool is not None
+        ]
+
+    # Returns None if there is nothing to intern, so the parsers can skip it altogether.
+    @staticmethod
+    def from_columns(
+        header: CsvHeader,
+        column_types: Iterable[str] | None,
+        pool_size: int = DEFAULT_INTERN_POOL_SIZE,
+    ) -> Self | None:
+        if column_types is None:
+            return None
+        column_types = list(column_types)
+        if len(column_types) == 0:
+            return None
+        return InternedColumns(header, column_types, pool_size)
+
+    def intern_value(self, index: int, value: str) -> str:
+        if index >= len(self.pools):
+            return value
+        pool = self.pools[index]
+        return value if pool is None else pool.intern(value)
+
+    # Interns the values of a whole (unprojected) row in place.
+    def intern_values(self, values: list[str]):
+        value_count = len(values)
+        for index, pool in self._interned:
+            if index < value_count:
+                value = values[index]
+                # Looking it up directly first skips a method call for the (much more common) values already in the pool.
+                values[index] = pool._values.get(value) or pool.intern(value)
@@ -0,0 +1,217 @@
+import re
+from collections.abc import Iterable
+from typing import TextIO
+
+from .block_reader import BlockReader, DEFAULT_BLOCK_SIZE
+from .lexer_error import CsvLexerError
+from .token import CsvTokenType, CsvToken, CsvValueToken
+
+# The characters that end (or change the meaning of) an unquoted value.
+_VALUE_BREAK = re.compile(r'[,\n"]')
+
+
+# Produces exactly the same tokens as CsvLexer, but instead of walking the input char by char
+# it reads big blocks and finds the value boundaries with regex/str.find, so values become slices.
+class BlockCsvLexer:
+    def __init__(
+        self,
+        input: TextIO | Iterable[str],
+        allow_multiline_strings: bool = False,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        first_line_num: int = 1,
+    ) -> None:
+        self._reader = BlockReader(input, block_size)
+        self.allow_multiline_strings = allow_multiline_strings
+
+        self._buf = ""
+        self._pos = 0
+        # Index (in _buf) of the first char of the current line, used to calculate the char index of tokens.
+        self._line_start = 0
+        self._exhausted = False
+
+        self.line_num = first_line_num
+
+        # The column of the next value, and which columns get their values built (None for all of them).
+        self._column_index = 0
+        self._keep_columns = None
+
+    # Only the values of the columns that are True are copied out of the buffer, the tokens of the others get an empty
+    # value. They are still scanned, so they raise the same errors. Applies from the next token on.
+    def set_keep_columns(self, keep_columns: list[bool] | None):
+        self._keep_columns = keep_columns
+
+    def _fill(self, keep_from: int) -> int:
+        # Appends the next block and drops everything before 'keep_from' from the buffer.
+        # The current line is always kept whole, see get_line.
+        # Returns how far the existing indices moved, or -1 if there is nothing more to read.
+        if self._exhausted:
+            return -1
+
+        block = self._reader.read_block()
+        if not block:
+            self._exhausted = True
+            return -1
+
+        keep_from = min(keep_from, self._line_start)
+
+        self._buf = self._buf[keep_from:] + block
+        self._pos -= keep_from
+        self._line_start -= keep_from
+        return keep_from
+
+    def _unterminated_string(self, start: int, at_end: bool) -> CsvLexerError:
+        if at_end:
+            return CsvLexerError(
+                "Unterminated string at end of input!", start - self._line_start
+            )
+        return CsvLexerError(
+            "Unterminated string! Did you mean to turn enable mutli-line strings?",
+            start - self._line_start,
+        )
+
+    def _scan_value(self, keep: bool = True) -> tuple[str | None, int]:
+        # Scans the value starting at the current position and returns it together with its char index.
+        # If 'keep' is False the value is skipped over without being copied out of the buffer, and None is returned.
+        start = self._pos
+        search_from = start
+
+        while True:
+            match = _VALUE_BREAK.search(self._buf, search_from)
+            if match is not None:
+                break
+            search_from = len(self._buf)
+            shift = self._fill(start)
+            if shift < 0:
+                break
+            start -= shift
+            search_from -= shift
+
+        buf = self._buf
+        char_index = start - self._line_start + 1
+
+        if match is None:
+            # Ran into the end of the input.
+            self._pos = len(buf)
+            return buf[start:] if keep else None, char_index
+
+        end = match.start()
+        if buf[end] != '"':
+            self._pos = end
+            return buf[start:end] if keep else None, char_index
+
+        # Everything up until the closing quote is part of the string.
+        quote_start = end + 1
+        search_from = quote_start
+        while True:
+            close = self._buf.find('"', search_from)
+            if not self.allow_multiline_strings:
+                limit = close if close != -1 else len(self._buf)
+                if self._buf.find("\n", search_from, limit) != -1:
+                    raise self._unterminated_string(start, at_end=False)
+            if close != -1:
+                break
+            search_from = len(self._buf)
+            shift = self._fill(start)
+            if shift < 0:
+                raise self._unterminated_string(start, at_end=True)
+            start -= shift
+            end -= shift
+            quote_start -= shift
+            search_from -= shift
+
+        buf = self._buf
+        newlines = buf.count("\n", quote_start, close)
+        if newlines:
+            # Like CsvLexer, the token gets the line number the string ends on.
+            self.line_num += newlines
+            self._line_start = buf.rfind("\n", quote_start, close) + 1
+
+        self._pos = close + 1
+        if not keep:
+            return None, char_index
+        return buf[start:end] + buf[quote_start:close], char_index
+
+    # The line the lexer is on, without the newline. Reads ahead until the line ends (or the input does),
+    # since the buffer can end anywhere in the line, even right at its start.
+    def get_line(self) -> str:
+        while True:
+            end = self._buf.find("\n", self._line_start)
+            if end != -1:
+                return self._buf[self._line_start : end]
+            if self._fill(self._pos) < 0:
+                return self._buf[self._line_start :]
+
+    # Skips the rest of the current row without producing any tokens, so the next token is the newline ending it (or EOF).
+    # Must only be called in between tokens. The values skipped over are never lexed, so they can't raise errors either.
+    def skip_row(self):
+        in_string = False
+        while True:
+            newline = self._buf.find("\n", self._pos)
+            end = len(self._buf) if newline == -1 else newline
+            # Every quote starts or ends a string, like when lexing.
+            if self._buf.count('"', self._pos, end) % 2 == 1:
+                in_string = not in_string
+
+            if newline == -1:
+                self._pos = end
+                if self._fill(self._pos) < 0:
+                    return
+                continue
+
+            if in_string and self.allow_multiline_strings:
+                self.start_next_line(newline)
+                continue
+            self._pos = newline
+            return
+
+    # Like skip_row, but the newline ending the row is skipped too, so the lexer is at the start of the next row.
+    # Returns whether there was a newline, False means the row ran into the end of the input.
+    def skip_to_next_row(self) -> bool:
+        self.skip_row()
+        if self._pos >= len(self._buf):
+            return False
+        self.start_next_line(self._pos)
+        return True
+
+    # Moves the lexer past the newline at index 'newline' of the buffer, to the start of the line after it.
+    def start_next_line(self, newline: int):
+        self._pos = newline + 1
+        self.line_num += 1
+        self._line_start = self._pos
+
+    def _create_value_token(self) -> CsvValueToken:
+        keep_columns = self._keep_columns
+        if keep_columns is None or (
+            self._column_index < len(keep_columns) and keep_columns[self._column_index]
+        ):
+            value, char_index = self._scan_value()
+        else:
+            _, char_index = self._scan_value(keep=False)
+            value = ""
+        return CsvValueToken(value, self.line_num, char_index)
+
+    def lex(self) -> Iterable[CsvToken]:
+        while True:
+            if self._pos >= len(self._buf) and self._fill(self._pos) < 0:
+                # We use an EOF token because it's simpler than handling the StopIteration exception in my opinion.
+                yield CsvToken(
+                    CsvTokenType.END_OF_FILE,
+                    self.line_num,
+                    self._pos - self._line_start,
+                )
+                continue
+
+            char = self._buf[self._pos]
+            match char:
+                case ",":
+                    self._pos += 1
+                    self._column_index += 1
+                    yield CsvToken(
+                        CsvTokenType.COMMA, self.line_num, self._pos - self._line_start
+                    )
+                case "\n":
+                    self.start_next_line(self._pos)
+                    self._column_index = 0
+                    yield CsvToken(CsvTokenType.NEWLINE, self.line_num, 0)
+                case _:
+                    yield self._create_value_token()
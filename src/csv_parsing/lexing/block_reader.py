@@ -0,0 +1,31 @@
+from collections.abc import Iterable
+from typing import TextIO
+
+# Big enough that the per-block overhead disappears, small enough to not matter memory wise.
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+class BlockReader:
+    def __init__(
+        self, input: TextIO | Iterable[str], block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> None:
+        self._block_size = block_size
+
+        # File-like inputs can hand us whole blocks directly,
+        # plain line iterators get their lines joined up to roughly the block size instead.
+        self._read = getattr(input, "read", None)
+        self._input = input if self._read is not None else iter(input)
+
+    def read_block(self) -> str:
+        # Returns an empty string when the input is exhausted.
+        if self._read is not None:
+            return self._read(self._block_size)
+
+        parts = []
+        size = 0
+        for line in self._input:
+            parts.append(line)
+            size += len(line)
+            if size >= self._block_size:
+                break
+        return "".join(parts)
@@ -0,0 +1,50 @@
+import time
+from collections.abc import Iterable, Iterator
+from typing import TextIO
+from ..instrumentation import StageStats
+
+
+# Counts how many bytes are read from the input (and how long reading takes) into a stage of a PipelineStats.
+# The bytes are counted as UTF-8, which is what the input almost always is, ASCII text is counted without encoding it.
+# This one is for plain line iterators, see CountingReader for file-like inputs.
+class CountingLineReader:
+    def __init__(self, input: TextIO | Iterable[str], stage: StageStats) -> None:
+        self._input = input
+        self._lines = None
+        self._stage = stage
+
+    def _count(self, text: str, start: float) -> str:
+        stage = self._stage
+        stage.add_time(time.perf_counter() - start)
+        stage.byte_count += len(text) if text.isascii() else len(text.encode())
+        return text
+
+    # Used by the char by char lexer, which reads the input line by line.
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if self._lines is None:
+            self._lines = iter(self._input)
+        start = time.perf_counter()
+        return self._count(next(self._lines), start)
+
+    def close(self):
+        close = getattr(self._input, "close", None)
+        if close is not None:
+            close()
+
+
+# Only file-like inputs get a read method, the block based lexers check for it to decide how to read the input.
+class CountingReader(CountingLineReader):
+    def read(self, size: int = -1) -> str:
+        start = time.perf_counter()
+        return self._count(self._input.read(size), start)
+
+
+def count_reads(
+    input: TextIO | Iterable[str], stage: StageStats
+) -> CountingLineReader:
+    if hasattr(input, "read"):
+        return CountingReader(input, stage)
+    return CountingLineReader(input, stage)
@@ -0,0 +1,122 @@
+import codecs
+import io
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from typing import BinaryIO
+from .block_reader import DEFAULT_BLOCK_SIZE
+
+# How many decoded blocks the background thread can get ahead of the parser.
+DEFAULT_MAX_BLOCKS_IN_FLIGHT = 4
+
+
+# Carries an exception from the decompression thread over to the reader.
+class _ReadFailure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+
+
+# Decompresses (and decodes) a file in a background thread and hands the text to the lexer in big blocks.
+# zlib, bz2 and lzma all let go of the GIL while they work, so decompressing the next block really overlaps with
+# parsing the current one instead of the two taking turns.
+class DecompressionReader:
+    def __init__(
+        self,
+        open_file: Callable[[], BinaryIO],
+        encoding: str = "utf-8",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_blocks_in_flight: int = DEFAULT_MAX_BLOCKS_IN_FLIGHT,
+    ) -> None:
+        self._blocks = queue.Queue(max_blocks_in_flight)
+        self._stop_requested = threading.Event()
+        self._exhausted = False
+
+        # What is left of the last block after the last complete line, only used when iterating line by line.
+        self._partial_line = ""
+        self._lines: list[str] = []
+
+        self._thread = threading.Thread(
+            target=self._decompress,
+            args=(open_file, encoding, block_size),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        # Waits for room in the queue, unless the reader was closed in the meantime.
+        while not self._stop_requested.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _decompress(
+        self, open_file: Callable[[], BinaryIO], encoding: str, block_size: int
+    ):
+        # Translates the line endings like opening a plain file in text mode does, so '\r\n' is just a newline here too.
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(), translate=True
+        )
+        try:
+            with open_file() as file:
+                while True:
+                    data = file.read(block_size)
+                    text = decoder.decode(data, final=not data)
+                    if text and not self._put(text):
+                        return
+                    if not data:
+                        break
+        except Exception as e:
+            self._put(_ReadFailure(e))
+            return
+        self._put("")
+
+    def _next_block(self) -> str:
+        # Returns an empty string once everything was read.
+        if self._exhausted:
+            return ""
+        block = self._blocks.get()
+        if isinstance(block, _ReadFailure):
+            self._exhausted = True
+            raise block.error
+        if not block:
+            self._exhausted = True
+        return block
+
+    def close(self):
+        self._stop_requested.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Used by the block based lexers.
+    # The blocks are as big as the decompression thread made them, 'size' is ignored.
+    def read(self, size: int = -1) -> str:
+        return self._next_block()
+
+    # Used by the char by char lexer, which reads the input line by line.
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        while not self._lines:
+            block = self._next_block()
+            if not block:
+                if not self._partial_line:
+                    raise StopIteration
+                line = self._partial_line
+                self._partial_line = ""
+                return line
+
+            parts = (self._partial_line + block).split("\n")
+            self._partial_line = parts.pop()
+            self._lines = [part + "\n" for part in parts]
+            self._lines.reverse()
+        return self._lines.pop()
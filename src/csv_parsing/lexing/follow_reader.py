@@ -0,0 +1,117 @@
+import codecs
+import io
+import os
+import threading
+import time
+from collections.abc import Iterator
+from ..error import CsvError
+from .block_reader import DEFAULT_BLOCK_SIZE
+
+# How long to wait before checking the file for new data again.
+DEFAULT_POLL_INTERVAL = 0.25
+
+
+# Reads a file that is still being appended to, like 'tail -f'.
+# Instead of ending at the end of the file it waits for more data, so a parser reading from it keeps going
+# (and keeps yielding rows) until stop() is called or nothing was appended for 'idle_timeout' seconds.
+# The file stays open and is only ever read forward, nothing is read twice.
+# Only complete lines are handed out, so a row (or a multi-byte character) that is only partly written yet
+# is held back until the rest of it is appended. Quoted values spanning several appends simply make the lexer
+# wait for the next line like it would with any other multi-line string.
+# NOTE: Use it with the FusedCsvParser, CsvParser looks one token ahead so it only yields a row once the next one starts.
+class FollowReader:
+    def __init__(
+        self,
+        path: str,
+        encoding: str = "utf-8",
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        idle_timeout: float | None = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        self._file = open(path, "rb")
+        # Like opening the file in text mode, '\r\n' and a lone '\r' become '\n'. A '\r' at the end of what was read so far
+        # is held back until we know whether a '\n' follows it.
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(), translate=True
+        )
+        self._poll_interval = poll_interval
+        self._idle_timeout = idle_timeout
+        self._block_size = block_size
+        self._stop_requested = threading.Event()
+
+        # Decoded text after the last complete line.
+        self._pending = ""
+        # Lines that were read but not handed out yet (in reverse), only used when iterating line by line.
+        self._lines: list[str] = []
+
+    # Makes the reader end the input the next time it runs out of data. Safe to call from other threads.
+    def stop(self):
+        self._stop_requested.set()
+
+    def close(self):
+        self._stop_requested.set()
+        self._file.close()
+
+    def _read_available(self) -> bool:
+        # Reads everything appended since last time into '_pending', returns False if there was nothing new.
+        data = self._file.read(self._block_size)
+        if not data:
+            # If the file got shorter it was replaced or truncated, and our position means nothing anymore.
+            if self._file.tell() > os.fstat(self._file.fileno()).st_size:
+                raise CsvError(
+                    f"The followed file was truncated! '{self._file.name}'"
+                )
+            return False
+        self._pending += self._decoder.decode(data)
+        return True
+
+    def _take_lines(self) -> str:
+        # Waits until there is at least one complete line and returns every complete line there is.
+        # Returns an empty string once we are stopped, after handing out whatever is left.
+        last_data = time.monotonic()
+        while True:
+            end = self._pending.rfind("\n") + 1
+            if end != 0:
+                lines = self._pending[:end]
+                self._pending = self._pending[end:]
+                return lines
+
+            if self._read_available():
+                last_data = time.monotonic()
+                continue
+
+            if self._stop_requested.is_set() or (
+                self._idle_timeout is not None
+                and time.monotonic() - last_data >= self._idle_timeout
+            ):
+                # The last line might never get its newline, it is still a row though.
+                rest = self._pending + self._decoder.decode(b"", final=True)
+                self._pending = ""
+                return rest
+
+            self._stop_requested.wait(self._poll_interval)
+
+    # Used by the block based lexers, which read the input in blocks.
+    def read(self, size: int = -1) -> str:
+        if self._lines:
+            lines = "".join(reversed(self._lines))
+            self._lines.clear()
+            return lines
+        return self._take_lines()
+
+    # Used by the char by char lexer, which reads the input line by line.
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if not self._lines:
+            lines = self._take_lines()
+            if not lines:
+                raise StopIteration
+            # Not splitlines, that also splits on things like \x0b which are just part of a value to us.
+            parts = lines.split("\n")
+            self._lines = [part + "\n" for part in parts[:-1]]
+            if parts[-1]:
+                self._lines.append(parts[-1])
+            self._lines.reverse()
+        return self._lines.pop()
@@ -1,21 +1,38 @@
+import re
 from collections.abc import Iterable
 
 from .lexer_error import CsvLexerError
 from .token import CsvTokenType, CsvToken, CsvValueToken
 
+# What ends (or changes the meaning of) a value that is skipped, outside and inside of a string.
+_VALUE_BREAK = re.compile(r'[,\n"]')
+_STRING_BREAK = re.compile(r'["\n]')
+
 
 class CsvLexer:
     def __init__(
-        self, input: Iterable[str], allow_multiline_strings: bool = False
+        self,
+        input: Iterable[str],
+        allow_multiline_strings: bool = False,
+        first_line_num: int = 1,
     ) -> None:
         self.input = input
-        self.line_num = 0
+        self.line_num = first_line_num - 1  # Priming the pump advances to the first line.
         self.line = ""
         self.index = 0
         self.allow_multiline_strings = allow_multiline_strings
 
         self.stop_requested = False
 
+        # The column of the next value, and which columns get their values built (None for all of them).
+        self._column_index = 0
+        self._keep_columns = None
+
+    # Only the values of the columns that are True are built, the tokens of the others get an empty value.
+    # They are still lexed, so they raise the same errors. Applies from the next token on.
+    def set_keep_columns(self, keep_columns: list[bool] | None):
+        self._keep_columns = keep_columns
+
     def _advance_line(self):
         try:
             self.line = next(self.input)
@@ -47,13 +64,26 @@ class CsvLexer:
                 self._advance_char()
                 continue
 
-            # Don't handle these cases here.
-            if char == "\n":
-                if in_string and not self.allow_multiline_strings:
+            if char == "\n" and in_string:
+                if not self.allow_multiline_strings:
                     raise CsvLexerError(
                         "Unterminated string! Did you mean to turn enable mutli-line strings?",
                         start_index,
                     )
+                # The string continues on the next line, so the newline is part of the value.
+                str_buf += char
+                self._advance_line()
+                if self.stop_requested:
+                    raise CsvLexerError(
+                        "Unterminated string at end of input!", start_index
+                    )
+                continue
+
+            if char == None and in_string:
+                raise CsvLexerError("Unterminated string at end of input!", start_index)
+
+            # Don't handle these cases here.
+            if char == "\n":
                 break
 
             # Don't handle these cases here.
@@ -65,6 +95,56 @@ class CsvLexer:
 
         return CsvValueToken(str_buf, self.line_num, start_index + 1)
 
+    # Like _create_value_token, but finds the end of the value with a regex instead of building it char by char.
+    def _skip_value_token(self) -> CsvValueToken:
+        start_index = self.index
+        match = _VALUE_BREAK.search(self.line, self.index)
+        if match is None or match.group() != '"':
+            self.index = len(self.line) if match is None else match.start()
+            return CsvValueToken("", self.line_num, start_index + 1)
+
+        index = match.end()
+        while True:
+            match = _STRING_BREAK.search(self.line, index)
+            if match is None:
+                raise CsvLexerError("Unterminated string at end of input!", start_index)
+            if match.group() == '"':
+                self.index = match.end()
+                return CsvValueToken("", self.line_num, start_index + 1)
+
+            if not self.allow_multiline_strings:
+                raise CsvLexerError(
+                    "Unterminated string! Did you mean to turn enable mutli-line strings?",
+                    start_index,
+                )
+            self._advance_line()
+            if self.stop_requested:
+                raise CsvLexerError("Unterminated string at end of input!", start_index)
+            index = 0
+
+    # The line the lexer is on, without the newline.
+    def get_line(self) -> str:
+        return self.line.removesuffix("\n")
+
+    # Skips the rest of the current row without producing any tokens, so the next token is the newline ending it (or EOF).
+    # Must only be called in between tokens. The values skipped over are never lexed, so they can't raise errors either.
+    def skip_row(self):
+        in_string = False
+        while not self.stop_requested:
+            end = len(self.line) - 1 if self.line.endswith("\n") else len(self.line)
+            # Every quote starts or ends a string, like when lexing.
+            if self.line.count('"', self.index, end) % 2 == 1:
+                in_string = not in_string
+
+            if (
+                not in_string
+                or not self.allow_multiline_strings
+                or end == len(self.line)
+            ):
+                self.index = end
+                return
+            self._advance_line()
+
     def lex(self) -> Iterable[CsvToken]:
         self._advance_line()  # Priming the pump :)
         while True:
@@ -75,12 +155,21 @@ class CsvLexer:
             match char:
                 case ",":
                     self._advance_char()
+                    self._column_index += 1
                     yield CsvToken(CsvTokenType.COMMA, self.line_num, self.index)
                 case "\n":
                     self._advance_line()
+                    self._column_index = 0
                     yield CsvToken(CsvTokenType.NEWLINE, self.line_num, self.index)
                 case None:
                     # We use an EOF token because it's simpler than handling the StopIteration exception in my opinion.
                     yield CsvToken(CsvTokenType.END_OF_FILE, self.line_num, self.index)
                 case _:
-                    yield self._create_value_token()
+                    keep_columns = self._keep_columns
+                    if keep_columns is None or (
+                        self._column_index < len(keep_columns)
+                        and keep_columns[self._column_index]
+                    ):
+                        yield self._create_value_token()
+                    else:
+                        yield self._skip_value_token()
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class LexerMode(Enum):
+    # CsvLexer, goes through the input one character at a time.
+    CHARACTER = 0
+    # BlockCsvLexer, finds the delimiters in blocks of the input with str.find. The default, since it makes the same
+    # tokens and errors a lot faster.
+    BLOCK = 1
@@ -9,6 +9,8 @@ class CsvTokenType(Enum):
 
 
 class CsvToken:
+    __slots__ = ("type", "line_num", "char_index")
+
     def __init__(self, type: CsvTokenType, line_num: int, char_index: int) -> None:
         self.type = type
         self.line_num = line_num
@@ -19,6 +21,8 @@ class CsvToken:
 
 
 class CsvValueToken(CsvToken):
+    __slots__ = ("value",)
+
     def __init__(self, value: str, line_num: int, char_index: int) -> None:
         super().__init__(CsvTokenType.VALUE, line_num, char_index)
         self.value = value
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+from collections.abc import AsyncGenerator, Callable, Iterable
+from concurrent.futures import Executor
+from contextlib import aclosing
+from itertools import batched
+from typing import Self
+from ..bad_lines import BadLineCollector
+from ..columnar import ColumnBatch, DEFAULT_BATCH_SIZE
+from ..row import CsvRow
+from .base_parser import BaseAsyncCsvParser, BaseCsvParser
+from .parser_backend import ParserBackend, create_parser
+
+# Rows are handed to the event loop in batches, so it isn't woken up for every single row.
+DEFAULT_ROWS_PER_BATCH = 1024
+# How many batches can be parsed ahead of the consumer before the parsing thread waits for it.
+DEFAULT_MAX_BATCHES_IN_FLIGHT = 16
+
+
+# Marks the end of the stream in the queue.
+class _EndOfStream:
+    pass
+
+
+# Carries an exception from the parsing thread over to the consumer.
+class _ParseFailure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+
+
+# Runs a normal (blocking) parser in an executor and hands its rows to the event loop, so 'async for' over it
+# never blocks the other coroutines. The parser reads its input in large blocks in that thread as well.
+# With the default thread pool the parsing still shares the GIL with the loop, for CPU heavy loads the parser can be
+# a MultiProcessCsvParser, in which case the thread only waits on the worker processes.
+class AsyncCsvParser(BaseAsyncCsvParser):
+    def __init__(
+        self,
+        create_parser: Callable[[], BaseCsvParser],
+        rows_per_batch: int = DEFAULT_ROWS_PER_BATCH,
+        max_batches_in_flight: int = DEFAULT_MAX_BATCHES_IN_FLIGHT,
+        executor: Executor | None = None,
+    ) -> None:
+        # Called in the executor, so even opening the input (and reading the header) doesn't block the loop.
+        self._create_parser = create_parser
+        self._rows_per_batch = rows_per_batch
+        self._max_batches_in_flight = max_batches_in_flight
+        # None means the default executor of the loop.
+        self._executor = executor
+
+        self._parser = None
+
+    # The file is opened (and closed) by the parser of the backend, so it can be compressed too (see create_parser).
+    @staticmethod
+    def from_path(
+        path: str,
+        bad_line_mode,
+        print_error_to,
+        backend: ParserBackend = ParserBackend.AUTO,
+        encoding="utf-8",
+        rows_per_batch: int = DEFAULT_ROWS_PER_BATCH,
+        max_batches_in_flight: int = DEFAULT_MAX_BATCHES_IN_FLIGHT,
+        executor: Executor | None = None,
+        **parser_kwargs,
+    ) -> Self:
+        # 'parser_kwargs' go to create_parser, like the options or allow_multiline_strings.
+        return AsyncCsvParser(
+            lambda: create_parser(
+                path,
+                bad_line_mode,
+                print_error_to,
+                backend,
+                encoding,
+                **parser_kwargs,
+            ),
+            rows_per_batch,
+            max_batches_in_flight,
+            executor,
+        )
+
+    def had_errors(self) -> bool:
+        return self._parser is not None and self._parser.had_errors()
+
+    def get_bad_lines(self) -> BadLineCollector | None:
+        return None if self._parser is None else self._parser.get_bad_lines()
+
+    def _produce(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        queue: asyncio.Queue,
+        slots: threading.Semaphore,
+        stop: threading.Event,
+        stream: Callable[[BaseCsvParser], Iterable],
+    ):
+        # Runs in the executor. Every item takes a slot, which the consumer gives back once it took the item out,
+        # so at most 'max_batches_in_flight' items are ever waiting in the queue.
+        try:
+            self._parser = self._create_parser()
+            for item in stream(self._parser):
+                slots.acquire()
+                if stop.is_set():
+                    return
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, _ParseFailure(e))
+            return
+        finally:
+            # Also when stopped early, which leaves the file open otherwise.
+            if self._parser is not None:
+                self._parser.close()
+        loop.call_soon_threadsafe(queue.put_nowait, _EndOfStream)
+
+    async def _stream(
+        self, stream: Callable[[BaseCsvParser], Iterable]
+    ) -> AsyncGenerator:
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        slots = threading.Semaphore(self._max_batches_in_flight)
+        stop = threading.Event()
+        producer = loop.run_in_executor(
+            self._executor, self._produce, loop, queue, slots, stop, stream
+        )
+        try:
+            while True:
+                item = await queue.get()
+                if item is _EndOfStream:
+                    break
+                if isinstance(item, _ParseFailure):
+                    raise item.error
+                slots.release()
+                yield item
+        finally:
+            # If the consumer stops early, wake the producer up (if it is waiting for a slot) so it can quit.
+            stop.set()
+            slots.release()
+            await producer
+
+    async def parse(self) -> AsyncGenerator[CsvRow]:
+        # 'async for' doesn't close the stream if we stop early, aclosing makes sure the producer is stopped right away.
+        async with aclosing(
+            self._stream(lambda parser: batched(parser.parse(), self._rows_per_batch))
+        ) as stream:
+            async for rows in stream:
+                for row in rows:
+                    yield row
+
+    async def parse_columnar(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        numeric_columns: dict[str, str] | None = None,
+        dictionary_columns: Iterable[str] | None = None,
+    ) -> AsyncGenerator[ColumnBatch]:
+        async with aclosing(
+            self._stream(
+                lambda parser: parser.parse_columnar(
+                    batch_size, numeric_columns, dictionary_columns
+                )
+            )
+        ) as stream:
+            async for batch in stream:
+                yield batch
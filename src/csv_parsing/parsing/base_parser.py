@@ -1,13 +1,112 @@
 from abc import abstractmethod
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator, Iterable
+from typing import TextIO
+from ..error import CsvError
+from ..bad_line_mode import BadLineMode
+from ..bad_lines import BadLineCollector, handle_bad_line
 from ..row import CsvRow
+from ..columnar import ColumnBatch, ColumnBatchBuilder, DEFAULT_BATCH_SIZE
+from .parse_options import ParseOptions
 
 
 class BaseCsvParser:
+    # Only set when the parser opened the input itself (see from_path), which it closes once the rows are parsed.
+    _source = None
+
+    def __init__(
+        self,
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        options: ParseOptions | None,
+    ) -> None:
+        self._had_error = False
+        self._bad_line_mode = bad_line_mode
+        self._print_to_file = print_error_to
+        self._options = options if options is not None else ParseOptions()
+        # Where the bad lines go in BadLineMode.COLLECT, only set in that mode.
+        self._bad_lines = None
+        if bad_line_mode == BadLineMode.COLLECT:
+            bad_lines = self._options.bad_lines
+            self._bad_lines = bad_lines if bad_lines is not None else BadLineCollector()
+
+    def had_errors(self) -> bool:
+        return self._had_error
+
+    # Closes the input the parser opened itself, for when the rows aren't parsed to the end.
+    def close(self):
+        if self._source is not None:
+            self._source.close()
+
+    # The bad lines collected in BadLineMode.COLLECT, None in the other modes.
+    def get_bad_lines(self) -> BadLineCollector | None:
+        return self._bad_lines
+
+    @abstractmethod
+    def parse(self) -> Generator[CsvRow]:
+        pass
+
+    # The rows before their values are converted to the value types of the header,
+    # which parse_columnar does for whole columns at once instead.
+    def _parse_unconverted(self) -> Generator[CsvRow]:
+        return self.parse()
+
+    # Reports a bad line, which is raised, printed or collected depending on the BadLineMode.
+    # It doesn't put the parser in an error state, so it is also used for errors that aren't tied to the parsing itself
+    # (like a value that can't be converted). 'raw_line' is the (first) line of the row, if the parser knows it.
+    def _report_error(self, error: CsvError, raw_line: str | None = None):
+        self._had_error = True
+        if self._options.stats is not None:
+            self._options.stats.add_error("parse")
+        handle_bad_line(
+            error, self._bad_line_mode, self._print_to_file, self._bad_lines, raw_line
+        )
+
+    # Collects the parsed rows into batches of per-column buffers instead of yielding them one by one.
+    # 'numeric_columns' maps column names to the array typecode they should be stored as (e.g. "q" or "d"),
+    # 'dictionary_columns' are stored as codes into a list of distinct values.
+    def parse_columnar(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        numeric_columns: dict[str, str] | None = None,
+        dictionary_columns: Iterable[str] | None = None,
+    ) -> Generator[ColumnBatch]:
+        builder = None
+        for row in self._parse_unconverted():
+            if builder is None:
+                builder = ColumnBatchBuilder(
+                    row.get_header(),
+                    numeric_columns,
+                    dictionary_columns,
+                    self._report_error,
+                )
+            builder.push_row(row.get_raw_values())
+            if len(builder) >= batch_size:
+                yield builder.finish()
+
+        if builder is not None and len(builder) != 0:
+            yield builder.finish()
+
+
+# The same as BaseCsvParser, but for parsers used from asyncio code.
+class BaseAsyncCsvParser:
     @abstractmethod
     def had_errors(self) -> bool:
         pass
 
+    # The bad lines collected in BadLineMode.COLLECT, None in the other modes.
     @abstractmethod
-    def parse(self) -> Generator[CsvRow]:
+    def get_bad_lines(self) -> BadLineCollector | None:
+        pass
+
+    @abstractmethod
+    def parse(self) -> AsyncGenerator[CsvRow]:
+        pass
+
+    @abstractmethod
+    def parse_columnar(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        numeric_columns: dict[str, str] | None = None,
+        dictionary_columns: Iterable[str] | None = None,
+    ) -> AsyncGenerator[ColumnBatch]:
         pass
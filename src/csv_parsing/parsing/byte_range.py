@@ -0,0 +1,120 @@
+import io
+import mmap
+import os
+from collections.abc import Generator
+
+# How many bytes every worker gets to parse (give or take the rest of the last row).
+DEFAULT_CHUNK_BYTES = 1 << 24
+
+
+# A piece of a file that starts and ends on a row boundary, the worker process reads and decodes it on its own.
+class ByteRange:
+    __slots__ = ("path", "encoding", "start", "end", "first_line_num")
+
+    def __init__(
+        self, path: str, encoding: str, start: int, end: int, first_line_num: int
+    ) -> None:
+        self.path = path
+        self.encoding = encoding
+        self.start = start
+        self.end = end
+        self.first_line_num = first_line_num
+
+    # The line endings are translated like opening the whole file in text mode would, see count_line_breaks.
+    def read(self) -> io.StringIO:
+        with open(self.path, "rb") as file:
+            file.seek(self.start)
+            data = file.read(self.end - self.start)
+        return io.StringIO(data.decode(self.encoding), newline=None)
+
+    # Like read, but streams the range from the file instead of reading all of it up front.
+    # Better for big ranges, the caller has to close it though.
+    def open(self) -> io.TextIOWrapper:
+        file = open(self.path, "rb")
+        file.seek(self.start)
+        reader = io.BufferedReader(_BoundedReader(file, self.end - self.start))
+        return io.TextIOWrapper(reader, encoding=self.encoding, newline=None)
+
+    def __repr__(self) -> str:
+        return f"ByteRange({self.path}, {self.start}..{self.end})"
+
+
+# Reads at most 'size' bytes from the file, and then acts like the file ended.
+class _BoundedReader(io.RawIOBase):
+    def __init__(self, file: io.BufferedReader, size: int) -> None:
+        self._file = file
+        self._left = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._left)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._left -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+# How many line breaks the parsers see in 'data'. Like in a file opened in text mode, '\r\n' and a lone '\r' are
+# line breaks too. The ranges always end right after a '\n', so a '\r\n' is never split over two of them.
+def count_line_breaks(data: bytes) -> int:
+    newlines = data.count(b"\n")
+    carriage_returns = data.count(b"\r")
+    if carriage_returns == 0:
+        return newlines
+    return newlines + carriage_returns - data.count(b"\r\n")
+
+
+def _find_chunk_end(
+    mm: mmap.mmap, start: int, size: int, chunk_bytes: int, quote_aware: bool
+) -> tuple[int, int]:
+    # Returns the end of the chunk (right after a newline) and how many newlines are in it.
+    end = min(start + chunk_bytes, size)
+    scanned = start
+    quotes = 0
+    newlines = 0
+    while True:
+        if end < size:
+            newline = mm.find(b"\n", end)
+            end = size if newline == -1 else newline + 1
+
+        data = mm[scanned:end]
+        newlines += count_line_breaks(data)
+        quotes += data.count(b'"')
+        scanned = end
+
+        # Every chunk starts outside of a string and every quote toggles in and out of one,
+        # so an odd amount of quotes means this newline is part of a multi-line string and we have to keep going.
+        if end >= size or not quote_aware or quotes % 2 == 0:
+            return end, newlines
+
+
+# Splits the file from 'start' into ranges of roughly 'chunk_bytes' without reading it into Python objects,
+# the ranges are found lazily so parsing can start before the whole file has been looked at.
+def find_byte_ranges(
+    path: str,
+    encoding: str,
+    start: int,
+    first_line_num: int,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    quote_aware: bool = False,
+) -> Generator[ByteRange]:
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if start >= size:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while start < size:
+                end, newlines = _find_chunk_end(
+                    mm, start, size, chunk_bytes, quote_aware
+                )
+                yield ByteRange(path, encoding, start, end, first_line_num)
+                start = end
+                first_line_num += newlines
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class ChunkTransport(Enum):
+    # The worker pickles its parsed rows back to the parent.
+    PICKLE = 0
+    # The worker writes its values into shared memory and the parent reads them from there.
+    SHARED_MEMORY = 1
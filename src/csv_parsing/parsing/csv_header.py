@@ -1,9 +1,69 @@
+from collections.abc import Callable, Iterable
+from typing import Any
+from ..error import CsvError
+from ..value_type import ValueType, get_row_converter
+
+
 class CsvHeader:
     def __init__(self, column_decls: list[str]) -> None:
         self.column_decls = column_decls
 
+        # Every row shares this table, so looking up a column by name is O(1) without any per-row cost.
+        # Built in reverse so the first column wins if a name is declared twice.
+        self._column_indices = {
+            column: i for i, column in reversed(list(enumerate(column_decls)))
+        }
+        # The schema, every column is a string unless it says otherwise.
+        self._value_types = [ValueType.STRING] * len(column_decls)
+        self._converters = None
+
     def lookup_column_type(self, comma_index: int) -> str:
         return self.column_decls[comma_index]
 
+    def lookup_column_index(self, column_type: str) -> int | None:
+        return self._column_indices.get(column_type)
+
     def get_column_count(self) -> int:
         return len(self.column_decls)
+
+    # Resolves column names to their indices, in the order they appear in the file.
+    def resolve_columns(self, column_types: Iterable[str]) -> list[int]:
+        indices = set()
+        for column_type in column_types:
+            index = self.lookup_column_index(column_type)
+            if index is None:
+                raise CsvError(f"Unknown column type! '{column_type}'")
+            indices.add(index)
+        return sorted(indices)
+
+    def project(self, indices: list[int]) -> "CsvHeader":
+        projected = CsvHeader([self.column_decls[i] for i in indices])
+        projected._set_value_types([self._value_types[i] for i in indices])
+        return projected
+
+    # A copy of the header where the columns in 'value_types' have those types,
+    # which the parsers convert the values to before they hand out the rows.
+    def with_value_types(self, value_types: dict[str, ValueType]) -> "CsvHeader":
+        types = self._value_types.copy()
+        for column_type, value_type in value_types.items():
+            index = self.lookup_column_index(column_type)
+            if index is None:
+                raise CsvError(f"Unknown column type! '{column_type}'")
+            types[index] = value_type
+
+        typed = CsvHeader(self.column_decls)
+        typed._set_value_types(types)
+        return typed
+
+    def _set_value_types(self, value_types: list[ValueType]):
+        self._value_types = value_types
+        self._converters = None
+        if any(value_type != ValueType.STRING for value_type in value_types):
+            self._converters = tuple(map(get_row_converter, value_types))
+
+    def lookup_value_type(self, index: int) -> ValueType:
+        return self._value_types[index]
+
+    # One converter per column (str for strings), or None if every column is a string and nothing has to be converted.
+    def get_converters(self) -> tuple[Callable[[str], Any], ...] | None:
+        return self._converters
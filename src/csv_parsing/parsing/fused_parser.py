@@ -0,0 +1,383 @@
+from collections.abc import Callable, Iterable, Generator, Sequence
+from operator import itemgetter
+from typing import Self, TextIO
+from ..lexing.token import CsvToken, CsvValueToken, CsvTokenType
+from ..lexing.block_lexer import BlockCsvLexer
+from ..lexing.block_reader import DEFAULT_BLOCK_SIZE
+from ..row import CsvRow
+from ..row_filter import CompiledFilters
+from ..conversion import convert_rows
+from ..interning import InternedColumns
+from ..lexing.counting_reader import count_reads
+from ..compression import open_csv_source
+from ..bad_line_mode import BadLineMode
+from .csv_header import CsvHeader
+from .parser_error import CsvParserError
+from .base_parser import BaseCsvParser
+from .parse_options import ParseOptions
+
+
+# Goes straight from the input to CsvRows without producing a token stream in between.
+# Rows without quotes are split in one go, only rows with quotes are walked value by value.
+# Tokens for error messages are only created once an error actually happens.
+class FusedCsvParser(BaseCsvParser):
+    def __init__(
+        self,
+        lines: TextIO | Iterable[str],
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        allow_multiline_strings: bool = False,
+        parse_header: bool = True,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        first_line_num: int = 1,
+        options: ParseOptions | None = None,
+    ) -> None:
+        # NOTE: With options.columns quoted rows skip the other columns without copying them out of the input,
+        # unquoted rows are still split in one go since that is faster than skipping values one by one in Python.
+        super().__init__(bad_line_mode, print_error_to, options)
+
+        stats = self._options.stats
+        if stats is not None:
+            lines = count_reads(lines, stats.get_stage("read"))
+        # We only use the lexer for its buffer and for scanning quoted values, never for tokens.
+        self._lexer = BlockCsvLexer(
+            lines, allow_multiline_strings, block_size, first_line_num
+        )
+        # Without anyone being told what else is wrong with a bad row, the rest of it is skipped without scanning it.
+        self._resync = bad_line_mode in (BadLineMode.COLLECT, BadLineMode.SKIP)
+
+        if parse_header:
+            self._parse_header()
+
+    @staticmethod
+    def from_header(
+        header: CsvHeader,
+        lines: TextIO | Iterable[str],
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        allow_multiline_strings: bool = False,
+        first_line_num: int = 1,
+        options: ParseOptions | None = None,
+    ) -> Self:
+        new = FusedCsvParser(
+            lines,
+            bad_line_mode,
+            print_error_to,
+            allow_multiline_strings,
+            parse_header=False,
+            first_line_num=first_line_num,
+            options=options,
+        )
+        new._header = header
+        return new
+
+    # Opens the file itself, which can be compressed (see open_csv_source), and closes it once it is parsed.
+    # 'parser_kwargs' are the rest of the arguments of the constructor.
+    @staticmethod
+    def from_path(
+        path: str,
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        encoding: str = "utf-8",
+        **parser_kwargs,
+    ) -> Self:
+        source = open_csv_source(path, encoding)
+        new = FusedCsvParser(source, bad_line_mode, print_error_to, **parser_kwargs)
+        new._source = source
+        return new
+
+    def _parse_header(self):
+        # Like CsvParser, the header is just every value on the first line.
+        values, _, _, _ = self._scan_row(None)
+        self._header = CsvHeader(values)
+
+    def _row_error(self, error: CsvParserError) -> CsvParserError:
+        # Errors have to be raised right away to match CsvParser, which stops at the first bad token.
+        # Otherwise the row gets scanned to the end so we can skip past it (or just skipped, see BlockCsvLexer.skip_to_next_row).
+        if self._bad_line_mode == BadLineMode.ERROR:
+            self._report_error(error)
+        return error
+
+    def _find_line_error(
+        self, values: list[str], line_num: int, at_eof: bool
+    ) -> CsvParserError | None:
+        # Finds the first error in a split line, with the same message and position CsvParser would report.
+        column_count = self._header.get_column_count()
+        last = len(values) - 1
+        offset = 0
+        for i, value in enumerate(values):
+            offset += len(value)
+            if value == "" and not (i == last and at_eof):
+                if i == last:
+                    token = CsvToken(CsvTokenType.NEWLINE, line_num + 1, 0)
+                else:
+                    token = CsvToken(CsvTokenType.COMMA, line_num, offset + 1)
+                return CsvParserError("Empty value!", token)
+            if i != last and i + 1 >= column_count:
+                return CsvParserError(
+                    "Too many commas in row!",
+                    CsvToken(CsvTokenType.COMMA, line_num, offset + 1),
+                )
+            offset += 1
+        return None
+
+    def _scan_row(
+        self,
+        column_count: int | None,
+        keep_columns: list[bool] | None = None,
+        filters: CompiledFilters | None = None,
+        interned: InternedColumns | None = None,
+    ) -> tuple[list[str] | None, list[CsvValueToken], CsvParserError | None, bool]:
+        # The slow path for rows with quotes in them, which walks the row value by value like CsvParser does with tokens.
+        # Returns the values, their debug tokens (if kept), the first error (if any) and whether the row ended with a newline.
+        # Values in columns that are False in 'keep_columns' are skipped.
+        # If the filters reject the row, the values are None.
+        lexer = self._lexer
+        keep_debug_tokens = self._options.keep_debug_tokens
+        values = []
+        tokens = []
+        error = None
+        column_index = 0
+        filters_passed = 0
+        after_delimiter = True  # The start of a row counts as coming right after a newline.
+        while True:
+            if error is not None and self._resync:
+                return values, tokens, error, lexer.skip_to_next_row()
+            if lexer._pos >= len(lexer._buf) and lexer._fill(lexer._pos) < 0:
+                if (
+                    filters is not None
+                    and error is None
+                    and filters_passed != filters.column_count
+                ):
+                    return None, tokens, None, False
+                return values, tokens, error, False
+
+            char = lexer._buf[lexer._pos]
+            match char:
+                case ",":
+                    lexer._pos += 1
+                    char_index = lexer._pos - lexer._line_start
+                    if error is None and after_delimiter:
+                        error = self._row_error(
+                            CsvParserError(
+                                "Empty value!",
+                                CsvToken(
+                                    CsvTokenType.COMMA, lexer.line_num, char_index
+                                ),
+                            )
+                        )
+                    column_index += 1
+                    if (
+                        error is None
+                        and column_count is not None
+                        and column_index >= column_count
+                    ):
+                        error = self._row_error(
+                            CsvParserError(
+                                "Too many commas in row!",
+                                CsvToken(
+                                    CsvTokenType.COMMA, lexer.line_num, char_index
+                                ),
+                            )
+                        )
+                    after_delimiter = True
+                case "\n":
+                    lexer.start_next_line(lexer._pos)
+                    if error is None and after_delimiter and column_count is not None:
+                        error = self._row_error(
+                            CsvParserError(
+                                "Empty value!",
+                                CsvToken(CsvTokenType.NEWLINE, lexer.line_num, 0),
+                            )
+                        )
+                    # A row that ends before every filtered column was checked doesn't match.
+                    if (
+                        filters is not None
+                        and error is None
+                        and filters_passed != filters.column_count
+                    ):
+                        return None, tokens, None, True
+                    return values, tokens, error, True
+                case _:
+                    predicates = None
+                    if filters is not None and column_index < len(
+                        filters.predicates
+                    ):
+                        predicates = filters.predicates[column_index]
+
+                    keep = keep_columns is None or (
+                        column_index < len(keep_columns) and keep_columns[column_index]
+                    )
+                    if not keep and predicates is None:
+                        lexer._scan_value(keep=False)
+                        after_delimiter = False
+                        continue
+
+                    value, char_index = lexer._scan_value()
+                    after_delimiter = False
+                    if predicates is not None and error is None:
+                        if not filters.accepts_value(column_index, value):
+                            # Like CsvParser, the rest of the row isn't scanned.
+                            return None, tokens, None, lexer.skip_to_next_row()
+                        filters_passed += 1
+                    if not keep:
+                        continue
+
+                    if interned is not None:
+                        value = interned.intern_value(column_index, value)
+                    values.append(value)
+                    if keep_debug_tokens:
+                        tokens.append(CsvValueToken(value, lexer.line_num, char_index))
+
+    def _create_line_tokens(
+        self, values: list[str], line_num: int
+    ) -> tuple[CsvValueToken, ...]:
+        tokens = []
+        char_index = 1
+        for value in values:
+            tokens.append(CsvValueToken(value, line_num, char_index))
+            char_index += len(value) + 1
+        return tuple(tokens)
+
+    def parse(self) -> Generator[CsvRow]:
+        rows = self._parse_unconverted()
+        if self._options.value_types is not None:
+            rows = convert_rows(rows, self._report_error)
+        yield from rows
+
+    def _parse_unconverted(self) -> Generator[CsvRow]:
+        rows = self._parse_rows()
+        options = self._options
+        if options.stats is not None:
+            rows = options.stats.time_items("parse", rows, inner="read")
+        if options.validator is not None:
+            rows = options.validator.validate(rows)
+        return rows
+
+    def _get_row_header(self, header: CsvHeader) -> CsvHeader:
+        if self._options.value_types is not None:
+            return header.with_value_types(self._options.value_types)
+        return header
+
+    def _parse_rows(self) -> Generator[CsvRow]:
+        lexer = self._lexer
+        header = self._header
+        column_count = header.get_column_count()
+        options = self._options
+        keep_debug_tokens = options.keep_debug_tokens
+
+        selected = None
+        keep_columns = None
+        # Typed before projecting, so the value types can name columns that aren't selected.
+        row_header = self._get_row_header(header)
+        if options.columns is not None:
+            selected = header.resolve_columns(options.columns)
+            keep_columns = [False] * column_count
+            for index in selected:
+                keep_columns[index] = True
+            row_header = row_header.project(selected)
+            pick_selected = _create_picker(selected)
+
+        filters = CompiledFilters.from_filters(header, options.filters)
+        if filters is not None:
+            # Splitting off one more than the filtered columns leaves the rest of the row in one piece.
+            filter_split = filters.last_column + 1
+
+        interned = InternedColumns.from_columns(
+            header, options.intern_columns, options.intern_pool_size
+        )
+
+        while True:
+            buf = lexer._buf
+            pos = lexer._pos
+            newline = buf.find("\n", pos)
+            at_eof = False
+            if newline == -1:
+                if lexer._fill(pos) >= 0:
+                    continue
+                # No more newlines, so whatever is left is the last row.
+                if pos >= len(buf):
+                    break
+                at_eof = True
+                newline = len(buf)
+
+            line_num = lexer.line_num
+            line = buf[pos:newline]
+
+            if '"' in line:
+                values, tokens, error, terminated = self._scan_row(
+                    column_count, keep_columns, filters, interned
+                )
+                if error is not None:
+                    self._report_error(error, line)
+                elif values is None:
+                    continue  # Rejected by the filters.
+                elif terminated or len(values) != 0:
+                    yield CsvRow(
+                        row_header,
+                        tuple(values),
+                        tuple(tokens) if keep_debug_tokens else None,
+                    )
+                continue
+
+            # Everything below this point is the fast path.
+            lexer.start_next_line(newline)
+
+            accepted = filters is None
+            if accepted:
+                values = line.split(",")
+            else:
+                values = line.split(",", filter_split)
+                # Every filtered column is known now, so the row can be rejected before the rest of it is split up.
+                match filters.check_in_order(values):
+                    case False:
+                        continue
+                    case True:
+                        accepted = True
+                if len(values) > filter_split:
+                    values.extend(values.pop().split(","))
+
+            if len(values) > column_count or "" in values:
+                error = self._find_line_error(values, line_num, at_eof)
+                if error is not None:
+                    self._report_error(error, line)
+                    continue
+                # The only 'empty' value allowed is the one after a trailing comma at the end of the input.
+                values.pop()
+
+            if not accepted and not filters.accepts(values):
+                continue
+
+            if interned is not None:
+                interned.intern_values(values)
+
+            tokens = None
+            if keep_debug_tokens:
+                tokens = self._create_line_tokens(values, line_num)
+
+            if selected is None:
+                yield CsvRow(row_header, tuple(values), tokens)
+                continue
+
+            if len(values) > selected[-1]:
+                values = pick_selected(values)
+                if tokens is not None:
+                    tokens = pick_selected(tokens)
+            else:
+                # Like any other row that is too short, it just doesn't have the rest of the columns.
+                values = tuple(values[i] for i in selected if i < len(values))
+                if tokens is not None:
+                    tokens = tuple(tokens[i] for i in selected if i < len(tokens))
+            yield CsvRow(row_header, values, tokens)
+
+        if self._source is not None:
+            self._source.close()
+
+
+def _create_picker(selected: list[int]) -> Callable[[Sequence], tuple]:
+    # itemgetter returns the item itself instead of a tuple when it only gets one index.
+    if len(selected) == 1:
+        index = selected[0]
+        return lambda values: (values[index],)
+    return itemgetter(*selected)
+
@@ -1,23 +1,112 @@
-from collections.abc import Generator, Iterable
-from typing import TextIO
+from collections.abc import Callable, Generator, Iterable
+from typing import Self, TextIO, override
 from itertools import batched
 import concurrent.futures as fut
-from csv_parsing.bad_line_mode import BadLineMode
+import copy
+import os
+import time
+from collections import deque
 from csv_parsing.parsing.csv_header import CsvHeader
+from csv_parsing.lexing.lexer_mode import LexerMode
+from csv_parsing.columnar import ColumnBatch, DictionaryMerger, DEFAULT_BATCH_SIZE
 from .base_parser import BaseCsvParser, CsvRow
 from .parser import CsvParser
+from .fused_parser import FusedCsvParser
+from .byte_range import ByteRange, DEFAULT_CHUNK_BYTES, find_byte_ranges
+from .row_index import RowIndex
+from ..error import CsvError
+from ..conversion import convert_rows
+from ..interning import InternedColumns
+from ..bad_lines import BadLineCollector
+from ..compression import Compression, detect_compression, open_csv_source
+from .chunk_transport import ChunkTransport
+from .parse_options import ParseOptions
+from .shared_chunk import SharedChunkHandle, SharedRowChunk, write_shared_chunk
 
 
+# Whether the parser of a chunk had errors, how many the validator had, and the bad lines of both that a worker
+# collected in its chunk, see _get_chunk_errors.
+type _ChunkErrors = tuple[bool, BadLineCollector | None, int, BadLineCollector | None]
+
+
+# Only the values (and the debug tokens) of the rows are sent back, so every row of the parse can share the header
+# of this process again instead of the copy that comes with every chunk.
 class RowChunk:
     def __init__(self) -> None:
         self._rows = []
 
     def push_row(self, row: CsvRow):
-        self._rows.append(row)
+        self._rows.append((row.get_raw_values(), row.debug_get_tokens()))
+
+    def stream_rows(
+        self, header: CsvHeader, interned: InternedColumns | None = None
+    ) -> Generator[CsvRow]:
+        for values, tokens in self._rows:
+            if interned is not None:
+                # The values of a row are a tuple, which can't be interned in place.
+                values = list(values)
+                interned.intern_values(values)
+                values = tuple(values)
+            yield CsvRow(header, values, tokens)
+
+
+# Lines read in this process for a worker, when the input can't be split into byte ranges (see ByteRange).
+class LineChunk:
+    __slots__ = ("lines", "first_line_num")
+
+    def __init__(self, lines: tuple[str, ...], first_line_num: int) -> None:
+        self.lines = lines
+        # So the errors (and bad lines) of the chunk have the line numbers of the whole input.
+        self.first_line_num = first_line_num
+
+
+# When a chunk was handed to the pool and when its result was back in this process, so pickling it both ways is included.
+# Only 'finished' is set from the thread of the pool, the stats are updated by whoever takes the result (see _take_result).
+class _ChunkTiming:
+    __slots__ = ("submitted", "finished", "byte_count")
+
+    def __init__(self, future: fut.Future, chunk: LineChunk | ByteRange) -> None:
+        self.submitted = time.perf_counter()
+        self.finished = None
+        if isinstance(chunk, ByteRange):
+            self.byte_count = chunk.end - chunk.start
+        else:
+            self.byte_count = sum(map(len, chunk.lines))
+        future.add_done_callback(self._set_finished)
+
+    def _set_finished(self, _: fut.Future):
+        self.finished = time.perf_counter()
 
-    def stream_rows(self) -> Generator[CsvRow]:
-        for value in self._rows:
-            yield value
+
+# Like batched, but with multi-line strings a row is never split over two chunks.
+def _batch_lines(
+    lines: Iterable[str], chunk_size: int, quote_aware: bool, first_line_num: int
+) -> Generator[LineChunk]:
+    chunks = (
+        _batch_quoted_lines(lines, chunk_size)
+        if quote_aware
+        else batched(lines, chunk_size)
+    )
+    for chunk in chunks:
+        yield LineChunk(chunk, first_line_num)
+        first_line_num += len(chunk)
+
+
+def _batch_quoted_lines(
+    lines: Iterable[str], chunk_size: int
+) -> Generator[tuple[str, ...]]:
+    chunk = []
+    in_string = False
+    for line in lines:
+        chunk.append(line)
+        # Same as when splitting a file into byte ranges, an odd amount of quotes means the row continues on the next line.
+        if line.count('"') % 2 == 1:
+            in_string = not in_string
+        if not in_string and len(chunk) >= chunk_size:
+            yield tuple(chunk)
+            chunk = []
+    if len(chunk) != 0:
+        yield tuple(chunk)
 
 
 class MultiProcessCsvParser(BaseCsvParser):
@@ -28,66 +117,398 @@ class MultiProcessCsvParser(BaseCsvParser):
         print_error_to,
         allow_multiline_strings=False,
         chunk_size=20000,
+        lexer_mode: LexerMode | None = None,
+        max_workers=None,
+        max_chunks_in_flight=None,
+        transport=ChunkTransport.PICKLE,
+        options: ParseOptions | None = None,
     ):
+        # The workers filter, validate, convert and intern the rows, so rejected and invalid rows are never sent back.
+        # Shared memory only holds strings, so with that transport the values are converted here and never interned.
+        # The stats only count in this process: the rows that come back, the errors reported here and how long every
+        # chunk took.
+        # NOTE: Bad lines the workers find are only counted in BadLineMode.COLLECT, otherwise the workers print them.
+        # Every worker collects the bad lines of its chunk, which are merged into ours in the order of the chunks.
+        super().__init__(bad_line_mode, print_error_to, options)
         self._lines = lines
-        self._bad_line_mode = bad_line_mode
-        self._print_error_to = print_error_to
         self._allow_multiline_strings = allow_multiline_strings
         self._chunk_size = chunk_size
+        # Without one the chunks are parsed by FusedCsvParsers, otherwise by CsvParsers with this lexer (which are a lot
+        # slower, but the reference for every error and position).
+        self._lexer_mode = lexer_mode
+        # Both default to something based on the amount of CPUs.
+        self._max_workers = max_workers
+        self._max_chunks_in_flight = max_chunks_in_flight
+        # NOTE: Debug tokens are not kept with the shared memory transport, only the values are.
+        self._transport = transport
 
+        # Only set when parsing straight from a file, see from_path.
+        self._path = None
+
+    # Instead of reading the lines in this process and sending them to the workers,
+    # this only finds row boundaries in the (memory mapped) file and lets every worker read its own byte range.
+    # Compressed files can't be split into byte ranges, those are decompressed in this process (in a background thread)
+    # and sent to the workers in chunks of 'chunk_size' lines instead.
     @staticmethod
-    def _parse_chunk(
-        header: CsvHeader,
-        bad_line_mode: BadLineMode,
+    def from_path(
+        path: str,
+        bad_line_mode,
         print_error_to,
-        allow_multiline_strings: bool,
-        chunk_lines: tuple[str],
-    ) -> RowChunk:
-        # We have to wrap it in an iter, otherwise next() wont work
-        line_iter = iter(chunk_lines)
-        parser: CsvParser = CsvParser.from_header(
-            header,
-            line_iter,
+        allow_multiline_strings=False,
+        chunk_bytes=DEFAULT_CHUNK_BYTES,
+        encoding="utf-8",
+        chunk_size=20000,
+        lexer_mode: LexerMode | None = None,
+        max_workers=None,
+        max_chunks_in_flight=None,
+        transport=ChunkTransport.PICKLE,
+        index: RowIndex | None = None,
+        options: ParseOptions | None = None,
+    ) -> Self:
+        new = MultiProcessCsvParser(
+            None,
             bad_line_mode,
             print_error_to,
             allow_multiline_strings,
+            chunk_size=chunk_size,
+            lexer_mode=lexer_mode,
+            max_workers=max_workers,
+            max_chunks_in_flight=max_chunks_in_flight,
+            transport=transport,
+            options=options,
+        )
+        if detect_compression(path) != Compression.NONE:
+            if index is not None:
+                raise CsvError(f"Compressed files can't be indexed! '{path}'")
+            new._lines = new._source = open_csv_source(path, encoding)
+            return new
+
+        new._path = path
+        new._encoding = encoding
+        new._chunk_bytes = chunk_bytes
+        # With an index the chunk boundaries are already known, so the file doesn't have to be scanned for them.
+        if index is not None and allow_multiline_strings and not index.quote_aware:
+            raise CsvError(
+                "The index has to be built with multi-line strings allowed to parse with them!"
+            )
+        new._index = index
+        return new
+
+    def _get_parser_kwargs(self) -> dict:
+        # Every chunk starts with an empty one, see _merge_errors.
+        bad_lines = None
+        if self._bad_lines is not None:
+            bad_lines = BadLineCollector(self._bad_lines.max_records)
+        validator = self._options.validator
+        if validator is not None and validator.get_bad_lines() is not None:
+            # The validator of a chunk collects into the one of its parser if ours share one, which keeps the
+            # bad lines of both in the order they were found.
+            validator = copy.copy(validator)
+            if validator.get_bad_lines() is self._bad_lines:
+                validator.bad_lines = bad_lines
+            else:
+                validator.bad_lines = BadLineCollector(validator.bad_lines.max_records)
+
+        # Everything the chunk parsers in the worker processes need besides the header and the lines.
+        parser_kwargs = {
+            "bad_line_mode": self._bad_line_mode,
+            "print_error_to": self._print_to_file,
+            "allow_multiline_strings": self._allow_multiline_strings,
+            "options": self._options.replace(
+                validator=validator, stats=None, bad_lines=bad_lines
+            ),
+        }
+        # Only the CsvParser takes one, see _create_chunk_parser.
+        if self._lexer_mode is not None:
+            parser_kwargs["lexer_mode"] = self._lexer_mode
+        return parser_kwargs
+
+    @staticmethod
+    def _create_chunk_parser(
+        header: CsvHeader, parser_kwargs: dict, chunk: LineChunk | ByteRange
+    ) -> CsvParser | FusedCsvParser:
+        parser_type = CsvParser if "lexer_mode" in parser_kwargs else FusedCsvParser
+        if isinstance(chunk, ByteRange):
+            return parser_type.from_header(
+                header,
+                chunk.read(),
+                first_line_num=chunk.first_line_num,
+                **parser_kwargs,
+            )
+
+        # We have to wrap it in an iter, otherwise next() wont work
+        line_iter = iter(chunk.lines)
+        return parser_type.from_header(
+            header, line_iter, first_line_num=chunk.first_line_num, **parser_kwargs
+        )
+
+    @staticmethod
+    def _parse_chunk(
+        header: CsvHeader, parser_kwargs: dict, chunk: LineChunk | ByteRange
+    ) -> tuple[RowChunk, _ChunkErrors]:
+        parser = MultiProcessCsvParser._create_chunk_parser(
+            header, parser_kwargs, chunk
         )
 
         chunk = RowChunk()
         for value in parser.parse():
             chunk.push_row(value)
-        return chunk
-
-    def _parse_chunks(self) -> Generator[RowChunk]:
-        chunks = batched(self._lines, self._chunk_size)
-        with fut.ProcessPoolExecutor() as pool:
-            futures: list[fut.Future] = []
-            for chunk in chunks:
-                future = pool.submit(
-                    MultiProcessCsvParser._parse_chunk,
-                    self._header,
-                    self._bad_line_mode,
-                    self._print_error_to,
-                    self._allow_multiline_strings,
-                    chunk,
-                )
-                futures.append(future)
-            for future in futures:
-                if future.done():
-                    yield future.result()
+        return chunk, MultiProcessCsvParser._get_chunk_errors(parser)
+
+    @staticmethod
+    def _parse_chunk_shared(
+        header: CsvHeader, parser_kwargs: dict, chunk: LineChunk | ByteRange
+    ) -> tuple[SharedChunkHandle | None, _ChunkErrors]:
+        parser = MultiProcessCsvParser._create_chunk_parser(
+            header, parser_kwargs, chunk
+        )
+        # Shared memory only holds strings, so the values are converted once they are back in this process.
+        handle = write_shared_chunk(
+            row.get_raw_values() for row in parser._parse_unconverted()
+        )
+        return handle, MultiProcessCsvParser._get_chunk_errors(parser)
+
+    @staticmethod
+    def _discard_shared_chunk(handle: SharedChunkHandle | None):
+        # Attaching (and then closing) the chunk is what frees the shared memory.
+        if handle is not None:
+            SharedRowChunk(handle).close()
+
+    @staticmethod
+    def _parse_chunk_columnar(
+        header: CsvHeader,
+        parser_kwargs: dict,
+        columnar_kwargs: dict,
+        chunk: LineChunk | ByteRange,
+    ) -> tuple[list[ColumnBatch], _ChunkErrors]:
+        parser = MultiProcessCsvParser._create_chunk_parser(
+            header, parser_kwargs, chunk
+        )
+        batches = list(parser.parse_columnar(**columnar_kwargs))
+        return batches, MultiProcessCsvParser._get_chunk_errors(parser)
+
+    @staticmethod
+    def _get_chunk_errors(parser: CsvParser | FusedCsvParser) -> _ChunkErrors:
+        # Sent back together with the result of the chunk, see _get_parser_kwargs for the collector of the validator.
+        validator = parser._options.validator
+        if validator is None:
+            return parser.had_errors(), parser.get_bad_lines(), 0, None
+        validator_lines = validator.get_bad_lines()
+        if validator_lines is parser.get_bad_lines():
+            validator_lines = None
+        return (
+            parser.had_errors(),
+            parser.get_bad_lines(),
+            validator.error_count,
+            validator_lines,
+        )
+
+    def _merge_errors(
+        self,
+        had_errors: bool,
+        parser_lines: BadLineCollector | None,
+        validator_error_count: int,
+        validator_lines: BadLineCollector | None,
+    ):
+        self._had_error |= had_errors
+        validator = self._options.validator
+        stats = self._options.stats
+        # Also without collecting bad lines, our validator should know the ones in the workers had errors.
+        if validator_error_count != 0:
+            validator.had_error = True
+            validator.error_count += validator_error_count
+            if stats is not None:
+                stats.get_stage("validate").error_count += validator_error_count
+        if parser_lines is not None:
+            self._bad_lines.merge(parser_lines)
+            if stats is not None:
+                # The errors of the validator are in there too if it collected into the same one.
+                parser_error_count = parser_lines.get_count()
+                if validator_lines is None:
+                    parser_error_count -= validator_error_count
+                stats.get_stage("parse").error_count += parser_error_count
+        # Merged into the collector of the validator, which can be a different one than ours.
+        if validator_lines is not None:
+            validator.get_bad_lines().merge(validator_lines)
+
+    def _take_result(self, future: fut.Future, timing: _ChunkTiming | None):
+        result, errors = future.result()
+        self._merge_errors(*errors)
+        if timing is not None:
+            # The result can be there before the callbacks of the future ran.
+            finished = timing.finished or time.perf_counter()
+            chunks = self._options.stats.get_stage("chunks")
+            chunks.add_time(finished - timing.submitted)
+            chunks.item_count += 1
+            self._options.stats.get_stage("read").byte_count += timing.byte_count
+        return result
+
+    def _parse_chunks(
+        self, parse_chunk: Callable, *args, discard: Callable | None = None
+    ) -> Generator:
+        # 'parse_chunk' is called in the worker processes with the header, 'args' and then the chunk.
+        # 'discard' is called with the results that were never yielded, if they need any cleanup.
+        # Only a bounded amount of chunks are in flight at once, and results are yielded in the same order as the input,
+        # so memory stays flat no matter the file size and the first rows come out while later chunks are still parsing.
+        chunks = self._split_chunks()
+        max_workers = self._max_workers or os.cpu_count() or 1
+        max_in_flight = self._max_chunks_in_flight or max_workers * 2
+
+        # Every future comes with its timing, which is None without stats.
+        in_flight: deque[tuple[fut.Future, _ChunkTiming | None]] = deque()
+        with fut.ProcessPoolExecutor(max_workers=max_workers) as pool:
+            try:
+                for chunk in chunks:
+                    future = pool.submit(parse_chunk, self._header, *args, chunk)
+                    timing = None
+                    if self._options.stats is not None:
+                        timing = _ChunkTiming(future, chunk)
+                    in_flight.append((future, timing))
+                    if len(in_flight) >= max_in_flight:
+                        yield self._take_result(*in_flight.popleft())
+
+                while len(in_flight) != 0:
+                    yield self._take_result(*in_flight.popleft())
+            finally:
+                if self._source is not None:
+                    self._source.close()
+                # If the consumer stops early, don't wait for chunks nobody is going to read.
+                for future, _ in in_flight:
+                    future.cancel()
+                if discard is not None:
+                    for future, _ in in_flight:
+                        if not future.cancelled() and future.exception() is None:
+                            discard(future.result()[0])
+
+    def _split_chunks(self) -> Iterable[LineChunk | ByteRange]:
+        if self._path is None:
+            return _batch_lines(
+                self._lines,
+                self._chunk_size,
+                self._allow_multiline_strings,
+                first_line_num=2,  # The header is on the first line.
+            )
+
+        if self._index is not None:
+            return self._index.get_byte_ranges(self._encoding, self._chunk_bytes)
+
+        # Multi-line strings are the only way a newline can show up inside a row.
+        return find_byte_ranges(
+            self._path,
+            self._encoding,
+            self._data_start,
+            first_line_num=2,  # The header is on the first line.
+            chunk_bytes=self._chunk_bytes,
+            quote_aware=self._allow_multiline_strings,
+        )
+
+    def _parse_header(self):
+        self._read_header()
+
+        # The workers parse with the full header, but the rows they produce only have the selected columns.
+        options = self._options
+        self._row_header = self._header
+        if options.value_types is not None:
+            self._row_header = self._row_header.with_value_types(options.value_types)
+        if options.columns is not None:
+            self._row_header = self._row_header.project(
+                self._header.resolve_columns(options.columns)
+            )
+
+    def _read_header(self):
+        if self._path is not None:
+            with open(self._path, "rb") as file:
+                header_line = file.readline().decode(self._encoding)
+                self._data_start = file.tell()
+            header_parser = CsvParser(
+                iter([header_line]), self._bad_line_mode, self._print_to_file
+            )
+            self._header = header_parser._header
+            return
 
-    # NOTE: For the vast majority of cases the normal CsvParser is better suited
-    def parse(self) -> Generator[CsvRow]:
         # This is a little hacky, but we construct the first parser here,
         # then since the constructor parses the header, we get the header
         # afterwards for usage in the chunked parsers
         header_line = next(self._lines)
         header_parser = CsvParser(
-            iter([header_line]), self._bad_line_mode, self._print_error_to
+            iter([header_line]), self._bad_line_mode, self._print_to_file
         )
         self._header = header_parser._header
 
+    def _stream_shared_rows(self) -> Generator[CsvRow]:
+        for handle in self._parse_chunks(
+            MultiProcessCsvParser._parse_chunk_shared,
+            self._get_parser_kwargs(),
+            discard=MultiProcessCsvParser._discard_shared_chunk,
+        ):
+            if handle is None:
+                continue
+            for row in SharedRowChunk(handle).stream_rows(self._row_header):
+                yield row
+
+    # NOTE: For the vast majority of cases the normal CsvParser is better suited
+    def parse(self) -> Generator[CsvRow]:
+        rows = self._parse_rows()
+        if self._options.stats is not None:
+            rows = self._options.stats.time_items("parse", rows)
+        yield from rows
+
+    def _parse_rows(self) -> Generator[CsvRow]:
+        self._parse_header()
+
+        if self._transport == ChunkTransport.SHARED_MEMORY:
+            rows = self._stream_shared_rows()
+            if self._options.value_types is not None:
+                rows = convert_rows(rows, self._report_error)
+            yield from rows
+            return
+
         # Yield the result of the first parser
-        for chunk in self._parse_chunks():
-            for row in chunk.stream_rows():
+        interned = self._get_row_interning()
+        for chunk in self._parse_chunks(
+            MultiProcessCsvParser._parse_chunk, self._get_parser_kwargs()
+        ):
+            for row in chunk.stream_rows(self._row_header, interned):
                 yield row
+
+    # The pools for the interned columns of the rows that come back from the workers. The pools of the workers are per
+    # chunk, so the values are interned once more here to share them between chunks too.
+    # Columns that were projected away or converted to something other than strings are left out.
+    def _get_row_interning(self) -> InternedColumns | None:
+        options = self._options
+        if options.intern_columns is None:
+            return None
+        value_types = options.value_types or {}
+        column_types = [
+            column_type
+            for column_type in options.intern_columns
+            if column_type not in value_types
+            and self._row_header.lookup_column_index(column_type) is not None
+        ]
+        return InternedColumns.from_columns(
+            self._row_header, column_types, options.intern_pool_size
+        )
+
+    # Each worker builds the column batches for its own chunk, so batches never span chunks.
+    # Their dictionaries are merged in this process, so the codes are the same for the whole parse like with the other parsers.
+    @override
+    def parse_columnar(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        numeric_columns: dict[str, str] | None = None,
+        dictionary_columns: Iterable[str] | None = None,
+    ) -> Generator[ColumnBatch]:
+        self._parse_header()
+
+        columnar_kwargs = {
+            "batch_size": batch_size,
+            "numeric_columns": numeric_columns,
+            "dictionary_columns": dictionary_columns,
+        }
+        dictionaries = DictionaryMerger()
+        for batches in self._parse_chunks(
+            MultiProcessCsvParser._parse_chunk_columnar,
+            self._get_parser_kwargs(),
+            columnar_kwargs,
+        ):
+            yield from dictionaries.merge(batches)
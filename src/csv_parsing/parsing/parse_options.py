@@ -0,0 +1,62 @@
+import copy
+from collections.abc import Iterable
+from typing import Self
+from ..row_filter import CsvFilter
+from ..validator import CsvTypeValidator
+from ..value_type import ValueType
+from ..interning import DEFAULT_INTERN_POOL_SIZE
+from ..instrumentation import PipelineStats
+from ..bad_lines import BadLineCollector
+
+
+# What every parser does with the rows besides splitting them, the same for every backend.
+# Parsers hand it on as a whole to the parsers they create themselves (the chunk parsers of the worker processes, etc.).
+class ParseOptions:
+    __slots__ = (
+        "keep_debug_tokens",
+        "columns",
+        "filters",
+        "validator",
+        "value_types",
+        "intern_columns",
+        "intern_pool_size",
+        "stats",
+        "bad_lines",
+    )
+
+    def __init__(
+        self,
+        keep_debug_tokens: bool = False,
+        columns: Iterable[str] | None = None,
+        filters: Iterable[CsvFilter] | None = None,
+        validator: CsvTypeValidator | None = None,
+        value_types: dict[str, ValueType] | None = None,
+        intern_columns: Iterable[str] | None = None,
+        intern_pool_size: int = DEFAULT_INTERN_POOL_SIZE,
+        stats: PipelineStats | None = None,
+        bad_lines: BadLineCollector | None = None,
+    ) -> None:
+        self.keep_debug_tokens = keep_debug_tokens
+        # Only these columns end up in the rows, the others aren't built if the parser can help it.
+        self.columns = columns
+        # Rows are dropped as soon as a filter rejects them, the rest of the row is skipped.
+        self.filters = filters
+        # Every row goes through this before it is yielded.
+        self.validator = validator
+        # The values of these columns are converted (after validating them), the rest stay strings.
+        self.value_types = value_types
+        # The repeated values of these columns share one string object, see InternedColumns.
+        self.intern_columns = intern_columns
+        self.intern_pool_size = intern_pool_size
+        # Counts and times the rows, errors and the input read, see PipelineStats.
+        self.stats = stats
+        # Where the bad lines go in BadLineMode.COLLECT, the parser makes its own if there is none.
+        # Pass the one of the validator to get the bad lines of both in one place.
+        self.bad_lines = bad_lines
+
+    # A copy with some of the options changed.
+    def replace(self, **changes) -> Self:
+        new = copy.copy(self)
+        for name, value in changes.items():
+            setattr(new, name, value)
+        return new
@@ -3,12 +3,20 @@ from typing import Self, cast, TextIO
 from ..lexing.token import CsvToken, CsvValueToken, CsvTokenType
 from ..error import CsvError
 from ..row import CsvRow
-from ..value import CsvValue
+from ..row_filter import CompiledFilters
+from ..conversion import convert_rows
+from ..interning import InternedColumns
+from ..lexing.counting_reader import count_reads
 from ..lexing.lexer import CsvLexer
+from ..lexing.block_lexer import BlockCsvLexer
+from ..lexing.lexer_mode import LexerMode
+from .row_index import RowIndex
+from ..compression import open_csv_source
 from ..bad_line_mode import BadLineMode
 from .csv_header import CsvHeader
 from .parser_error import CsvParserError
 from .base_parser import BaseCsvParser
+from .parse_options import ParseOptions
 
 
 class CsvParser(BaseCsvParser):
@@ -19,20 +27,49 @@ class CsvParser(BaseCsvParser):
         print_error_to: TextIO | None,
         allow_multiline_strings: bool = False,
         parse_header: bool = True,
+        lexer_mode: LexerMode = LexerMode.BLOCK,
+        first_line_num: int = 1,
+        options: ParseOptions | None = None,
     ) -> None:
+        super().__init__(bad_line_mode, print_error_to, options)
         self._error_state = False
-        self._had_error = False
 
-        self._input = CsvLexer(lines, allow_multiline_strings).lex()
-        self._bad_line_mode = bad_line_mode
-        self._print_to_file = print_error_to
+        self._allow_multiline_strings = allow_multiline_strings
+        self._lexer_mode = lexer_mode
+        # The first line of the current row, only kept track of while collecting bad lines.
+        self._row_line = None
+
+        # Only set when parsing from an index, see from_index.
+        self._index = None
+
+        self._set_input(lines, first_line_num)
+        if parse_header:
+            self._parse_header()
+
+    def _set_input(self, lines: TextIO | Iterable[str], first_line_num: int):
+        stats = self._options.stats
+        if stats is not None:
+            lines = count_reads(lines, stats.get_stage("read"))
+        match self._lexer_mode:
+            case LexerMode.CHARACTER:
+                lexer = CsvLexer(lines, self._allow_multiline_strings, first_line_num)
+            case LexerMode.BLOCK:
+                lexer = BlockCsvLexer(
+                    lines, self._allow_multiline_strings, first_line_num=first_line_num
+                )
+        # Only used directly to tell it which values to build (see set_keep_columns), to skip rows
+        # (see _recover_from_error) and for the lines of bad rows.
+        self._lexer = lexer
+        self._input = lexer.lex()
+        if stats is not None:
+            self._input = stats.time_items("lex", self._input, inner="read")
 
         self._line_num = 0
         self._current_token = None
 
         self._advance()  # Priming the pump :)
-        if parse_header:
-            self._parse_header()
+        if self._bad_lines is not None:
+            self._row_line = lexer.get_line()
 
     @staticmethod
     def from_header(
@@ -41,6 +78,9 @@ class CsvParser(BaseCsvParser):
         bad_line_mode: BadLineMode,
         print_error_to: TextIO | None,
         allow_multiline_strings: bool = False,
+        lexer_mode: LexerMode = LexerMode.BLOCK,
+        first_line_num: int = 1,
+        options: ParseOptions | None = None,
     ) -> Self:
         new = CsvParser(
             lines,
@@ -48,11 +88,79 @@ class CsvParser(BaseCsvParser):
             print_error_to,
             allow_multiline_strings,
             parse_header=False,
+            lexer_mode=lexer_mode,
+            first_line_num=first_line_num,
+            options=options,
         )
         # This feels a little hacky, but whatever right ;-----)
         new._header = header
         return new
 
+    # Opens the file itself, which can be compressed (see open_csv_source), and closes it once it is parsed.
+    # 'parser_kwargs' are the rest of the arguments of the constructor.
+    @staticmethod
+    def from_path(
+        path: str,
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        encoding: str = "utf-8",
+        **parser_kwargs,
+    ) -> Self:
+        source = open_csv_source(path, encoding)
+        new = CsvParser(source, bad_line_mode, print_error_to, **parser_kwargs)
+        new._source = source
+        return new
+
+    # Parses the rows from 'start_row' up to (but not including) 'end_row' of an indexed file, with the header of the file.
+    # Multi-line strings are allowed if the index was built with them.
+    @staticmethod
+    def from_index(
+        index: RowIndex,
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        start_row: int = 0,
+        end_row: int | None = None,
+        encoding: str = "utf-8",
+        lexer_mode: LexerMode = LexerMode.BLOCK,
+        options: ParseOptions | None = None,
+    ) -> Self:
+        with open(index.path, "rb") as file:
+            header_line = file.readline().decode(encoding)
+        # The header has to end with a newline, otherwise the parser doesn't know it is done with it.
+        if not header_line.endswith("\n"):
+            header_line += "\n"
+        header = CsvParser(iter([header_line]), bad_line_mode, print_error_to)._header
+
+        byte_range = index.get_byte_range(encoding, start_row, end_row)
+        stream = byte_range.open()
+        new = CsvParser.from_header(
+            header,
+            stream,
+            bad_line_mode,
+            print_error_to,
+            index.quote_aware,
+            lexer_mode=lexer_mode,
+            first_line_num=byte_range.first_line_num,
+            options=options,
+        )
+        new._index = index
+        new._encoding = encoding
+        new._end_row = end_row
+        # We opened it, so we also have to close it again.
+        new._index_stream = stream
+        return new
+
+    # Makes the next call to parse start at 'row' (still stopping at the end row, if there is one).
+    # Only works for parsers made with from_index.
+    def seek_row(self, row: int):
+        if self._index is None:
+            raise CsvError("Seeking needs a row index! See CsvParser.from_index")
+
+        self._index_stream.close()
+        byte_range = self._index.get_byte_range(self._encoding, row, self._end_row)
+        self._index_stream = byte_range.open()
+        self._set_input(self._index_stream, byte_range.first_line_num)
+
     def _parse_header(self):
         comma_index = 0
         header_column_decls = []
@@ -63,6 +171,9 @@ class CsvParser(BaseCsvParser):
                     self._advance_line()
                     break  # The 'header' is only the first line, so we are done
 
+                case CsvTokenType.END_OF_FILE:
+                    break  # A file with only a header, and without a newline after it
+
                 case CsvTokenType.COMMA:
                     comma_index += 1
 
@@ -86,29 +197,30 @@ class CsvParser(BaseCsvParser):
         self._current_token = next(self._input)
 
     def _advance_line(self):
+        if self._bad_lines is not None:
+            # Right after the newline token the lexer is at the start of the next row.
+            self._row_line = self._lexer.get_line()
         self._advance()
         self._line_num += 1
 
     def _handle_error(self, error: CsvError):
         self._error_state = True
-        self._had_error = True
-        match self._bad_line_mode:
-            case BadLineMode.ERROR:
-                raise error
-            case BadLineMode.WARNING:
-                print(
-                    f"BAD LINE WARNING!\n{error.get_printable_message()}",
-                    file=self._print_to_file,
-                )
+        self._report_error(error, self._row_line)
 
     def _assert_previous_value(self):
         current = self._get_current_token()
         last = self._get_previous_token()
 
         # If the current and last token was NOT a value token, then error out.
+        # There is no last token at the start of input without a header (like a chunk of a file), which is the start
+        # of a row just like after a newline.
         if (
             current.type == CsvTokenType.COMMA or current.type == CsvTokenType.NEWLINE
-        ) and (last.type == CsvTokenType.COMMA or last.type == CsvTokenType.NEWLINE):
+        ) and (
+            last is None
+            or last.type == CsvTokenType.COMMA
+            or last.type == CsvTokenType.NEWLINE
+        ):
             self._handle_error(
                 CsvParserError("Empty value!", self._get_current_token())
             )
@@ -122,59 +234,158 @@ class CsvParser(BaseCsvParser):
 
     def _recover_from_error(self):
         self._column_index = 0
+        self._error_state = False
+
+        token = self._get_current_token()
+        if (
+            self._bad_line_mode in (BadLineMode.COLLECT, BadLineMode.SKIP)
+            and token.type != CsvTokenType.NEWLINE
+            and token.type != CsvTokenType.END_OF_FILE
+        ):
+            # Nobody is told what else is wrong with the row, so the lexer can jump straight to its end.
+            self._lexer.skip_row()
+            self._advance()
 
         # If we are in an error state, then we advance until we get to a new line.
         while True:
             token = self._get_current_token()
             if token.type == CsvTokenType.NEWLINE:
-                self._error_state = False
                 self._advance_line()
                 return
+            if token.type == CsvTokenType.END_OF_FILE:
+                return
             self._advance()
 
-    def had_errors(self) -> bool:
-        return self._had_error
+    def _skip_row(self):
+        # Like recovering from an error, but without the error. The rest of the row isn't lexed,
+        # so nothing in it is an error (not even a string that is never closed).
+        token = self._get_current_token()
+        if token.type != CsvTokenType.NEWLINE and token.type != CsvTokenType.END_OF_FILE:
+            self._lexer.skip_row()
+            self._advance()
+
+        while True:
+            token = self._get_current_token()
+            if token.type == CsvTokenType.NEWLINE:
+                self._advance_line()
+                return
+            if token.type == CsvTokenType.END_OF_FILE:
+                return
+            self._advance()
+
+    def _create_row(self, values: list[str], tokens: list[CsvValueToken]) -> CsvRow:
+        return CsvRow(
+            self._row_header,
+            tuple(values),
+            tuple(tokens) if self._options.keep_debug_tokens else None,
+        )
 
     def parse(self) -> Generator[CsvRow]:
+        rows = self._parse_unconverted()
+        if self._options.value_types is not None:
+            rows = convert_rows(rows, self._report_error)
+        yield from rows
+
+    def _parse_unconverted(self) -> Generator[CsvRow]:
+        rows = self._parse_rows()
+        options = self._options
+        if options.stats is not None:
+            rows = options.stats.time_items("parse", rows, inner="lex")
+        if options.validator is not None:
+            rows = options.validator.validate(rows)
+        return rows
+
+    def _get_row_header(self, header: CsvHeader) -> CsvHeader:
+        if self._options.value_types is not None:
+            return header.with_value_types(self._options.value_types)
+        return header
+
+    def _parse_rows(self) -> Generator[CsvRow]:
         # We have already 'primed the pump' in the constructor, so no need to advance here.
 
         eof = False
 
         row_values = []
+        row_tokens = []
+        # Tracked separately, since skipped columns never make it into 'row_values'.
+        row_has_values = False
         self._column_index = 0
+
+        options = self._options
+        keep_debug_tokens = options.keep_debug_tokens
+        keep_columns = None
+        # Typed before projecting, so the value types can name columns that aren't selected.
+        self._row_header = self._get_row_header(self._header)
+        if options.columns is not None:
+            selected = self._header.resolve_columns(options.columns)
+            keep_columns = [False] * self._header.get_column_count()
+            for index in selected:
+                keep_columns[index] = True
+            self._row_header = self._row_header.project(selected)
+
+        filters = CompiledFilters.from_filters(self._header, options.filters)
+        filters_passed = 0
+        if keep_columns is not None:
+            # The filtered columns are needed too, even when they aren't selected.
+            lexed_columns = list(keep_columns)
+            if filters is not None:
+                for index, predicates in enumerate(filters.predicates):
+                    if predicates is not None:
+                        lexed_columns[index] = True
+            self._lexer.set_keep_columns(lexed_columns)
+        interned = InternedColumns.from_columns(
+            self._header, options.intern_columns, options.intern_pool_size
+        )
+
         while not eof:
             if self._error_state:
                 row_values.clear()
+                row_tokens.clear()
+                row_has_values = False
+                filters_passed = 0
                 self._recover_from_error()
 
             token = self._get_current_token()
             match token.type:
                 case CsvTokenType.NEWLINE:
                     self._assert_previous_value()
-
-                    row = CsvRow(row_values.copy())
+                    if self._error_state:
+                        continue  # The row ends here, so it is dropped without skipping anything.
+
+                    # A row that ends before every filtered column was checked doesn't match.
+                    rejected = (
+                        filters is not None and filters_passed != filters.column_count
+                    )
+                    row = self._create_row(row_values, row_tokens)
                     row_values.clear()
+                    row_tokens.clear()
+                    row_has_values = False
+                    filters_passed = 0
 
                     self._column_index = 0
                     self._advance_line()
-                    yield row
+                    if not rejected:
+                        yield row
 
                 case CsvTokenType.COMMA:
                     self._assert_previous_value()
 
                     self._column_index += 1
-                    self._assert_column_index()
+                    # Only the first error of a row is reported, like the other parsers do.
+                    if not self._error_state:
+                        self._assert_column_index()
+                    if self._error_state:
+                        # Recovered from at the top of the loop, before the rest of the row is lexed.
+                        # The lexer could raise errors of its own there, which the other parsers skip over.
+                        continue
                     self._advance()
 
                 case CsvTokenType.VALUE:
                     # At this point we know that 'token' is a CsvValueToken
                     value_token = cast(CsvValueToken, token)
+                    row_has_values = True
 
-                    try:
-                        column_type = self._header.lookup_column_type(
-                            self._column_index
-                        )
-                    except IndexError:
+                    if self._column_index >= self._header.get_column_count():
                         self._handle_error(
                             CsvParserError(
                                 "Could not get column type, too many commas!",
@@ -182,13 +393,48 @@ class CsvParser(BaseCsvParser):
                             )
                         )
 
-                    value = CsvValue(column_type, value_token)
-                    row_values.append(value)
+                    if (
+                        filters is not None
+                        and not self._error_state
+                        and self._column_index < len(filters.predicates)
+                        and filters.predicates[self._column_index] is not None
+                    ):
+                        if not filters.accepts_value(
+                            self._column_index, value_token.value
+                        ):
+                            row_values.clear()
+                            row_tokens.clear()
+                            row_has_values = False
+                            filters_passed = 0
+                            self._column_index = 0
+                            self._skip_row()
+                            continue
+                        filters_passed += 1
+
+                    if keep_columns is None or (
+                        self._column_index < len(keep_columns)
+                        and keep_columns[self._column_index]
+                    ):
+                        value = value_token.value
+                        if interned is not None:
+                            value = interned.intern_value(self._column_index, value)
+                        row_values.append(value)
+                        if keep_debug_tokens:
+                            row_tokens.append(value_token)
                     self._advance()
 
                 case CsvTokenType.END_OF_FILE:
-                    if len(row_values) != 0:
-                        row = CsvRow(row_values.copy())
+                    if row_has_values and (
+                        filters is None or filters_passed == filters.column_count
+                    ):
+                        row = self._create_row(row_values, row_tokens)
                         row_values.clear()  # Clearing this will make this yield None on next iter.
+                        row_tokens.clear()
                         yield row
                     eof = True
+
+        if self._index is not None:
+            # Nothing left to read, seek_row opens it again if needed.
+            self._index_stream.close()
+        if self._source is not None:
+            self._source.close()
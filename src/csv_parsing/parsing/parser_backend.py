@@ -0,0 +1,79 @@
+from enum import Enum
+from typing import TextIO
+from ..bad_line_mode import BadLineMode
+from ..compression import open_csv_source
+from .base_parser import BaseCsvParser
+from .parse_options import ParseOptions
+from .parser import CsvParser
+from .fused_parser import FusedCsvParser
+from .stdlib_parser import StdlibCsvParser
+from .multiprocess_parser import MultiProcessCsvParser
+
+# How much of the start of the file is looked at to decide between the single process backends.
+BACKEND_SAMPLE_SIZE = 64 * 1024
+
+
+class ParserBackend(Enum):
+    # Picks one of the others, see choose_backend.
+    AUTO = 0
+    # CsvParser, the lexer and parser in pure Python. Slowest, but the reference for every error and position.
+    PYTHON = 1
+    # FusedCsvParser, splits rows without quotes with str.split.
+    FUSED = 2
+    # StdlibCsvParser, splits rows with the C implemented csv module.
+    STDLIB = 3
+    # MultiProcessCsvParser, runs FusedCsvParsers in worker processes. Never picked by AUTO, see choose_backend.
+    MULTIPROCESS = 4
+
+
+def choose_backend(
+    path: str, encoding: str = "utf-8", keep_debug_tokens: bool = False
+) -> ParserBackend:
+    # Only the CsvParser keeps the exact token of every value, so that always wins when asking for them.
+    if keep_debug_tokens:
+        return ParserBackend.PYTHON
+
+    # MULTIPROCESS isn't picked however big the file is: on a single core it parsed 68k rows/s against 178k for FUSED
+    # (python -m benchmarks --rows 100000), since every row is still sent back and built again in this process.
+    # Whether enough cores make up for that depends on the machine, so it has to be asked for.
+
+    # The csv module is a lot faster at quoted values, but on rows without any quotes str.split is faster still.
+    with open_csv_source(path, encoding) as file:
+        sample = file.read(BACKEND_SAMPLE_SIZE)
+    return ParserBackend.STDLIB if '"' in sample else ParserBackend.FUSED
+
+
+# Creates a parser for the file with the given backend, which opens (and closes) the file itself.
+# Every backend takes the same 'options', the 'parser_kwargs' are for the backend itself (like the lexer_mode of PYTHON
+# and MULTIPROCESS, or the max_workers of MULTIPROCESS), which not every backend supports.
+def create_parser(
+    path: str,
+    bad_line_mode: BadLineMode,
+    print_error_to: TextIO | None,
+    backend: ParserBackend = ParserBackend.AUTO,
+    encoding: str = "utf-8",
+    options: ParseOptions | None = None,
+    **parser_kwargs,
+) -> BaseCsvParser:
+    if backend == ParserBackend.AUTO:
+        backend = choose_backend(
+            path, encoding, options is not None and options.keep_debug_tokens
+        )
+
+    match backend:
+        case ParserBackend.PYTHON:
+            parser_type = CsvParser
+        case ParserBackend.FUSED:
+            parser_type = FusedCsvParser
+        case ParserBackend.STDLIB:
+            parser_type = StdlibCsvParser
+        case ParserBackend.MULTIPROCESS:
+            parser_type = MultiProcessCsvParser
+    return parser_type.from_path(
+        path,
+        bad_line_mode,
+        print_error_to,
+        encoding=encoding,
+        options=options,
+        **parser_kwargs,
+    )
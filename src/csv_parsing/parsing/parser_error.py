@@ -5,8 +5,8 @@ from ..lexing.token import CsvToken
 
 class CsvParserError(CsvError):
     def __init__(self, message: str, token: CsvToken) -> None:
-        super().__init__(message)
         self.token = token
+        super().__init__(message)
 
     @override
     def get_printable_message(self) -> str:
@@ -0,0 +1,270 @@
+import array
+import os
+import re
+from collections.abc import Generator
+from typing import BinaryIO, Self
+from ..error import CsvError
+from ..compression import Compression, detect_compression
+from .byte_range import ByteRange, DEFAULT_CHUNK_BYTES
+
+# Only every Nth row is stored, the rows in between are found by skipping lines from the closest stored row.
+# At 1024 the index for a file with 20 million rows is only about 300KB.
+DEFAULT_INDEX_STRIDE = 1024
+
+# Sidecar file layout:
+#   magic
+#   version, file_size, file_mtime_ns, stride, quote_aware, row_count, data_start, entry_count (unsigned 64 bit ints)
+#   offsets     (entry_count) byte offset of every stored row
+#   line_nums   (entry_count) line number of every stored row
+_MAGIC = b"CSVROWIDX\0"
+_VERSION = 1
+_FIELD_COUNT = 8
+
+# A line with everything up to (and including) its line break, or the end of the data if it has none.
+_LINE = re.compile(rb"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+")
+
+
+# The lines of the file the way the parsers see them, where (like in a file opened in text mode) a lone '\r'
+# ends a line too.
+def _iter_lines(file: BinaryIO) -> Generator[bytes]:
+    for line in file:
+        if b"\r" not in line:
+            yield line
+        else:
+            yield from _LINE.findall(line)
+
+
+# Maps row numbers (0 is the first row after the header) to where they start in the file,
+# so we can start parsing at any row without lexing everything before it.
+# NOTE: Every row in the file is counted, even the bad ones.
+class RowIndex:
+    def __init__(
+        self,
+        path: str,
+        file_size: int,
+        file_mtime_ns: int,
+        stride: int,
+        quote_aware: bool,
+        row_count: int,
+        data_start: int,
+        offsets: array.array,
+        line_nums: array.array,
+    ) -> None:
+        self.path = path
+        self.file_size = file_size
+        self.file_mtime_ns = file_mtime_ns
+        self.stride = stride
+        # Whether newlines inside strings were taken into account (i.e. multi-line strings are allowed).
+        self.quote_aware = quote_aware
+        self.data_start = data_start
+        self._row_count = row_count
+        self._offsets = offsets
+        self._line_nums = line_nums
+
+    @staticmethod
+    def get_index_path(path: str) -> str:
+        return path + ".rowidx"
+
+    @staticmethod
+    def build(
+        path: str,
+        allow_multiline_strings: bool = False,
+        stride: int = DEFAULT_INDEX_STRIDE,
+    ) -> Self:
+        # The offsets are only any good if we can seek to them.
+        if detect_compression(path) != Compression.NONE:
+            raise CsvError(f"Compressed files can't be indexed! '{path}'")
+
+        offsets = array.array("Q")
+        line_nums = array.array("Q")
+        row_count = 0
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            file.readline()  # The header is always on the first line.
+            data_start = file.tell()
+
+            offset = data_start
+            line_num = 2
+            in_string = False
+            for line in _iter_lines(file):
+                if not in_string:
+                    if row_count % stride == 0:
+                        offsets.append(offset)
+                        line_nums.append(line_num)
+                    row_count += 1
+
+                # Same as when splitting the file into chunks, an odd amount of quotes means the row continues on the next line.
+                if allow_multiline_strings and line.count(b'"') % 2 == 1:
+                    in_string = not in_string
+                offset += len(line)
+                line_num += 1
+
+        return RowIndex(
+            path,
+            stat.st_size,
+            stat.st_mtime_ns,
+            stride,
+            allow_multiline_strings,
+            row_count,
+            data_start,
+            offsets,
+            line_nums,
+        )
+
+    # Returns None if there is no index for the file, or if it doesn't match the file (or the settings) anymore.
+    @staticmethod
+    def load(
+        path: str,
+        allow_multiline_strings: bool = False,
+        stride: int = DEFAULT_INDEX_STRIDE,
+    ) -> Self | None:
+        try:
+            stat = os.stat(path)
+            with open(RowIndex.get_index_path(path), "rb") as file:
+                if file.read(len(_MAGIC)) != _MAGIC:
+                    return None
+                fields = array.array("Q")
+                fields.fromfile(file, _FIELD_COUNT)
+                (
+                    version,
+                    file_size,
+                    file_mtime_ns,
+                    index_stride,
+                    quote_aware,
+                    row_count,
+                    data_start,
+                    entry_count,
+                ) = fields
+                if (
+                    version != _VERSION
+                    or file_size != stat.st_size
+                    or file_mtime_ns != stat.st_mtime_ns
+                    or index_stride != stride
+                    or bool(quote_aware) != allow_multiline_strings
+                ):
+                    return None
+
+                offsets = array.array("Q")
+                offsets.fromfile(file, entry_count)
+                line_nums = array.array("Q")
+                line_nums.fromfile(file, entry_count)
+        # A cut off index can end in the middle of a number, which is a ValueError instead of an EOFError.
+        except (FileNotFoundError, EOFError, ValueError):
+            return None
+
+        return RowIndex(
+            path,
+            file_size,
+            file_mtime_ns,
+            stride,
+            allow_multiline_strings,
+            row_count,
+            data_start,
+            offsets,
+            line_nums,
+        )
+
+    # Loads the index next to the file, or builds (and saves) it if it is missing or out of date.
+    @staticmethod
+    def open(
+        path: str,
+        allow_multiline_strings: bool = False,
+        stride: int = DEFAULT_INDEX_STRIDE,
+    ) -> Self:
+        index = RowIndex.load(path, allow_multiline_strings, stride)
+        if index is None:
+            index = RowIndex.build(path, allow_multiline_strings, stride)
+            index.save()
+        return index
+
+    def save(self):
+        fields = array.array(
+            "Q",
+            (
+                _VERSION,
+                self.file_size,
+                self.file_mtime_ns,
+                self.stride,
+                self.quote_aware,
+                self._row_count,
+                self.data_start,
+                len(self._offsets),
+            ),
+        )
+        # Write it next to the real one first, so a half written index is never picked up.
+        index_path = RowIndex.get_index_path(self.path)
+        temp_path = index_path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(_MAGIC)
+            fields.tofile(file)
+            self._offsets.tofile(file)
+            self._line_nums.tofile(file)
+        os.replace(temp_path, index_path)
+
+    def get_row_count(self) -> int:
+        return self._row_count
+
+    # Returns the byte offset and line number the row starts at.
+    # Rows past the end give the end of the file.
+    def find_row(self, row: int) -> tuple[int, int]:
+        if row < 0:
+            raise CsvError(f"Invalid row number! '{row}'")
+        if self._row_count == 0:
+            return self.data_start, 2
+
+        # Going past the last row just skips to the end of the file.
+        row = min(row, self._row_count)
+        entry = min(row // self.stride, len(self._offsets) - 1)
+        offset = self._offsets[entry]
+        line_num = self._line_nums[entry]
+        rows_left = row - entry * self.stride
+        if rows_left == 0:
+            return offset, line_num
+
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            in_string = False
+            for line in _iter_lines(file):
+                if self.quote_aware and line.count(b'"') % 2 == 1:
+                    in_string = not in_string
+                offset += len(line)
+                line_num += 1
+                if not in_string:
+                    rows_left -= 1
+                    if rows_left == 0:
+                        break
+        return offset, line_num
+
+    # The rows from 'start_row' up to (but not including) 'end_row', or the rest of the file if there is no end.
+    def get_byte_range(
+        self, encoding: str, start_row: int, end_row: int | None = None
+    ) -> ByteRange:
+        start, first_line_num = self.find_row(start_row)
+        end = self.file_size
+        if end_row is not None and end_row < self._row_count:
+            end = max(start, self.find_row(end_row)[0])
+        return ByteRange(self.path, encoding, start, end, first_line_num)
+
+    # Splits the rows into ranges of roughly 'chunk_bytes', which (unlike find_byte_ranges)
+    # doesn't have to look at the file at all since the stored rows are known to be row boundaries.
+    def get_byte_ranges(
+        self, encoding: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES
+    ) -> Generator[ByteRange]:
+        offsets = self._offsets
+        if len(offsets) == 0:
+            return
+
+        start = 0
+        for entry in range(1, len(offsets)):
+            if offsets[entry] - offsets[start] >= chunk_bytes:
+                yield ByteRange(
+                    self.path,
+                    encoding,
+                    offsets[start],
+                    offsets[entry],
+                    self._line_nums[start],
+                )
+                start = entry
+        yield ByteRange(
+            self.path, encoding, offsets[start], self.file_size, self._line_nums[start]
+        )
@@ -0,0 +1,148 @@
+import array
+from collections.abc import Iterable, Iterator, Generator, Sequence
+from itertools import accumulate
+from multiprocessing.shared_memory import SharedMemory
+from ..row import CsvRow
+from .csv_header import CsvHeader
+
+# Layout of a chunk in shared memory (every number is an unsigned 64 bit int):
+#   row_count, value_count, payload_size
+#   row_starts      (row_count + 1)   index of the first value of every row
+#   value_offsets   (value_count + 1) byte offset of every value in the payload
+#   payload         every value UTF-8 encoded back to back
+_HEADER_SIZE = 3
+_ITEM_SIZE = array.array("Q").itemsize
+
+
+# What the worker sends back to the parent instead of the rows themselves.
+class SharedChunkHandle:
+    __slots__ = ("name", "row_count", "value_count", "payload_size")
+
+    def __init__(
+        self, name: str, row_count: int, value_count: int, payload_size: int
+    ) -> None:
+        self.name = name
+        self.row_count = row_count
+        self.value_count = value_count
+        self.payload_size = payload_size
+
+
+def _encode_values(values: list[str]) -> tuple[bytes, Iterable[int]]:
+    text = "".join(values)
+    # Most of the time everything is ASCII, in which case the byte offsets are the same as the string offsets.
+    if text.isascii():
+        return text.encode("ascii"), accumulate(map(len, values), initial=0)
+
+    encoded = [value.encode("utf-8") for value in values]
+    return b"".join(encoded), accumulate(map(len, encoded), initial=0)
+
+
+# Runs in the worker processes.
+def write_shared_chunk(rows: Iterable[Sequence[str]]) -> SharedChunkHandle | None:
+    row_starts = array.array("Q", [0])
+    values = []
+    for row in rows:
+        values.extend(row)
+        row_starts.append(len(values))
+
+    row_count = len(row_starts) - 1
+    if row_count == 0:
+        return None
+
+    payload, offsets = _encode_values(values)
+    value_offsets = array.array("Q", offsets)
+    tables = array.array("Q", (row_count, len(values), len(payload)))
+    tables.extend(row_starts)
+    tables.extend(value_offsets)
+
+    table_bytes = len(tables) * _ITEM_SIZE
+    # The parent takes over the ownership (and unlinks it), so the resource tracker must not clean it up when this
+    # process exits.
+    shm = SharedMemory(create=True, size=table_bytes + len(payload), track=False)
+    shm.buf[:table_bytes] = tables.tobytes()
+    shm.buf[table_bytes : table_bytes + len(payload)] = payload
+
+    handle = SharedChunkHandle(shm.name, row_count, len(values), len(payload))
+    shm.close()
+    return handle
+
+
+# A chunk written by a worker, the values are only decoded when they are read.
+class SharedRowChunk:
+    def __init__(self, handle: SharedChunkHandle) -> None:
+        self._shm = SharedMemory(name=handle.name)
+        # We are the only ones using it from now on, so the memory is freed as soon as we close it.
+        self._shm.unlink()
+
+        buf = self._shm.buf
+        row_starts_start = _HEADER_SIZE * _ITEM_SIZE
+        value_offsets_start = row_starts_start + (handle.row_count + 1) * _ITEM_SIZE
+        payload_start = value_offsets_start + (handle.value_count + 1) * _ITEM_SIZE
+
+        self._row_count = handle.row_count
+        self._row_starts = buf[row_starts_start:value_offsets_start].cast("Q")
+        self._value_offsets = buf[value_offsets_start:payload_start].cast("Q")
+        self._payload = buf[payload_start : payload_start + handle.payload_size]
+
+    # The rows read their values from the shared memory, so this is only for when none of them are used anymore.
+    # Chunks that are dropped without closing are closed by the garbage collector.
+    def close(self):
+        if self._shm is None:
+            return
+        # The views have to go before the shared memory can be closed.
+        for view in (self._row_starts, self._value_offsets, self._payload):
+            view.release()
+        self._shm.close()
+        self._shm = None
+
+    def __del__(self):
+        self.close()
+
+    def _decode_value(self, value_index: int) -> str:
+        offsets = self._value_offsets
+        return str(
+            self._payload[offsets[value_index] : offsets[value_index + 1]], "utf-8"
+        )
+
+    def get_row_count(self) -> int:
+        return self._row_count
+
+    def stream_rows(self, header: CsvHeader) -> Generator[CsvRow]:
+        row_starts = self._row_starts
+        for i in range(self._row_count):
+            yield CsvRow(
+                header, SharedRowValues(self, row_starts[i], row_starts[i + 1])
+            )
+
+
+# The values of one row, read straight out of the shared memory of the chunk.
+class SharedRowValues(Sequence[str]):
+    __slots__ = ("_chunk", "_start", "_end")
+
+    def __init__(self, chunk: SharedRowChunk, start: int, end: int) -> None:
+        self._chunk = chunk
+        self._start = start
+        self._end = end
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, index: int) -> str:
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError(index)
+        return self._chunk._decode_value(self._start + index)
+
+    def __iter__(self) -> Iterator[str]:
+        decode = self._chunk._decode_value
+        return map(decode, range(self._start, self._end))
+
+    def __reduce__(self):
+        # The shared memory doesn't exist outside this process, so pickle the actual values.
+        return (tuple, (tuple(self),))
+
+    def __repr__(self) -> str:
+        return f"{tuple(self)}"
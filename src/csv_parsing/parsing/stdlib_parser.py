@@ -0,0 +1,308 @@
+import csv
+import io
+from collections.abc import Iterable, Generator
+from typing import Self, TextIO
+from ..lexing.block_reader import BlockReader, DEFAULT_BLOCK_SIZE
+from ..row import CsvRow
+from ..row_filter import CompiledFilters
+from ..conversion import convert_rows
+from ..interning import InternedColumns
+from ..lexing.counting_reader import count_reads
+from ..compression import open_csv_source
+from ..bad_line_mode import BadLineMode
+from .csv_header import CsvHeader
+from .base_parser import BaseCsvParser
+from .fused_parser import FusedCsvParser, _create_picker
+from .parse_options import ParseOptions
+
+
+# Finds where lines start in a block of text, only as far as it is asked to.
+class _LineStarts:
+    __slots__ = ("_text", "_starts")
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._starts = [0]
+
+    def get(self, line: int) -> int:
+        starts = self._starts
+        while len(starts) <= line:
+            newline = self._text.find("\n", starts[-1])
+            starts.append(len(self._text) if newline == -1 else newline + 1)
+        return starts[line]
+
+
+# Splits rows with the C implemented csv module instead of in Python.
+# Our format isn't quite the csv module's though (a doubled quote isn't an escaped quote, empty values are errors,
+# \r is part of the value, etc.), so it is only trusted with rows that both agree on.
+# Every other row is handed to a FusedCsvParser, which gives exactly the rows and errors (with positions) CsvParser would.
+# Debug tokens are not supported, use CsvParser (or the FusedCsvParser) for those.
+class StdlibCsvParser(BaseCsvParser):
+    def __init__(
+        self,
+        lines: TextIO | Iterable[str],
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        allow_multiline_strings: bool = False,
+        parse_header: bool = True,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        first_line_num: int = 1,
+        options: ParseOptions | None = None,
+    ) -> None:
+        super().__init__(bad_line_mode, print_error_to, options)
+        self._allow_multiline_strings = allow_multiline_strings
+
+        stats = self._options.stats
+        if stats is not None:
+            lines = count_reads(lines, stats.get_stage("read"))
+        self._reader = BlockReader(lines, block_size)
+        # Text that was read but not parsed yet, and the line number it starts at.
+        self._pending = ""
+        self._line_num = first_line_num
+
+        if parse_header:
+            self._parse_header()
+
+    @staticmethod
+    def from_header(
+        header: CsvHeader,
+        lines: TextIO | Iterable[str],
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        allow_multiline_strings: bool = False,
+        first_line_num: int = 1,
+        options: ParseOptions | None = None,
+    ) -> Self:
+        new = StdlibCsvParser(
+            lines,
+            bad_line_mode,
+            print_error_to,
+            allow_multiline_strings,
+            parse_header=False,
+            first_line_num=first_line_num,
+            options=options,
+        )
+        new._header = header
+        return new
+
+    # Opens the file itself, which can be compressed (see open_csv_source), and closes it once it is parsed.
+    # 'parser_kwargs' are the rest of the arguments of the constructor.
+    @staticmethod
+    def from_path(
+        path: str,
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        encoding: str = "utf-8",
+        **parser_kwargs,
+    ) -> Self:
+        source = open_csv_source(path, encoding)
+        new = StdlibCsvParser(source, bad_line_mode, print_error_to, **parser_kwargs)
+        new._source = source
+        return new
+
+    def _parse_header(self):
+        # Parsed like the other parsers do it, the header is every value up to the first newline outside of a string.
+        text = self._pending
+        end = 0
+        quotes = 0
+        while True:
+            newline = text.find("\n", end)
+            if newline == -1:
+                block = self._reader.read_block()
+                if not block:
+                    end = len(text)
+                    break
+                text += block
+                continue
+            quotes += text.count('"', end, newline + 1)
+            end = newline + 1
+            if not self._allow_multiline_strings or quotes % 2 == 0:
+                break
+
+        header_line = text[:end]
+        self._pending = text[end:]
+        self._header = FusedCsvParser(
+            iter([header_line]),
+            self._bad_line_mode,
+            self._print_to_file,
+            self._allow_multiline_strings,
+            first_line_num=self._line_num,
+        )._header
+        self._line_num += header_line.count("\n")
+
+    def parse(self) -> Generator[CsvRow]:
+        rows = self._parse_unconverted()
+        if self._options.value_types is not None:
+            rows = convert_rows(rows, self._report_error)
+        yield from rows
+
+    def _parse_unconverted(self) -> Generator[CsvRow]:
+        rows = self._parse_rows()
+        options = self._options
+        if options.stats is not None:
+            rows = options.stats.time_items("parse", rows, inner="read")
+        if options.validator is not None:
+            rows = options.validator.validate(rows)
+        return rows
+
+    def _parse_strictly(
+        self, text: str, first_line_num: int, row_header: CsvHeader
+    ) -> Generator[CsvRow]:
+        # The rows the csv module can't be trusted with go through the FusedCsvParser instead,
+        # it already reports the errors (and drops or raises) exactly the way CsvParser would.
+        parser = FusedCsvParser.from_header(
+            self._header,
+            iter([text]),
+            self._bad_line_mode,
+            self._print_to_file,
+            self._allow_multiline_strings,
+            first_line_num=first_line_num,
+            options=ParseOptions(
+                columns=self._options.columns,
+                filters=self._options.filters,
+                bad_lines=self._bad_lines,
+            ),
+        )
+        # Its errors count as ours, but its input and rows aren't, we count those ourselves.
+        parser._options.stats = self._options.stats
+        try:
+            for row in parser._parse_rows():
+                yield CsvRow(row_header, row.get_raw_values())
+        finally:
+            if parser.had_errors():
+                self._had_error = True
+
+    def _find_row_end(
+        self, text: str, line_starts: _LineStarts, line: int, line_count: int
+    ) -> int | None:
+        # Every quote starts or ends a string to our lexer, so a row ends at the first newline outside of one.
+        # Returns None if the row doesn't end within the text.
+        if not self._allow_multiline_strings:
+            return line + 1
+        quotes = 0
+        while line < line_count:
+            quotes += text.count('"', line_starts.get(line), line_starts.get(line + 1))
+            line += 1
+            if quotes % 2 == 0:
+                return line
+        return None
+
+    def _parse_rows(self) -> Generator[CsvRow]:
+        header = self._header
+        column_count = header.get_column_count()
+
+        selected = None
+        row_header = header
+        options = self._options
+        if options.value_types is not None:
+            row_header = row_header.with_value_types(options.value_types)
+        if options.columns is not None:
+            selected = header.resolve_columns(options.columns)
+            row_header = row_header.project(selected)
+            pick_selected = _create_picker(selected)
+
+        filters = CompiledFilters.from_filters(header, options.filters)
+        interned = InternedColumns.from_columns(
+            header, options.intern_columns, options.intern_pool_size
+        )
+
+        while True:
+            # Only whole lines are parsed at once, the rest waits for the next block.
+            block = self._reader.read_block()
+            at_eof = not block
+            text = self._pending + block
+            if at_eof:
+                self._pending = ""
+            else:
+                end = text.rfind("\n") + 1
+                if end == 0:
+                    self._pending = text
+                    continue
+                text, self._pending = text[:end], text[end:]
+
+            if text:
+                line_starts = _LineStarts(text)
+                # csv sees a \r as the end of a line, we see it as part of the value, so those rows can't be trusted.
+                check_returns = "\r" in text
+                check_quotes = '"' in text
+                line_count = text.count("\n")
+                last_full_line = line_count
+                if not text.endswith("\n"):
+                    line_count += 1
+
+                buffer = io.StringIO(text, newline="\n")
+                rows = csv.reader(buffer, strict=True)
+                # The line the reader started at, it is restarted after every row the strict parser took over.
+                reader_line = 0
+                line = 0
+                while True:
+                    try:
+                        values = next(rows)
+                    except StopIteration:
+                        break
+                    except csv.Error:
+                        values = None
+
+                    if values is not None:
+                        end_line = reader_line + rows.line_num
+                        if not (
+                            len(values) == 0
+                            or len(values) > column_count
+                            or "" in values
+                            or (
+                                end_line - line > 1
+                                and not self._allow_multiline_strings
+                            )
+                            or (check_quotes and '"' in ",".join(values))
+                            # The last row without a newline has a few special cases of its own.
+                            or end_line > last_full_line
+                            or (
+                                check_returns
+                                and "\r"
+                                in text[line_starts.get(line) : line_starts.get(end_line)]
+                            )
+                        ):
+                            line = end_line
+                            if filters is not None and not filters.accepts(values):
+                                continue
+                            if interned is not None:
+                                interned.intern_values(values)
+
+                            if selected is None:
+                                yield CsvRow(row_header, tuple(values))
+                            elif len(values) > selected[-1]:
+                                yield CsvRow(row_header, pick_selected(values))
+                            else:
+                                # Like any other row that is too short, it just doesn't have the rest of the columns.
+                                yield CsvRow(
+                                    row_header,
+                                    tuple(values[i] for i in selected if i < len(values)),
+                                )
+                            continue
+
+                    # Where the row ends can differ as well (a quote in the middle of a value starts a string for us),
+                    # so it is found the way our lexer would find it.
+                    end_line = self._find_row_end(text, line_starts, line, line_count)
+                    if end_line is None:
+                        if not at_eof:
+                            break  # The string continues in the next block.
+                        end_line = line_count
+                    yield from self._parse_strictly(
+                        text[line_starts.get(line) : line_starts.get(end_line)],
+                        self._line_num + line,
+                        row_header,
+                    )
+                    line = end_line
+                    buffer.seek(line_starts.get(line))
+                    rows = csv.reader(buffer, strict=True)
+                    reader_line = line
+
+                self._line_num += line
+                if line < line_count:
+                    self._pending = text[line_starts.get(line) :] + self._pending
+
+            if at_eof and not self._pending:
+                break
+
+        if self._source is not None:
+            self._source.close()
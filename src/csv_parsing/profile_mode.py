@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class ProfileMode(Enum):
+    # Where the time goes, by function.
+    CPROFILE = 0
+    # Where the memory goes, by line.
+    TRACEMALLOC = 1
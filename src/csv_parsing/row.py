@@ -1,21 +1,85 @@
+from collections.abc import Iterator, Mapping, Sequence
 from .value import CsvValue
+from .lexing.token import CsvValueToken
+from .parsing.csv_header import CsvHeader
 
 
+# A row is just the raw values plus a reference to the (shared) header they belong to.
+# CsvValues are only created when asked for, and the debug tokens are only there if the parser was told to keep them.
 class CsvRow:
-    def __init__(self, values: list[CsvValue]) -> None:
-        self.values = values
+    __slots__ = ("_header", "_values", "_tokens")
+
+    def __init__(
+        self,
+        header: CsvHeader,
+        values: Sequence[str],
+        tokens: tuple[CsvValueToken, ...] | None = None,
+    ) -> None:
+        self._header = header
+        self._values = values
+        self._tokens = tokens
+
+    def get_header(self) -> CsvHeader:
+        return self._header
+
+    # Usually a tuple, but any sequence of strings is allowed (see SharedRowValues).
+    def get_raw_values(self) -> Sequence[str]:
+        return self._values
+
+    def _create_value(self, index: int) -> CsvValue:
+        token = self._tokens[index] if self._tokens is not None else None
+        return CsvValue(
+            self._header.lookup_column_type(index), self._values[index], token
+        )
 
     def get_all_values(self) -> list[CsvValue]:
-        return self.values
+        return [self._create_value(i) for i in range(len(self._values))]
 
     def get_value(self, column_type: str) -> CsvValue:
-        for value in self.values:
-            if value._column_type != column_type:
-                continue
-            return value
+        index = self._header.lookup_column_index(column_type)
+        if index is None or index >= len(self._values):
+            return None
+        return self._create_value(index)
+
+    def as_mapping(self) -> "CsvRowView":
+        return CsvRowView(self)
+
+    def debug_get_tokens(self) -> tuple[CsvValueToken, ...] | None:
+        return self._tokens
 
     def __repr__(self) -> str:
         str_buf = ""
-        for value in self.values:
+        for value in self.get_all_values():
             str_buf += f"{value}"
         return str_buf
+
+
+# Read-only dict-like access to a row (row["game"]) that doesn't copy anything,
+# the column names are looked up in the name->index table of the shared header.
+class CsvRowView(Mapping[str, str]):
+    __slots__ = ("_row",)
+
+    def __init__(self, row: CsvRow) -> None:
+        self._row = row
+
+    def get_row(self) -> CsvRow:
+        return self._row
+
+    def __getitem__(self, column_type: str) -> str:
+        row = self._row
+        index = row._header._column_indices[column_type]
+        try:
+            return row._values[index]
+        except IndexError:
+            # The row is shorter than the header, so it simply doesn't have this column.
+            raise KeyError(column_type) from None
+
+    def __iter__(self) -> Iterator[str]:
+        row = self._row
+        return iter(row._header.column_decls[: len(row._values)])
+
+    def __len__(self) -> int:
+        return len(self._row._values)
+
+    def __repr__(self) -> str:
+        return f"{dict(self)}"
@@ -0,0 +1,144 @@
+from collections.abc import Callable, Iterable, Sequence
+from enum import Enum
+from typing import Any, Self
+import operator
+from .error import CsvError
+from .parsing.csv_header import CsvHeader
+
+
+class FilterOp(Enum):
+    EQUAL = "=="
+    NOT_EQUAL = "!="
+    LESS = "<"
+    LESS_EQUAL = "<="
+    GREATER = ">"
+    GREATER_EQUAL = ">="
+
+
+_OPERATORS = {
+    FilterOp.EQUAL: operator.eq,
+    FilterOp.NOT_EQUAL: operator.ne,
+    FilterOp.LESS: operator.lt,
+    FilterOp.LESS_EQUAL: operator.le,
+    FilterOp.GREATER: operator.gt,
+    FilterOp.GREATER_EQUAL: operator.ge,
+}
+
+
+# Compares the raw value against a fixed value. Numbers are compared as numbers,
+# and raw values that aren't numbers simply don't match.
+# This is a class instead of a closure so it can be pickled and sent to the worker processes.
+class _Comparison:
+    __slots__ = ("_compare", "_value", "_is_number")
+
+    def __init__(self, op: FilterOp, value: Any) -> None:
+        self._compare = _OPERATORS[op]
+        self._value = value
+        self._is_number = isinstance(value, (int, float)) and not isinstance(
+            value, bool
+        )
+
+    def __call__(self, raw: str) -> bool:
+        if not self._is_number:
+            return self._compare(raw, self._value)
+        try:
+            return self._compare(float(raw), self._value)
+        except ValueError:
+            return False
+
+
+# A filter on the raw (string) value of a single column.
+# NOTE: The predicate has to be picklable (e.g. a module level function) to be used with MultiProcessCsvParser.
+class CsvFilter:
+    __slots__ = ("column_type", "predicate")
+
+    def __init__(self, column_type: str, predicate: Callable[[str], bool]) -> None:
+        self.column_type = column_type
+        self.predicate = predicate
+
+    @staticmethod
+    def compare(column_type: str, op: FilterOp, value: Any) -> Self:
+        return CsvFilter(column_type, _Comparison(op, value))
+
+    # Parses a filter like 'weighted_vote_score>0.8' or 'game==Terraria'.
+    @staticmethod
+    def from_string(text: str) -> Self:
+        # The two character ops have to be checked first, otherwise '<=' would be found as '<'.
+        for op in sorted(FilterOp, key=lambda op: len(op.value), reverse=True):
+            column_type, found, value = text.partition(op.value)
+            if not found:
+                continue
+            if column_type == "":
+                break
+            try:
+                return CsvFilter.compare(column_type, op, float(value))
+            except ValueError:
+                return CsvFilter.compare(column_type, op, value)
+        raise CsvError(f"Invalid filter! '{text}'")
+
+
+# The filters resolved against a header, which is what the parsers actually use.
+# A row is only kept if every filter accepts it.
+class CompiledFilters:
+    __slots__ = ("predicates", "column_count", "last_column", "_filtered")
+
+    def __init__(self, header: CsvHeader, filters: Iterable[CsvFilter]) -> None:
+        # The predicates for every column index (None if the column isn't filtered), so the parsers can check
+        # a value as soon as they get to it without looking anything up by name.
+        self.predicates: list[list[Callable[[str], bool]] | None] = [
+            None
+        ] * header.get_column_count()
+        for csv_filter in filters:
+            index = header.lookup_column_index(csv_filter.column_type)
+            if index is None:
+                raise CsvError(f"Unknown column type! '{csv_filter.column_type}'")
+            if self.predicates[index] is None:
+                self.predicates[index] = []
+            self.predicates[index].append(csv_filter.predicate)
+
+        self._filtered = [
+            (i, predicates)
+            for i, predicates in enumerate(self.predicates)
+            if predicates is not None
+        ]
+        # The amount of filtered columns, a row has to get through all of them to be kept.
+        self.column_count = len(self._filtered)
+        # Once a row is split up to (and including) this column, the filters can make up their minds.
+        self.last_column = self._filtered[-1][0] if self._filtered else -1
+
+    @staticmethod
+    def from_filters(
+        header: CsvHeader, filters: Iterable[CsvFilter] | None
+    ) -> Self | None:
+        if filters is None:
+            return None
+        compiled = CompiledFilters(header, filters)
+        return compiled if compiled.column_count != 0 else None
+
+    def accepts_value(self, column_index: int, value: str) -> bool:
+        for predicate in self.predicates[column_index]:
+            if not predicate(value):
+                return False
+        return True
+
+    # Checks the filtered columns of a split row in the order a parser walking the row would get to them.
+    # Getting to an empty value first is an error, which the filters don't get to decide on, so that gives None.
+    def check_in_order(self, values: Sequence[str]) -> bool | None:
+        first_empty = values.index("") if "" in values else len(values)
+        for i, predicates in self._filtered:
+            if i >= first_empty:
+                return None
+            for predicate in predicates:
+                if not predicate(values[i]):
+                    return False
+        return True
+
+    # A row that is too short to have every filtered column never matches.
+    def accepts(self, values: Sequence[str]) -> bool:
+        if len(values) <= self.last_column:
+            return False
+        for i, predicates in self._filtered:
+            for predicate in predicates:
+                if not predicate(values[i]):
+                    return False
+        return True
@@ -1,8 +1,58 @@
+import queue
+import threading
+from collections.abc import Generator, Iterable
 from .parsing.parser import CsvRow
+from .row import CsvRowView
 
 
+# NOTE: This copies every value into a new dict, use row_to_view if you only need to read the row.
 def row_to_dict(row: CsvRow) -> dict[str, str]:
-    d = {}
-    for values in row.get_all_values():
-        d[values.get_column_type()] = values.get_value()
-    return d
+    return dict(zip(row.get_header().column_decls, row.get_raw_values()))
+
+
+def row_to_view(row: CsvRow) -> CsvRowView:
+    return row.as_mapping()
+
+
+# Marks the end of the items in the queue.
+_END_OF_ITEMS = object()
+
+
+# Carries an exception from the background thread over to the consumer.
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+
+
+# Pulls the items from a background thread and yields None whenever the next one isn't there yet, instead of waiting.
+# For consumers that have to stay responsive (like an animated plot) while the items come from something that
+# can block for a long time, like a parser reading from a FollowReader.
+# At most 'max_buffered' items are read ahead, after that the thread waits for the consumer.
+def poll_in_background[T](
+    items: Iterable[T], max_buffered: int = 1024
+) -> Generator[T | None]:
+    buffered = queue.Queue(max_buffered)
+
+    def produce():
+        try:
+            for item in items:
+                buffered.put(item)
+        except Exception as e:
+            buffered.put(_Failure(e))
+        buffered.put(_END_OF_ITEMS)
+
+    # A daemon, so a consumer that stops early (like closing the plot window) doesn't keep the process alive.
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        try:
+            item = buffered.get_nowait()
+        except queue.Empty:
+            yield None
+            continue
+        if item is _END_OF_ITEMS:
+            return
+        if isinstance(item, _Failure):
+            raise item.error
+        yield item
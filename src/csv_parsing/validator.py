@@ -1,16 +1,41 @@
+import array
 import re
-from collections.abc import Iterable
-from typing import TextIO
+from collections.abc import Callable, Iterable, Sequence
+from functools import lru_cache
+from itertools import compress
+from operator import call, not_, or_
+from typing import TextIO, override
+from .columnar import ColumnBatch
+from .parsing.csv_header import CsvHeader
 from .row import CsvRow
 from .value import CsvValue
 from .error import CsvError
 from .lexing.token import CsvToken
 from .bad_line_mode import BadLineMode
+from .instrumentation import PipelineStats
+from .bad_lines import BadLineCollector, handle_bad_line
 
 
 class CsvValidatorError(CsvError):
-    def __init__(self, message: str, token: CsvToken) -> None:
-        super().__init__(message, token)
+    def __init__(self, message: str, token: CsvToken | None) -> None:
+        self.token = token
+        super().__init__(message)
+
+    @override
+    def get_printable_message(self) -> str:
+        # We only know where the value came from if the parser kept its debug tokens.
+        if self.token is None:
+            return self.message
+        return f"{self.message}\n\tat line {self.token.line_num}, column {self.token.char_index}"
+
+
+def _create_format_error(
+    value: str, pattern: re.Pattern, token: CsvToken | None
+) -> CsvValidatorError:
+    return CsvValidatorError(
+        f"Wrong type format! Value was '{value}' expected regex format is '{pattern.pattern}'",
+        token,
+    )
 
 
 class CsvTypeValidator:
@@ -19,25 +44,39 @@ class CsvTypeValidator:
         type_pattern_map: dict[str, re.Pattern],
         bad_line_mode: BadLineMode,
         print_error_to: TextIO | None,
+        stats: PipelineStats | None = None,
+        bad_lines: BadLineCollector | None = None,
     ) -> None:
         self.error_state = False
         self.had_error = False
+        self.error_count = 0
 
         self.type_pattern_map = type_pattern_map
         self.bad_line_mode = bad_line_mode
         self.print_to_file = print_error_to
+        # Counts and times the rows and errors as the "validate" stage, see PipelineStats.
+        self.stats = stats
+        # Where the bad lines go in BadLineMode.COLLECT, only set in that mode.
+        # Pass the one of the parser to get the bad lines of both in one place.
+        self.bad_lines = None
+        if bad_line_mode == BadLineMode.COLLECT:
+            self.bad_lines = bad_lines if bad_lines is not None else BadLineCollector()
+
+    def __getstate__(self) -> dict:
+        # The stats only count in the process they were made in, worker processes don't get them.
+        state = self.__dict__.copy()
+        state["stats"] = None
+        # They count the errors of their own chunk, see MultiProcessCsvParser._merge_errors.
+        state["error_count"] = 0
+        return state
 
     def _handle_error(self, error: CsvError):
         self.error_state = True
         self.had_error = True
-        match self.bad_line_mode:
-            case BadLineMode.ERROR:
-                raise error
-            case BadLineMode.WARNING:
-                print(
-                    f"BAD LINE WARNING!\n{error.get_printable_message()}",
-                    file=self.print_to_file,
-                )
+        self.error_count += 1
+        if self.stats is not None:
+            self.stats.add_error("validate")
+        handle_bad_line(error, self.bad_line_mode, self.print_to_file, self.bad_lines)
 
     def _check_value(self, value: CsvValue) -> bool:
         value_type = value.get_column_type()
@@ -47,10 +86,7 @@ class CsvTypeValidator:
 
             if not pattern.match(value_str):
                 self._handle_error(
-                    CsvValidatorError(
-                        f"Wrong type format! Value was '{value.get_value()}' expected regex format is '{pattern.pattern}'",
-                        value.debug_get_token(),
-                    )
+                    _create_format_error(value_str, pattern, value.debug_get_token())
                 )
                 return False
 
@@ -65,9 +101,186 @@ class CsvTypeValidator:
     def had_errors(self) -> bool:
         return self.had_error
 
+    def get_bad_lines(self) -> BadLineCollector | None:
+        return self.bad_lines
+
     def validate(self, rows: Iterable[CsvRow]) -> Iterable[CsvRow]:
+        valid_rows = self._validate_rows(rows)
+        if self.stats is not None:
+            valid_rows = self.stats.time_items("validate", valid_rows, inner="parse")
+        return valid_rows
+
+    def _validate_rows(self, rows: Iterable[CsvRow]) -> Iterable[CsvRow]:
         for row in rows:
             values = row.get_all_values()
             # Make sure ALL values pass the tests.
             if all(map(self._check_value, values)):
                 yield row
+
+
+# How many distinct values of every cached column we remember the verdict for.
+DEFAULT_VERDICT_CACHE_SIZE = 4096
+
+# Everything needed to check rows with one specific header, compiled once and reused for every row.
+class _RowLayout:
+    __slots__ = ("column_count", "_checks")
+
+    def __init__(
+        self,
+        header: CsvHeader,
+        type_pattern_map: dict[str, re.Pattern],
+        cached_columns: set[str],
+        cache_size: int,
+    ) -> None:
+        self.column_count = header.get_column_count()
+        # One check per column, in the same order as the values of a row.
+        self._checks = ()
+
+        checks = []
+        for column_type in header.column_decls:
+            pattern = type_pattern_map.get(column_type)
+            if pattern is None:
+                # Every row is an error, which the slow path takes care of.
+                self.column_count = -1
+                return
+
+            if column_type in cached_columns:
+                checks.append(lru_cache(maxsize=cache_size)(_create_check(pattern)))
+            else:
+                checks.append(pattern.match)
+        self._checks = tuple(checks)
+
+    # True means the row is definitely valid, False means the slow path has to find out.
+    def matches(self, values: Sequence[str]) -> bool:
+        if len(values) > self.column_count:
+            return False
+        # Runs every check on its value without going back to Python in between.
+        return all(map(call, self._checks, values))
+
+
+def _create_check(pattern: re.Pattern) -> Callable[[str], bool]:
+    match = pattern.match
+    return lambda value: match(value) is not None
+
+
+# Validates the same way as CsvTypeValidator, but checks a whole row at once with the checks compiled for its header,
+# and remembers the verdicts for the values of 'cached_columns' (which should be columns with few distinct values).
+# Only rows that fail go through CsvTypeValidator, so the errors are exactly the same.
+class FastCsvTypeValidator(CsvTypeValidator):
+    def __init__(
+        self,
+        type_pattern_map: dict[str, re.Pattern],
+        bad_line_mode: BadLineMode,
+        print_error_to: TextIO | None,
+        cached_columns: Iterable[str] | None = None,
+        cache_size: int = DEFAULT_VERDICT_CACHE_SIZE,
+        stats: PipelineStats | None = None,
+        bad_lines: BadLineCollector | None = None,
+    ) -> None:
+        super().__init__(
+            type_pattern_map, bad_line_mode, print_error_to, stats, bad_lines
+        )
+        self.cached_columns = set(cached_columns or ())
+        self.cache_size = cache_size
+
+        self._layouts = {}
+        self._last_header = None
+        self._last_layout = None
+
+    def __getstate__(self) -> dict:
+        # The compiled layouts can't be pickled, the worker processes just compile their own.
+        state = super().__getstate__()
+        state["_layouts"] = {}
+        state["_last_header"] = None
+        state["_last_layout"] = None
+        return state
+
+    def _get_layout(self, header: CsvHeader) -> _RowLayout:
+        # Rows from the same parse share their header, so this is almost always the same as last time.
+        if header is self._last_header:
+            return self._last_layout
+
+        key = tuple(header.column_decls)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = self._layouts[key] = _RowLayout(
+                header, self.type_pattern_map, self.cached_columns, self.cache_size
+            )
+        self._last_header = header
+        self._last_layout = layout
+        return layout
+
+    def check_row(self, row: CsvRow) -> bool:
+        if self._get_layout(row.get_header()).matches(row.get_raw_values()):
+            return True
+        # Something is (probably) wrong, so let the slow path find out what and report it.
+        return all(map(self._check_value, row.get_all_values()))
+
+    @override
+    def _validate_rows(self, rows: Iterable[CsvRow]) -> Iterable[CsvRow]:
+        return filter(self.check_row, rows)
+
+    def _check_column(
+        self,
+        pattern: re.Pattern,
+        column: Sequence[str],
+        dictionary: list[str] | None,
+    ) -> list[bool]:
+        if dictionary is not None:
+            # Every distinct value only has to be checked once.
+            verdicts = [pattern.match(value) is not None for value in dictionary]
+            return list(map(verdicts.__getitem__, column))
+        return [match is not None for match in map(pattern.match, column)]
+
+    # Validates a whole batch column by column, returning a batch with only the valid rows.
+    # Columnar batches don't keep debug tokens, so the errors don't have a position.
+    def validate_batch(self, batch: ColumnBatch) -> ColumnBatch:
+        header = batch.get_header()
+        # The columns that are checked and what they got, by index.
+        column_verdicts = {}
+        for i, column_type in enumerate(header.column_decls):
+            pattern = self.type_pattern_map.get(column_type)
+            if pattern is None:
+                # Every single row would fail on this, so only report it once.
+                self._handle_error(
+                    CsvValidatorError(f"Unknown column type! '{column_type}'", None)
+                )
+                return batch.select_rows([False] * batch.get_row_count())
+
+            column = batch.get_column(column_type)
+            dictionary = batch.get_dictionary(column_type)
+            # Numbers were converted from their text while building the batch, which already checked that the text was
+            # a number, and the text itself is gone. How the number looks as text again ("1.5" for "1.50", or the
+            # microseconds of a timestamp) isn't what the pattern was written for.
+            if dictionary is None and isinstance(column, (array.array, memoryview)):
+                continue
+
+            verdicts = self._check_column(pattern, column, dictionary)
+            # The values short rows don't have, which validating their rows doesn't check either.
+            missing = batch.get_missing_mask(column_type)
+            if missing is not None:
+                verdicts = list(map(or_, verdicts, missing))
+            column_verdicts[i] = verdicts
+
+        valid_rows = list(map(all, zip(*column_verdicts.values())))
+        if all(valid_rows):
+            return batch
+
+        # Report the first bad value of every bad row, in the same order validate would.
+        decoded_columns = {}
+        for row_index in compress(range(len(valid_rows)), map(not_, valid_rows)):
+            for i, verdicts in column_verdicts.items():
+                if verdicts[row_index]:
+                    continue
+                column_type = header.column_decls[i]
+                if i not in decoded_columns:
+                    decoded_columns[i] = batch.decode_column(column_type)
+                self._handle_error(
+                    _create_format_error(
+                        decoded_columns[i][row_index],
+                        self.type_pattern_map[column_type],
+                        None,
+                    )
+                )
+                break
+        return batch.select_rows(valid_rows)
@@ -2,17 +2,23 @@ from .lexing.token import CsvValueToken
 
 
 class CsvValue:
-    def __init__(self, column_type: str, token: CsvValueToken) -> None:
+    __slots__ = ("_column_type", "_value", "_token")
+
+    def __init__(
+        self, column_type: str, value: str, token: CsvValueToken | None = None
+    ) -> None:
         self._column_type = column_type
+        self._value = value
         self._token = token
 
     def get_column_type(self) -> str:
         return self._column_type
 
     def get_value(self) -> str:
-        return self._token.value
+        return self._value
 
-    def debug_get_token(self) -> CsvValueToken:
+    # Only available if the parser was told to keep debug tokens, otherwise this is None.
+    def debug_get_token(self) -> CsvValueToken | None:
         return self._token
 
     def __repr__(self) -> str:
@@ -0,0 +1,105 @@
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any
+
+
+class ValueType(Enum):
+    STRING = 0
+    INT = 1
+    FLOAT = 2
+    BOOL = 3
+    TIMESTAMP = 4
+
+
+_BOOLS = {
+    "True": True,
+    "true": True,
+    "1": True,
+    "False": False,
+    "false": False,
+    "0": False,
+}
+
+
+def _to_bool(value: str) -> bool:
+    try:
+        return _BOOLS[value]
+    except KeyError:
+        raise ValueError(f"invalid literal for bool: '{value}'") from None
+
+
+def _is_epoch_seconds(value: str) -> bool:
+    return value.removeprefix("-").isdigit()
+
+
+# ISO 8601 dates without a time zone are taken to be UTC, like the seconds since the epoch are.
+def _from_iso(value: str) -> datetime:
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+# Either seconds since the epoch (like the Steam review timestamps) or an ISO 8601 date.
+def _to_timestamp(value: str) -> datetime:
+    if _is_epoch_seconds(value):
+        return datetime.fromtimestamp(int(value), timezone.utc)
+    return _from_iso(value)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+# Whole microseconds, which (unlike seconds) keep everything a datetime has and (unlike a float) stay exact.
+def _to_epoch_micros(value: str) -> int:
+    if _is_epoch_seconds(value):
+        return int(value) * 1_000_000
+    return (_from_iso(value) - _EPOCH) // _MICROSECOND
+
+
+def _from_epoch_micros(value: int) -> datetime:
+    return _EPOCH + value * _MICROSECOND
+
+
+# The errors a converter can raise for a bad value.
+CONVERSION_ERRORS = (ValueError, OverflowError)
+
+# What the values in rows are converted with.
+_ROW_CONVERTERS: dict[ValueType, Callable[[str], Any]] = {
+    ValueType.STRING: str,
+    ValueType.INT: int,
+    ValueType.FLOAT: float,
+    ValueType.BOOL: _to_bool,
+    ValueType.TIMESTAMP: _to_timestamp,
+}
+
+# Columnar batches store the values in arrays, so timestamps are stored as microseconds since the epoch there.
+_COLUMN_FORMATS: dict[ValueType, tuple[str, Callable[[str], Any]]] = {
+    ValueType.INT: ("q", int),
+    ValueType.FLOAT: ("d", float),
+    ValueType.BOOL: ("b", _to_bool),
+    ValueType.TIMESTAMP: ("q", _to_epoch_micros),
+}
+
+# Turns the numbers in a column array back into what the rows would have had.
+_COLUMN_TO_ROW: dict[ValueType, Callable[[Any], Any]] = {
+    ValueType.BOOL: bool,
+    ValueType.TIMESTAMP: _from_epoch_micros,
+}
+
+
+def get_row_converter(value_type: ValueType) -> Callable[[str], Any]:
+    return _ROW_CONVERTERS[value_type]
+
+
+# Returns the array typecode and converter for a column, or None for strings.
+def get_column_format(
+    value_type: ValueType,
+) -> tuple[str, Callable[[str], Any]] | None:
+    return _COLUMN_FORMATS.get(value_type)
+
+
+def get_column_to_row(value_type: ValueType) -> Callable[[Any], Any] | None:
+    return _COLUMN_TO_ROW.get(value_type)
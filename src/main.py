@@ -1,48 +1,237 @@
-from csv_parsing.parsing.parser import CsvParser, BadLineMode
-from csv_parsing.utils import row_to_dict
+from csv_parsing.parsing.parser import BadLineMode
+from csv_parsing.parsing.fused_parser import FusedCsvParser
+from csv_parsing.utils import poll_in_background, row_to_view
+from csv_parsing.lexing.follow_reader import FollowReader
+from csv_parsing.compression import Compression, detect_compression
+from csv_parsing.row_filter import CsvFilter
+from csv_parsing.column_cache import ColumnCache
+from csv_parsing.value_type import ValueType
 from csv_parsing.parsing.multiprocess_parser import MultiProcessCsvParser
+from csv_parsing.parsing.base_parser import BaseCsvParser
+from csv_parsing.parsing.parse_options import ParseOptions
+from csv_parsing.parsing.parser_backend import create_parser as create_backend_parser
+from csv_parsing.instrumentation import PipelineStats, ThroughputReporter
+from csv_parsing.profile_mode import ProfileMode
+from csv_parsing.bad_lines import BadLineCollector
 from plots import Plot
-from plots.animated import TopNBarPlot
-import matplotlib
+from plots.animated import BatchMode, TopNBarPlot
+import argparse
+import os
 import signal
-import sys
 
 if __name__ == "__main__":
     # Make matplotlib figure close on CTRL+C in terminal
     signal.signal(signal.SIGINT, signal.SIG_DFL)
 
-    args = sys.argv
-    if len(args) < 2:
-        raise Exception("You need to specify a file to parse!")
+    arg_parser = argparse.ArgumentParser(
+        description="Animates the top games by hours played from a CSV of Steam reviews."
+    )
+    arg_parser.add_argument(
+        "file", help="The CSV file to parse, optionally compressed with gzip, bz2 or xz."
+    )
+    arg_parser.add_argument(
+        "--columns",
+        default="game,author_playtime_forever",
+        help="Comma separated list of the columns to parse, the rest are skipped. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        help="Only keep the rows matching this filter, like 'author_playtime_forever>=1000'. Can be given multiple times.",
+    )
+    arg_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Keep the parsed rows in a binary cache next to the file, so later runs can skip parsing it.",
+    )
+    arg_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep reading rows as they are appended to the file, the plot keeps updating until it is closed.",
+    )
+    arg_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print the throughput every few seconds, and how long every stage took once the plot is closed.",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="append",
+        default=[],
+        metavar="STAGE=MODE",
+        help="Profile a stage (read, lex, parse, frames) with cprofile or tracemalloc, like 'parse=cprofile'. Implies --stats.",
+    )
+    arg_parser.add_argument(
+        "--bad-lines",
+        choices=[mode.name.lower() for mode in BadLineMode],
+        default="error",
+        help="Stop at the first bad line, print a warning for every one, collect them or skip them. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--bad-lines-file",
+        help="Write the collected bad lines to this file (one JSON object per line) instead of keeping them in memory.",
+    )
+    arg_parser.add_argument(
+        "--no-blit",
+        action="store_true",
+        help="Draw every frame from scratch instead of only the bars and their text, which is a lot slower.",
+    )
+    arg_parser.add_argument(
+        "--batch",
+        choices=[mode.name.lower() for mode in BatchMode],
+        default="time",
+        help="How many rows go into every frame: one, --batch-size of them, as many as fit in a frame or enough to get through them all in --duration seconds. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="How many rows go into every frame with '--batch count'. (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--duration",
+        type=float,
+        help="How many seconds '--batch duration' takes to get through all the rows. Needs --cache, which knows how many there are.",
+    )
+    args = arg_parser.parse_args()
+    if args.follow and args.cache:
+        arg_parser.error("--follow can't be used with --cache")
+    if args.follow and detect_compression(args.file) != Compression.NONE:
+        arg_parser.error("--follow can't be used with compressed files")
 
-    file_path = args[1]
+    batch_mode = BatchMode[args.batch.upper()]
+    if batch_mode == BatchMode.COUNT and args.batch_size < 1:
+        arg_parser.error("--batch-size must be at least 1")
+    if batch_mode == BatchMode.DURATION and (args.duration is None or not args.cache):
+        arg_parser.error("'--batch duration' needs --duration and --cache")
 
-    # NOTE: all_reviews.csv is huge and starts with several thousand lines of the same game.
-    # I recommend reading the weighted_score_above_08.csv file
-    file = open(file_path, encoding="utf-8")
+    file_path = args.file
+    columns = args.columns.split(",")
 
-    parser = CsvParser(
-        file,
-        BadLineMode.ERROR,
-        print_error_to=None,
-        allow_multiline_strings=True,
-    )
+    bad_line_mode = BadLineMode[args.bad_lines.upper()]
+    bad_lines = None
+    if bad_line_mode == BadLineMode.COLLECT:
+        sidecar = None
+        if args.bad_lines_file is not None:
+            sidecar = open(args.bad_lines_file, "w", encoding="utf-8")
+        bad_lines = BadLineCollector(sidecar=sidecar)
+    elif args.bad_lines_file is not None:
+        arg_parser.error("--bad-lines-file needs '--bad-lines collect'")
+
+    profile_stages = {}
+    for profile in args.profile:
+        stage, _, mode = profile.partition("=")
+        if mode.upper() not in ProfileMode.__members__:
+            arg_parser.error(f"unknown profile mode '{mode}', use cprofile or tracemalloc")
+        profile_stages[stage] = ProfileMode[mode.upper()]
+
+    stats = None
+    if args.stats or profile_stages:
+        # The ETA needs to know how much there is to parse, which a compressed (or growing) file doesn't tell us.
+        total_bytes = None
+        if not args.follow and detect_compression(file_path) == Compression.NONE:
+            total_bytes = os.path.getsize(file_path)
+        stats = PipelineStats(total_bytes, profile_stages)
+
+    def create_parser(bad_lines: BadLineCollector | None = bad_lines) -> BaseCsvParser:
+        # NOTE: all_reviews.csv is huge and starts with several thousand lines of the same game.
+        # I recommend reading the weighted_score_above_08.csv file
+        # The file can be compressed with gzip, bz2 or xz.
+        options = ParseOptions(
+            columns=columns,
+            filters=[CsvFilter.from_string(where) for where in args.where],
+            # Converted while parsing (or once when caching), so the plot gets numbers straight away.
+            value_types={"author_playtime_forever": ValueType.INT},
+            # Only a few thousand games show up millions of times, and they are used as keys by the plot.
+            intern_columns=["game"] if "game" in columns else None,
+            stats=stats,
+            bad_lines=bad_lines,
+        )
+        if args.follow:
+            return FusedCsvParser(
+                FollowReader(file_path),
+                bad_line_mode,
+                print_error_to=None,
+                allow_multiline_strings=True,
+                options=options,
+            )
+        # The backend is picked from whether the file has quoted values.
+        return create_backend_parser(
+            file_path,
+            bad_line_mode,
+            print_error_to=None,
+            options=options,
+            allow_multiline_strings=True,
+        )
+
+    total_records = None
+    if args.cache:
+        # The columns, filters and bad line mode change what ends up in the cache, so a cache made with other ones can't
+        # be used.
+        cache = ColumnCache.open(
+            file_path,
+            # The bad lines are stored with the cache and reported from there, the same when it was there already.
+            lambda: create_parser(
+                BadLineCollector() if bad_lines is not None else None
+            ),
+            key=(
+                f"columns={args.columns};where={args.where};"
+                f"bad_lines={bad_line_mode.name}"
+            ),
+            dictionary_columns=["game"] if "game" in columns else None,
+        )
+        if bad_lines is not None:
+            bad_lines.merge(cache.get_bad_lines())
+        rows = cache.stream_rows()
+        total_records = cache.get_row_count()
+    elif args.follow:
+        # The parser waits for new rows in the background, so the plot stays responsive while there are none.
+        rows = poll_in_background(create_parser().parse())
+    else:
+        rows = create_parser().parse()
 
     # Add fonts including fonts for Chinese which is not included by default (-10000000 social credits)
-    matplotlib.rcParams["font.family"] = ["Verdana", "Microsoft JhengHei", "sans-serif"]
+    Plot.set_fonts(["Verdana", "Microsoft JhengHei", "sans-serif"])
 
-    # Map the CsvRows from the parser generator to dicts are easier for us to use here.
-    data = map(row_to_dict, parser.parse())
+    # Map the CsvRows from the parser generator to dict-like views, which are easier for us to use here.
+    # None just means there is no new row yet (when following the file).
+    data = (row_to_view(row) if row is not None else None for row in rows)
     plot = (
         TopNBarPlot(
             data,
             lambda item: item["game"],
             # Get the playtime in thousands
-            lambda item: int(item["author_playtime_forever"]) / 1000,
+            lambda item: item["author_playtime_forever"] / 1000,
             figsize=(12, 9),
         )
         .set_xticks_title("Hours played (thousands)")
         .set_title("Top 20 games by hours played per Steam review")
+        .set_stats(stats)
+        # Many rows go into every frame, the parser is a lot faster than the plot can be drawn.
+        .set_batching(
+            batch_mode,
+            batch_size=args.batch_size,
+            duration=args.duration,
+            total_records=total_records,
+        )
     )
-    plot.setup_animation(interval=10)
-    Plot.show_all()
+    plot.setup_animation(interval=10, blit=not args.no_blit)
+
+    if stats is None:
+        Plot.show_all()
+    else:
+        with ThroughputReporter(stats):
+            Plot.show_all()
+        stats.report_profiles()
+        print(stats.format_report())
+
+    if bad_lines is not None:
+        bad_lines.flush()
+        print(f"{bad_lines.get_count():,} bad lines")
+        if sidecar is not None:
+            sidecar.close()
+        else:
+            # The first few, the rest are in the collector.
+            for bad_line in bad_lines.get_records()[:20]:
+                print(f"\tline {bad_line.line_num}: {bad_line.reason}")
@@ -1,2 +1,3 @@
 from .animated_plot import AnimatedPlot
+from .batch_mode import BatchMode
 from .top_n_bar_plot import TopNBarPlot
@@ -1,25 +1,189 @@
+import math
+import time
 from abc import abstractmethod
-from typing import Iterable
+from typing import Generator, Iterable, Mapping, Self
 from matplotlib import animation as pltanim
+from matplotlib.artist import Artist
+from csv_parsing.instrumentation import PipelineStats
 from ..plot import Plot
+from .batch_mode import BatchMode
 
 
 class AnimatedPlot(Plot):
+    # Whether the plot implements _init_frame, which blitting needs.
+    supports_blit = False
 
-    def __init__(self, data: Iterable[dict[str, str]], **figkw) -> None:
+    def __init__(self, data: Iterable[Mapping[str, str]], **figkw) -> None:
         super().__init__(**figkw)
         self._data = data
+        self._stats = None
+        # Set by setup_animation, see _init_frame.
+        self._blit = False
+        self._interval = 10
+        # What the last frame drew, drawn again for frames without new data when blitting.
+        self._artists = []
 
-    def setup_animation(self, interval=10):
+        self._batch_mode = BatchMode.SINGLE
+        self._batch_size = 1
+        self._duration = None
+        self._expected_records = None
+
+    # Times every frame as the "frames" stage, see PipelineStats.
+    def set_stats(self, stats: PipelineStats | None) -> Self:
+        self._stats = stats
+        return self
+
+    # Folds more than one record into every frame, so the plot isn't limited to one record per interval.
+    # Every record still counts, only the drawing happens less often.
+    # 'batch_size' is for BatchMode.COUNT. BatchMode.DURATION goes through 'total_records' in 'duration' seconds,
+    # the records are spread over the frames by how much time is left, so slow frames just get bigger batches.
+    def set_batching(
+        self,
+        mode: BatchMode,
+        batch_size: int = 1,
+        duration: float | None = None,
+        total_records: int | None = None,
+    ) -> Self:
+        if mode == BatchMode.COUNT and batch_size < 1:
+            raise ValueError("The batch size must be at least 1!")
+        if mode == BatchMode.DURATION and (duration is None or total_records is None):
+            raise ValueError("BatchMode.DURATION needs a duration and total_records!")
+
+        self._batch_mode = mode
+        self._batch_size = batch_size
+        self._duration = duration
+        self._expected_records = total_records
+        return self
+
+    def _set_blit(self, blit: bool):
+        if blit and not self.supports_blit:
+            raise ValueError(f"{type(self).__name__} doesn't support blitting!")
+        self._blit = blit
+
+    # With 'blit' only the artists that change are drawn every frame, on top of a background that is only drawn again
+    # when it changes. The plot has to support it, see supports_blit.
+    def setup_animation(self, interval=10, blit=False):
+        self._set_blit(blit)
+        self._interval = interval
         self._anim = pltanim.FuncAnimation(
             self._fig,
-            self._update,
-            frames=self._data,
-            blit=False,
+            self._update_frame,
+            frames=self._batch_frames(),
+            init_func=self._init_frame if blit else None,
+            blit=blit,
             interval=interval,
             cache_frame_data=False,
         )
 
+    # Goes through every frame right away instead of animating them, like for a benchmark. Every frame is rendered
+    # like the animation would (with 'blit' the same way FuncAnimation blits), or just the last one without
+    # 'render_every_frame'. Returns how many records were folded in.
+    def run_frames(self, blit: bool = False, render_every_frame: bool = True) -> int:
+        self._set_blit(blit)
+        fig = self._fig
+        canvas = fig.canvas
+        background = None
+        if blit:
+            for artist in self._init_frame():
+                artist.set_animated(True)
+
+            # Every time the whole figure is drawn (also by the plot itself, when its limits change) the background
+            # without the animated artists is taken again.
+            def take_background(_):
+                nonlocal background
+                background = canvas.copy_from_bbox(fig.bbox)
+
+            canvas.mpl_connect("draw_event", take_background)
+            canvas.draw()
+
+        def render(artists: list[Artist]):
+            if not blit:
+                canvas.draw()
+                return
+            canvas.restore_region(background)
+            for artist in artists:
+                fig.draw_artist(artist)
+            canvas.blit(fig.bbox)
+
+        total_folded = 0
+        artists = []
+        for folded in self._batch_frames():
+            artists = self._update_frame(folded)
+            total_folded += folded
+            if render_every_frame:
+                render(artists)
+        if not render_every_frame:
+            render(artists)
+        return total_folded
+
+    # How many records the next frame may fold in, and until when. None means no limit.
+    def _get_batch_limits(
+        self, started: float, folded: int
+    ) -> tuple[int | None, float | None]:
+        match self._batch_mode:
+            case BatchMode.SINGLE:
+                return 1, None
+            case BatchMode.COUNT:
+                return self._batch_size, None
+            case BatchMode.TIME:
+                return None, time.perf_counter() + self._interval / 1000
+            case BatchMode.DURATION:
+                # How many records should be in by now. Past the duration this keeps growing at the same rate, so if
+                # there are more than 'total_records' the rest still comes in.
+                progress = (time.perf_counter() - started) / self._duration
+                due = math.ceil(self._expected_records * progress) - folded
+                return max(due, 1), None
+
+    # The frames of the animation, which fold the records in as they go. Every frame gets how many records it folded.
+    def _batch_frames(self) -> Generator[int]:
+        data = iter(self._data)
+        clock = time.perf_counter
+        started = clock()
+        total_folded = 0
+        while True:
+            limit, deadline = self._get_batch_limits(started, total_folded)
+            folded = 0
+            exhausted = True
+            for data_point in data:
+                # None means there is no new data yet (e.g. when following a file), so this frame gets what it has.
+                if data_point is None:
+                    exhausted = False
+                    break
+                self._fold(data_point)
+                folded += 1
+                if folded == limit or (deadline is not None and clock() >= deadline):
+                    exhausted = False
+                    break
+
+            total_folded += folded
+            if folded > 0 or not exhausted:
+                yield folded
+            if exhausted:
+                return
+
+    def _update_frame(self, folded: int) -> list[Artist]:
+        # Nothing new, so the last frame is left as is.
+        if folded == 0:
+            return self._artists
+        if self._stats is None:
+            artists = self._draw()
+        else:
+            artists = self._stats.time_call("frames", self._draw)
+        self._artists = artists or []
+        return self._artists
+
+    # Only used when blitting, so only by plots that set supports_blit: creates the artists that are updated every frame
+    # (and draws whatever never changes), then returns them. Called again when the figure is resized, so it shouldn't
+    # create them twice.
+    def _init_frame(self) -> list[Artist]:
+        return []
+
+    # Adds a record to what is plotted, without drawing anything.
+    @abstractmethod
+    def _fold(self, data_point: Mapping[str, str]):
+        pass
+
+    # Draws everything folded in so far. Returns the artists it changed, which only matters when blitting.
     @abstractmethod
-    def _update(self, data_point: dict[str, str]):
+    def _draw(self) -> list[Artist] | None:
         pass
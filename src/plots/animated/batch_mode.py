@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+# How many records are folded into every frame of an AnimatedPlot, see AnimatedPlot.set_batching.
+class BatchMode(Enum):
+    # One record per frame, so the plot can't go faster than one record per interval.
+    SINGLE = 0
+    # A fixed number of records per frame.
+    COUNT = 1
+    # As many records as can be folded in during the interval of a frame.
+    TIME = 2
+    # As many records as it takes to get through all of them in a set amount of time.
+    DURATION = 3
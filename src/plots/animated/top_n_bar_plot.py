@@ -1,18 +1,20 @@
-from collections import OrderedDict
-from typing import Callable, Iterable, Self
+from typing import Callable, Iterable, Mapping, Self
 import matplotlib
 import matplotlib.pyplot as plt
+from matplotlib.artist import Artist
 from utils import generate_color_map_from_list
 from .animated_plot import AnimatedPlot
+from .top_n_counter import TopNCounter
 
 
 class TopNBarPlot(AnimatedPlot):
+    supports_blit = True
 
     def __init__(
         self,
-        data: Iterable[dict[str, str]],
-        key_selector: Callable[[dict[str, str]], str],
-        value_selector: Callable[[dict[str, str]], int],
+        data: Iterable[Mapping[str, str]],
+        key_selector: Callable[[Mapping[str, str]], str],
+        value_selector: Callable[[Mapping[str, str]], int],
         top_n: int = 20,
         **figkw,
     ) -> None:
@@ -20,6 +22,8 @@ class TopNBarPlot(AnimatedPlot):
 
         self.SECONDARY_COLOR = "#666666"
         self.X_LIMIT_MARGIN_PERCENT = 0.1
+        # When blitting the x limit grows this much more than needed, since every change means redrawing everything.
+        self.BLIT_X_LIMIT_STEP = 1.5
         self.BAR_TEXT_MARGIN = 10
 
         self._title = ""
@@ -27,12 +31,21 @@ class TopNBarPlot(AnimatedPlot):
         self._key_selector = key_selector
         self._value_selector = value_selector
 
-        self._items = OrderedDict()
+        # Keeps the top N up to date as the items are added, instead of sorting all of them every frame.
+        self._items = TopNCounter(top_n)
         self._highest_count = 0
         self._top_n = top_n
 
         self._total_records = 0
 
+        # The artists reused for every frame when blitting, see _init_frame.
+        self._bars = None
+        self._name_texts = []
+        self._value_texts = []
+        self._footer = None
+        # The limits changed, so the background (with the ticks) has to be drawn again.
+        self._background_stale = False
+
     def set_title(self, title: str) -> Self:
         self._title = title
         return self
@@ -43,36 +56,32 @@ class TopNBarPlot(AnimatedPlot):
 
     def _update_highest_count(self, new_highest: int):
         self._highest_count = new_highest
-        self._axes.set_xlim(
-            (
-                0,
-                new_highest + (new_highest * self.X_LIMIT_MARGIN_PERCENT),
-            )
-        )
-
-    def _update_item(self, data_point: dict[str, str]):
+        x_limit = new_highest + (new_highest * self.X_LIMIT_MARGIN_PERCENT)
+        if self._blit:
+            if x_limit <= self._axes.get_xlim()[1]:
+                return
+            x_limit *= self.BLIT_X_LIMIT_STEP
+            self._background_stale = True
+        self._axes.set_xlim((0, x_limit))
+
+    def _fold(self, data_point: Mapping[str, str]):
         self._total_records += 1
 
         item_key = self._key_selector(data_point)
         item_value = self._value_selector(data_point)
 
-        self._items.setdefault(item_key, 0)
-
-        old_value = self._items[item_key]
-        new_value = old_value + item_value
-        self._items[item_key] = new_value
+        # Keys are usually interned by the parser, so these lookups are mostly identity checks.
+        new_value = self._items.add(item_key, item_value)
 
         if new_value > self._highest_count:
             self._update_highest_count(new_value)
 
     def _get_top_items(self) -> list[tuple[str, int]]:
-        # Sort the dictionary items by value descending and get the first N items.
-        sorted_items = sorted(self._items.items(), key=lambda x: x[1], reverse=True)
-        top_n_items = sorted_items[: self._top_n]
-        return top_n_items
+        # The first N items by value descending.
+        return self._items.get_top()
 
     def _create_bar_plot(self) -> matplotlib.container.BarContainer:
-        # TODO: optimize, this is incredibly slow
+        # NOTE: This is incredibly slow, which is why blitting (see _init_frame) reuses the artists instead.
 
         bar_data = self._current_bar_data = self._get_top_items()
         bar_data.reverse()
@@ -87,6 +96,26 @@ class TopNBarPlot(AnimatedPlot):
             edgecolor="black",
         )
 
+        self._draw_decorations()
+
+        # Bottom text
+        axes.text(
+            0.5,
+            -0.05,
+            f"Total records: {self._total_records}",
+            transform=axes.transAxes,
+            size=18,
+            weight=500,
+            ha="center",
+            va="bottom",
+        )
+
+        return bars
+
+    # Everything around the bars that doesn't change from frame to frame.
+    def _draw_decorations(self):
+        axes = self._axes
+
         # Title
         axes.text(
             0,
@@ -115,23 +144,9 @@ class TopNBarPlot(AnimatedPlot):
         axes.tick_params(axis="x", colors=self.SECONDARY_COLOR, labelsize=12)
         axes.xaxis.set_major_formatter("{x:,.0f}h")
 
-        # Bottom text
-        axes.text(
-            0.5,
-            -0.05,
-            f"Total records: {self._total_records}",
-            transform=axes.transAxes,
-            size=18,
-            weight=500,
-            ha="center",
-            va="bottom",
-        )
-
         # Adjust size of plot
         plt.subplots_adjust(left=0.05, right=0.95, top=0.85, bottom=0.1)
 
-        return bars
-
     def _get_key_value_at_index(self, index: int) -> tuple[str, int]:
         # Get the key and value for N bar.
         # dict.items() does not support indexing so we have to do it like this
@@ -151,10 +166,11 @@ class TopNBarPlot(AnimatedPlot):
 
         return total * factor
 
-    def _render_bar_text(self, bar_index: int):
-        name, value = self._get_key_value_at_index(bar_index)
-
-        scaling_factor = self._highest_count / 1000
+    def _layout_bar_text(self, name: str, value: int) -> tuple[float, str, float]:
+        # Returns where the name goes (and how it is aligned there), and where the value goes.
+        # Relative to the highest count the x limit would have without blitting, which always has the same margin.
+        x_limit = self._axes.get_xlim()[1] / (1 + self.X_LIMIT_MARGIN_PERCENT)
+        scaling_factor = x_limit / 1000
 
         bar_text_margin = self.BAR_TEXT_MARGIN * scaling_factor
 
@@ -166,6 +182,17 @@ class TopNBarPlot(AnimatedPlot):
         name_text_x = value if put_text_right else value - bar_text_margin
         name_text_ha = "left" if put_text_right else "right"
 
+        value_text_x = (
+            name_text_x + min_width + bar_text_margin * 2
+            if put_text_right
+            else value + bar_text_margin
+        )
+        return name_text_x, name_text_ha, value_text_x
+
+    def _render_bar_text(self, bar_index: int):
+        name, value = self._get_key_value_at_index(bar_index)
+        name_text_x, name_text_ha, value_text_x = self._layout_bar_text(name, value)
+
         # Draw name on bar
         self._axes.text(
             name_text_x,
@@ -177,12 +204,6 @@ class TopNBarPlot(AnimatedPlot):
             va="center",
         )
 
-        value_text_x = (
-            name_text_x + min_width + bar_text_margin * 2
-            if put_text_right
-            else value + bar_text_margin
-        )
-
         # Draw value next to bar
         self._axes.text(
             value_text_x,
@@ -195,12 +216,87 @@ class TopNBarPlot(AnimatedPlot):
 
     # Helpful article
     # https://medium.com/@qiaofengmarco/animate-your-data-visualization-with-matplotlib-animation-3e3c69679c90
-    def _update(self, data_point: dict[str, str]):
+    def _draw(self) -> list[Artist] | None:
+        if self._blit:
+            return self._update_artists()
+
         # Clear the frame so we can draw from scratch
         self._axes.clear()
+        # Which also reset the limits.
+        if self._highest_count > 0:
+            self._update_highest_count(self._highest_count)
 
-        self._update_item(data_point)
         bars = self._create_bar_plot()
 
         for bar_index, _ in enumerate(bars):
             self._render_bar_text(bar_index)
+
+    def _init_frame(self) -> list[Artist]:
+        if self._bars is not None:
+            return self._get_artists()
+
+        axes = self._axes
+        self._draw_decorations()
+        axes.set_xlim((0, 1))
+
+        # The highest bar goes on top, like when the plot is drawn from scratch.
+        positions = range(self._top_n - 1, -1, -1)
+        self._bars = axes.barh(positions, [0] * self._top_n, edgecolor="black")
+        for position in positions:
+            self._name_texts.append(
+                axes.text(0, position, "", size=14, weight=600, va="center")
+            )
+            self._value_texts.append(
+                axes.text(0, position, "", size=14, ha="left", va="center")
+            )
+        # Only what is inside the axes gets blitted, so the footer goes in some extra room below the bars instead of
+        # below the axes. The frame is off, so it looks the same.
+        axes.set_ylim((-1.5, self._top_n - 0.5))
+        self._footer = axes.text(
+            0.5,
+            0,
+            "",
+            transform=axes.transAxes,
+            size=18,
+            weight=500,
+            ha="center",
+            va="bottom",
+        )
+        return self._update_artists()
+
+    def _get_artists(self) -> list[Artist]:
+        return [*self._bars, *self._name_texts, *self._value_texts, self._footer]
+
+    # Only updates the artists made by _init_frame, nothing is created or removed.
+    def _update_artists(self) -> list[Artist]:
+        if self._background_stale:
+            # The ticks are part of the background, which doesn't include the artists we update.
+            self._background_stale = False
+            self._fig.canvas.draw()
+
+        top_items = self._get_top_items()
+        colors = generate_color_map_from_list(name for name, _ in top_items)
+        for rank, bar in enumerate(self._bars):
+            name_text = self._name_texts[rank]
+            value_text = self._value_texts[rank]
+            if rank >= len(top_items):
+                bar.set_visible(False)
+                name_text.set_visible(False)
+                value_text.set_visible(False)
+                continue
+
+            name, value = top_items[rank]
+            name_text_x, name_text_ha, value_text_x = self._layout_bar_text(name, value)
+            bar.set_visible(True)
+            bar.set_width(value)
+            bar.set_facecolor(colors[rank])
+            name_text.set_visible(True)
+            name_text.set_x(name_text_x)
+            name_text.set_horizontalalignment(name_text_ha)
+            name_text.set_text(name)
+            value_text.set_visible(True)
+            value_text.set_x(value_text_x)
+            value_text.set_text(f"{value:,.0f}h")
+
+        self._footer.set_text(f"Total records: {self._total_records}")
+        return self._get_artists()
@@ -0,0 +1,78 @@
+import heapq
+from collections.abc import Hashable
+
+
+# Sums up values per key and keeps the N keys with the highest sums in order, so the top doesn't have to be found by
+# sorting every key again. Ties are ordered by which key was added first, exactly like a stable sort would.
+# As long as the sums only grow (values >= 0, like hours played) an add costs at most O(N).
+# A sum in the top that goes down could make room for any other key though, so then the top is rebuilt from all keys
+# (O(K log N)) the next time it is asked for.
+class TopNCounter:
+    __slots__ = ("_size", "_totals", "_order", "_top", "_stale")
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._totals: dict[Hashable, int] = {}
+        # When every key was first added, for breaking ties.
+        self._order: dict[Hashable, int] = {}
+        # The keys of the top N, highest sum first.
+        self._top: list[Hashable] = []
+        self._stale = False
+
+    def __len__(self) -> int:
+        return len(self._totals)
+
+    def _ranks_above(self, key: Hashable, other: Hashable) -> bool:
+        total = self._totals[key]
+        other_total = self._totals[other]
+        return total > other_total or (
+            total == other_total and self._order[key] < self._order[other]
+        )
+
+    def _move_up(self, index: int):
+        # Moves the key at 'index' up past every key it now ranks above, like one step of insertion sort.
+        top = self._top
+        key = top[index]
+        while index > 0 and self._ranks_above(key, top[index - 1]):
+            top[index] = top[index - 1]
+            index -= 1
+        top[index] = key
+
+    # Adds 'value' to the sum of 'key' and returns the new sum.
+    def add(self, key: Hashable, value: int) -> int:
+        totals = self._totals
+        old_total = totals.get(key)
+        if old_total is None:
+            old_total = 0
+            self._order[key] = len(self._order)
+        total = totals[key] = old_total + value
+        if self._stale:
+            return total
+
+        top = self._top
+        if key in top:
+            if value < 0:
+                # Any key outside of the top could rank above it now.
+                self._stale = True
+            else:
+                self._move_up(top.index(key))
+        elif len(top) < self._size:
+            top.append(key)
+            self._move_up(len(top) - 1)
+        elif self._ranks_above(key, top[-1]):
+            # Knocks the last one out of the top.
+            top[-1] = key
+            self._move_up(len(top) - 1)
+        return total
+
+    def get(self, key: Hashable) -> int:
+        return self._totals.get(key, 0)
+
+    # The top N as (key, sum) pairs, highest sum first.
+    def get_top(self) -> list[tuple[Hashable, int]]:
+        totals = self._totals
+        if self._stale:
+            # Same as a stable sort, so ties still go to the key that was added first.
+            self._top = heapq.nlargest(self._size, totals, key=totals.__getitem__)
+            self._stale = False
+        return [(key, totals[key]) for key in self._top]
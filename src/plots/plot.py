@@ -1,5 +1,9 @@
+import matplotlib
+from matplotlib import font_manager
 from matplotlib import pyplot as plt
 
+_GENERIC_FAMILIES = {"serif", "sans-serif", "cursive", "fantasy", "monospace"}
+
 
 class Plot:
     def __init__(self, **figkw) -> None:
@@ -11,6 +15,20 @@ class Plot:
     def show(self):
         self._fig.show()
 
+    def close(self):
+        plt.close(self._fig)
+
     @staticmethod
     def show_all():
         plt.show()
+
+    # Only the families that are installed, matplotlib logs a warning every time it looks for one that isn't.
+    # End with a generic family (like "sans-serif") for when none of them are.
+    @staticmethod
+    def set_fonts(families: list[str]):
+        installed = {font.name for font in font_manager.fontManager.ttflist}
+        matplotlib.rcParams["font.family"] = [
+            family
+            for family in families
+            if family in installed or family in _GENERIC_FAMILIES
+        ]
@@ -0,0 +1,243 @@
+import os
+import random
+import tempfile
+import unittest
+from contextlib import ExitStack
+from benchmarks import ReviewGenerator
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.compression import open_csv_source
+from csv_parsing.error import CsvError
+from csv_parsing.lexing.block_lexer import BlockCsvLexer
+from csv_parsing.lexing.lexer import CsvLexer
+from csv_parsing.lexing.lexer_error import CsvLexerError
+from csv_parsing.lexing.token import CsvTokenType
+from csv_parsing.parsing.base_parser import BaseCsvParser
+from csv_parsing.parsing.fused_parser import FusedCsvParser
+from csv_parsing.parsing.multiprocess_parser import MultiProcessCsvParser
+from csv_parsing.parsing.parse_options import ParseOptions
+from csv_parsing.parsing.parser import CsvParser
+from csv_parsing.parsing.parser_backend import ParserBackend, create_parser
+from csv_parsing.parsing.stdlib_parser import StdlibCsvParser
+
+# Every other backend is compared with this one, it is the reference for the rows, the errors and their positions.
+REFERENCE_BACKEND = ParserBackend.PYTHON
+OTHER_BACKENDS = [
+    ParserBackend.FUSED,
+    ParserBackend.STDLIB,
+    ParserBackend.MULTIPROCESS,
+]
+
+# Small enough that even the short inputs below are split over several chunks.
+MULTIPROCESS_KWARGS = {"chunk_bytes": 64, "max_workers": 2}
+MULTIPROCESS_CHUNK_SIZE = 3
+
+# The modes every comparison is made in, ERROR is compared with parse_path_or_error instead.
+BAD_LINE_MODES = (BadLineMode.COLLECT, BadLineMode.SKIP)
+
+# A bit of everything: quoted values, empty values, too many values and quotes that are never closed in rows that
+# are already bad. Those have to be skipped without lexing them, since an unterminated string can't be recovered from.
+DIRTY_CSV = (
+    "game,hours,review\n"
+    "Portal,12,great\n"
+    'Portal 2,30,"funny, and short"\n'
+    "Doom,,fast\n"
+    "Quake,5,ok,too many\n"
+    'Myst,,"never closed\n'
+    'Riven,5,ok,"too many and never closed\n'
+    "Tetris,1,classic\n"
+    ",2,no name\n"
+    "Doom,3,again\n"
+)
+
+
+# Throws the warnings away. Unlike an open os.devnull it can be pickled, which the worker processes need.
+class NullWriter:
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+# Random rows with quoted values (some over more than one line), empty values and rows with the wrong amount of values.
+def generate_csv(
+    generator: random.Random, row_count: int, column_count: int = 4
+) -> str:
+    lines = [",".join(f"c{i}" for i in range(column_count))]
+    for _ in range(row_count):
+        value_count = column_count
+        if generator.random() < 0.15:
+            value_count = generator.choice([column_count + 1, column_count - 1, 0])
+        values = []
+        for _ in range(value_count):
+            length = generator.randrange(7)
+            value = "".join(generator.choices("abxyz 12é中", k=length))
+            if generator.random() < 0.2:
+                if generator.random() < 0.1:
+                    value += "\nmore," + value
+                value = f'"{value}"'
+            values.append(value)
+        lines.append(",".join(values))
+    text = "\n".join(lines)
+    return text + "\n" if generator.random() < 0.7 else text
+
+
+# Every token as a tuple, or the error the lexer stopped with at the end.
+def lex_all(
+    lexer: CsvLexer | BlockCsvLexer, keep_columns: list[bool] | None = None
+) -> list:
+    lexer.set_keep_columns(keep_columns)
+    tokens = []
+    try:
+        for token in lexer.lex():
+            value = getattr(token, "value", None)
+            tokens.append((token.type, token.line_num, token.char_index, value))
+            if token.type == CsvTokenType.END_OF_FILE:
+                break
+    except CsvLexerError as error:
+        tokens.append(error.get_printable_message())
+    return tokens
+
+
+# What a parser made of an input, to compare it with what the reference parser made of it.
+class ParseResult:
+    def __init__(self, parser: BaseCsvParser) -> None:
+        self.rows = [tuple(row.get_raw_values()) for row in parser.parse()]
+        self.had_errors = parser.had_errors()
+        self.bad_lines = None
+        bad_lines = parser.get_bad_lines()
+        if bad_lines is not None:
+            self.bad_lines = [
+                (record.line_num, record.column, record.reason, record.raw_line)
+                for record in bad_lines.get_records()
+            ]
+
+    def get_bad_line_nums(self) -> list[int]:
+        return [bad_line[0] for bad_line in self.bad_lines]
+
+
+# The helpers below take the ParseOptions as keyword arguments too, those are gathered into the options of the parser.
+def with_options(parser_kwargs: dict) -> dict:
+    options = {
+        name: parser_kwargs.pop(name)
+        for name in ParseOptions.__slots__
+        if name in parser_kwargs
+    }
+    if len(options) != 0:
+        parser_kwargs["options"] = ParseOptions(**options)
+    return parser_kwargs
+
+
+# The backends that read an open (or decompressed) file get one from 'files'. The multiprocess parser reads the path
+# itself, and so does AUTO, which picks one of the others (see choose_backend). Those are closed by 'files' too.
+def create_test_parser(
+    files: ExitStack,
+    path: str,
+    backend: ParserBackend,
+    bad_line_mode: BadLineMode,
+    **parser_kwargs,
+) -> BaseCsvParser:
+    parser_kwargs = with_options(parser_kwargs)
+    if backend == ParserBackend.MULTIPROCESS:
+        parser_kwargs = {**MULTIPROCESS_KWARGS, **parser_kwargs}
+    if backend in (ParserBackend.AUTO, ParserBackend.MULTIPROCESS):
+        parser = create_parser(
+            path, bad_line_mode, NullWriter(), backend, **parser_kwargs
+        )
+        # It only closes the file on its own once every row is parsed.
+        files.callback(parser.close)
+        return parser
+
+    file = files.enter_context(open_csv_source(path))
+    match backend:
+        case ParserBackend.PYTHON:
+            parser_type = CsvParser
+        case ParserBackend.FUSED:
+            parser_type = FusedCsvParser
+        case ParserBackend.STDLIB:
+            parser_type = StdlibCsvParser
+    return parser_type(file, bad_line_mode, NullWriter(), **parser_kwargs)
+
+
+def parse_path(
+    path: str, backend: ParserBackend, bad_line_mode: BadLineMode, **parser_kwargs
+) -> ParseResult:
+    with ExitStack() as files:
+        parser = create_test_parser(
+            files, path, backend, bad_line_mode, **parser_kwargs
+        )
+        return ParseResult(parser)
+
+
+# Sends the lines to the workers instead of letting them read byte ranges of the file.
+def parse_lines_multiprocess(
+    path: str, bad_line_mode: BadLineMode, **parser_kwargs
+) -> ParseResult:
+    with open(path, encoding="utf-8") as lines:
+        parser = MultiProcessCsvParser(
+            lines,
+            bad_line_mode,
+            NullWriter(),
+            chunk_size=MULTIPROCESS_CHUNK_SIZE,
+            max_workers=MULTIPROCESS_KWARGS["max_workers"],
+            **with_options(parser_kwargs),
+        )
+        return ParseResult(parser)
+
+
+# Like parse_path, but some inputs can't be parsed at all (like a string that is never closed in a good row).
+# The name of the error is returned for those, which every backend should agree on too.
+def parse_path_or_error(
+    path: str, backend: ParserBackend, bad_line_mode: BadLineMode, **parser_kwargs
+) -> ParseResult | str:
+    try:
+        return parse_path(path, backend, bad_line_mode, **parser_kwargs)
+    except CsvError as error:
+        return type(error).__name__
+
+
+# The shared memory blocks there are, where they can be listed.
+def get_shared_memory_names() -> set[str]:
+    if not os.path.isdir("/dev/shm"):
+        return set()
+    return set(os.listdir("/dev/shm"))
+
+
+# Writes the inputs of a test to a temporary directory, which is removed again after the test.
+class CsvFileTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self._directory = directory.name
+
+    # A parser of the file, which is closed again after the test.
+    def create_parser(
+        self,
+        path: str,
+        backend: ParserBackend,
+        bad_line_mode: BadLineMode,
+        **parser_kwargs,
+    ) -> BaseCsvParser:
+        files = self.enterContext(ExitStack())
+        return create_test_parser(files, path, backend, bad_line_mode, **parser_kwargs)
+
+    def write_csv(self, text: str, name: str = "input.csv") -> str:
+        path = os.path.join(self._directory, name)
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.write(text)
+        return path
+
+    def write_reviews(
+        self, row_count: int, bad_line_rate: float = 0.05, name: str = "reviews.csv"
+    ) -> str:
+        path = os.path.join(self._directory, name)
+        generator = ReviewGenerator(seed=1, game_count=50, bad_line_rate=bad_line_rate)
+        generator.write_to_path(path, row_count)
+        return path
+
+    def assert_same_result(
+        self, expected: ParseResult | str, actual: ParseResult | str, name: str
+    ):
+        if isinstance(expected, str) or isinstance(actual, str):
+            self.assertEqual(expected, actual, name)
+            return
+        self.assertEqual(expected.rows, actual.rows, name)
+        self.assertEqual(expected.had_errors, actual.had_errors, name)
+        self.assertEqual(expected.bad_lines, actual.bad_lines, name)
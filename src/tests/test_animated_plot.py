@@ -0,0 +1,62 @@
+import unittest
+import matplotlib
+
+matplotlib.use("Agg")
+
+from matplotlib import pyplot
+from plots.animated import AnimatedPlot, BatchMode, TopNBarPlot
+
+
+# Folds the records in, but doesn't implement blitting.
+class CountPlot(AnimatedPlot):
+    def __init__(self, data) -> None:
+        super().__init__(data)
+        self.count = 0
+
+    def _fold(self, data_point):
+        self.count += 1
+
+    def _draw(self):
+        pass
+
+
+class AnimatedPlotTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.addCleanup(pyplot.close, "all")
+
+    def test_blit_needs_support(self):
+        plot = CountPlot([])
+        with self.assertRaises(ValueError):
+            plot.setup_animation(blit=True)
+        plot.setup_animation(blit=False)
+
+    def test_run_frames(self):
+        plot = CountPlot(range(10)).set_batching(BatchMode.COUNT, 3)
+        self.assertEqual(plot.run_frames(), 10)
+        self.assertEqual(plot.count, 10)
+        with self.assertRaises(ValueError):
+            CountPlot([]).run_frames(blit=True)
+        # None is a frame without new data, like when following a file.
+        plot = CountPlot([1, None, 2, 3, None])
+        self.assertEqual(plot.run_frames(), 3)
+        self.assertEqual(plot.count, 3)
+
+    def test_run_frames_blit(self):
+        games = [{"game": f"Game {i % 7}"} for i in range(30)]
+        for blit in (False, True):
+            for render_every_frame in (False, True):
+                plot = TopNBarPlot(
+                    games, lambda item: item["game"], lambda item: 1, top_n=5
+                ).set_xticks_title("Hours")
+                self.assertEqual(plot.run_frames(blit, render_every_frame), 30)
+                plot.close()
+
+    def test_blit(self):
+        plot = TopNBarPlot(
+            [], lambda item: item["game"], lambda item: 1
+        ).set_xticks_title("Hours")
+        plot.setup_animation(blit=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import asyncio
+import gzip
+from contextlib import ExitStack, aclosing
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.parsing.async_parser import AsyncCsvParser
+from csv_parsing.parsing.chunk_transport import ChunkTransport
+from .parser_cases import (
+    BAD_LINE_MODES,
+    DIRTY_CSV,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    NullWriter,
+    ParserBackend,
+    ParseResult,
+    create_test_parser,
+    get_shared_memory_names,
+    parse_path,
+    parse_path_or_error,
+)
+
+# Tiny, so the parsing thread has to wait for the consumer all the time.
+ASYNC_KWARGS = {"rows_per_batch": 3, "max_batches_in_flight": 2}
+
+
+async def collect_rows(parser: AsyncCsvParser) -> list:
+    return [row async for row in parser.parse()]
+
+
+# Runs the async parser to its end, so ParseResult can look at it like at a normal parser.
+class CollectedParser:
+    def __init__(self, parser: AsyncCsvParser) -> None:
+        self._parser = parser
+
+    def parse(self) -> list:
+        return asyncio.run(collect_rows(self._parser))
+
+    def had_errors(self) -> bool:
+        return self._parser.had_errors()
+
+    def get_bad_lines(self):
+        return self._parser.get_bad_lines()
+
+
+class AsyncParserTest(CsvFileTestCase):
+    def parse_async(self, path, backend, mode, **parser_kwargs) -> ParseResult:
+        files = self.enterContext(ExitStack())
+        parser = AsyncCsvParser(
+            lambda: create_test_parser(files, path, backend, mode, **parser_kwargs),
+            **ASYNC_KWARGS,
+        )
+        return ParseResult(CollectedParser(parser))
+
+    def test_backends_agree_with_reference(self):
+        path = self.write_reviews(500)
+        for mode in BAD_LINE_MODES:
+            expected = parse_path(
+                path, REFERENCE_BACKEND, mode, allow_multiline_strings=True
+            )
+            for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+                actual = self.parse_async(
+                    path, backend, mode, allow_multiline_strings=True
+                )
+                name = f"{backend.name} {mode.name}"
+                self.assert_same_result(expected, actual, name)
+
+            parser = AsyncCsvParser.from_path(
+                path, mode, NullWriter(), allow_multiline_strings=True, **ASYNC_KWARGS
+            )
+            actual = ParseResult(CollectedParser(parser))
+            self.assert_same_result(expected, actual, f"from_path {mode.name}")
+
+    # The backend opens the file, so it can be compressed.
+    def test_from_path_compressed(self):
+        path = self.write_csv(DIRTY_CSV)
+        compressed = self.write_csv("", "dirty.csv.gz")
+        with gzip.open(compressed, "wt", encoding="utf-8") as file:
+            file.write(DIRTY_CSV)
+        for backend in (ParserBackend.AUTO, ParserBackend.FUSED):
+            parser = AsyncCsvParser.from_path(
+                compressed, BAD_LINE_MODES[0], NullWriter(), backend, **ASYNC_KWARGS
+            )
+            actual = ParseResult(CollectedParser(parser))
+            self.assertEqual(len(actual.rows), 4, backend.name)
+            expected = parse_path(path, REFERENCE_BACKEND, BAD_LINE_MODES[0])
+            self.assert_same_result(expected, actual, backend.name)
+
+    # Errors in the parsing thread are raised in the consumer.
+    def test_errors_agree_with_reference(self):
+        path = self.write_csv(DIRTY_CSV)
+        for mode in (BadLineMode.ERROR, *BAD_LINE_MODES):
+            expected = parse_path_or_error(path, REFERENCE_BACKEND, mode)
+            for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+                try:
+                    actual = self.parse_async(path, backend, mode)
+                except Exception as error:
+                    actual = type(error).__name__
+                name = f"{backend.name} {mode.name}"
+                self.assert_same_result(expected, actual, name)
+
+    def test_parse_columnar(self):
+        path = self.write_reviews(300)
+        columnar_kwargs = {"batch_size": 7, "dictionary_columns": ["game"]}
+
+        async def collect_batches(parser: AsyncCsvParser) -> list:
+            return [
+                (batch.get_row_count(), batch.decode_column("game"))
+                async for batch in parser.parse_columnar(**columnar_kwargs)
+            ]
+
+        parser = self.create_parser(
+            path, REFERENCE_BACKEND, BAD_LINE_MODES[0], allow_multiline_strings=True
+        )
+        expected = [
+            (batch.get_row_count(), batch.decode_column("game"))
+            for batch in parser.parse_columnar(**columnar_kwargs)
+        ]
+        parser = AsyncCsvParser.from_path(
+            path, BAD_LINE_MODES[0], NullWriter(), allow_multiline_strings=True
+        )
+        self.assertEqual(expected, asyncio.run(collect_batches(parser)))
+
+    # The other coroutines keep running while the rows come in.
+    def test_loop_stays_responsive(self):
+        path = self.write_reviews(2000)
+
+        async def run() -> tuple[int, int]:
+            ticks = 0
+            done = False
+
+            async def tick():
+                nonlocal ticks
+                while not done:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            ticker = asyncio.create_task(tick())
+            parser = AsyncCsvParser.from_path(
+                path, BAD_LINE_MODES[0], NullWriter(), allow_multiline_strings=True
+            )
+            rows = await collect_rows(parser)
+            done = True
+            await ticker
+            return len(rows), ticks
+
+        row_count, ticks = asyncio.run(run())
+        self.assertGreater(row_count, 1900)
+        self.assertGreater(ticks, 1)
+
+    # Stopping early stops the parsing thread and, with it, the worker processes and their chunks.
+    def test_stop_early(self):
+        path = self.write_reviews(500)
+        shared_memory = get_shared_memory_names()
+
+        async def take_rows(parser: AsyncCsvParser, row_count: int) -> list:
+            rows = []
+            async with aclosing(parser.parse()) as stream:
+                async for row in stream:
+                    rows.append(tuple(row.get_raw_values()))
+                    if len(rows) == row_count:
+                        break
+            return rows
+
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BAD_LINE_MODES[0], allow_multiline_strings=True
+        )
+        files = self.enterContext(ExitStack())
+        for backend, parser_kwargs in (
+            (ParserBackend.FUSED, {}),
+            (ParserBackend.MULTIPROCESS, {"transport": ChunkTransport.SHARED_MEMORY}),
+        ):
+            parser = AsyncCsvParser(
+                lambda: create_test_parser(
+                    files,
+                    path,
+                    backend,
+                    BAD_LINE_MODES[0],
+                    allow_multiline_strings=True,
+                    **parser_kwargs,
+                ),
+                **ASYNC_KWARGS,
+            )
+            rows = asyncio.run(take_rows(parser, 5))
+            self.assertEqual(expected.rows[:5], rows, backend.name)
+
+        # The file from_path had the backend open is closed too.
+        parser = AsyncCsvParser.from_path(
+            path, BAD_LINE_MODES[0], NullWriter(), allow_multiline_strings=True
+        )
+        rows = asyncio.run(take_rows(parser, 5))
+        self.assertEqual(expected.rows[:5], rows)
+        self.assertTrue(parser._parser._source.closed)
+        self.assertEqual(shared_memory, get_shared_memory_names())
@@ -0,0 +1,140 @@
+import asyncio
+import gzip
+import io
+import random
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.lexing.block_lexer import BlockCsvLexer
+from csv_parsing.lexing.lexer import CsvLexer
+from csv_parsing.lexing.lexer_error import CsvLexerError
+from csv_parsing.lexing.lexer_mode import LexerMode
+from csv_parsing.lexing.token import CsvTokenType
+from csv_parsing.parsing.async_parser import AsyncCsvParser
+from csv_parsing.parsing.multiprocess_parser import MultiProcessCsvParser
+from .parser_cases import (
+    DIRTY_CSV,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    NullWriter,
+    ParserBackend,
+    generate_csv,
+    parse_lines_multiprocess,
+    parse_path,
+)
+
+
+# What get_line gives where the parser takes the raw line of a row from, which is after the first token and
+# after every newline. The one after the last newline is left out, there is no row after it.
+def get_row_lines(lexer: CsvLexer | BlockCsvLexer) -> list[str]:
+    lines = []
+    previous = None
+    try:
+        for token in lexer.lex():
+            if token.type == CsvTokenType.END_OF_FILE:
+                if previous is not None and previous.type == CsvTokenType.NEWLINE:
+                    lines.pop()
+                break
+            if previous is None or token.type == CsvTokenType.NEWLINE:
+                lines.append(lexer.get_line())
+            previous = token
+    except CsvLexerError:
+        pass
+    return lines
+
+
+class BadLinesTest(CsvFileTestCase):
+    def test_backends_agree_on_bad_lines(self):
+        path = self.write_csv(DIRTY_CSV)
+        for mode in (BadLineMode.COLLECT, BadLineMode.SKIP):
+            expected = parse_path(path, REFERENCE_BACKEND, mode)
+            self.assertTrue(expected.had_errors)
+            self.assertEqual(len(expected.rows), 4)
+            if mode == BadLineMode.COLLECT:
+                self.assertEqual(expected.get_bad_line_nums(), [4, 5, 6, 7, 9])
+            for backend in OTHER_BACKENDS:
+                actual = parse_path(path, backend, mode)
+                self.assert_same_result(expected, actual, f"{backend.name} {mode.name}")
+            actual = parse_path(
+                path, REFERENCE_BACKEND, mode, lexer_mode=LexerMode.CHARACTER
+            )
+            self.assert_same_result(expected, actual, f"character lexer {mode.name}")
+
+    def test_backends_agree_on_generated_reviews(self):
+        path = self.write_reviews(500)
+        for mode in (BadLineMode.COLLECT, BadLineMode.SKIP):
+            expected = parse_path(
+                path, REFERENCE_BACKEND, mode, allow_multiline_strings=True
+            )
+            for backend in OTHER_BACKENDS:
+                actual = parse_path(path, backend, mode, allow_multiline_strings=True)
+                self.assert_same_result(expected, actual, f"{backend.name} {mode.name}")
+
+    # Lines are sent to the workers instead of byte ranges when parsing lines or a compressed file.
+    def test_multiprocess_line_chunks_have_line_numbers_of_input(self):
+        path = self.write_reviews(300)
+        compressed = self.write_csv("", "input.csv.gz")
+        with open(path, "rb") as file, gzip.open(compressed, "wb") as output:
+            output.write(file.read())
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.COLLECT, allow_multiline_strings=True
+        )
+        self.assertGreater(len(expected.bad_lines), 5)
+
+        actual = parse_lines_multiprocess(
+            path, BadLineMode.COLLECT, allow_multiline_strings=True
+        )
+        self.assert_same_result(expected, actual, "lines")
+        actual = parse_path(
+            compressed,
+            ParserBackend.MULTIPROCESS,
+            BadLineMode.COLLECT,
+            allow_multiline_strings=True,
+        )
+        self.assert_same_result(expected, actual, "compressed")
+
+    def test_multiprocess_had_errors(self):
+        dirty = self.write_reviews(200, name="dirty.csv")
+        clean = self.write_reviews(200, bad_line_rate=0, name="clean.csv")
+        for mode in (BadLineMode.COLLECT, BadLineMode.SKIP):
+            for path, had_errors in ((dirty, True), (clean, False)):
+                result = parse_path(
+                    path,
+                    ParserBackend.MULTIPROCESS,
+                    mode,
+                    allow_multiline_strings=True,
+                )
+                self.assertIs(result.had_errors, had_errors, f"{path} {mode.name}")
+                result = parse_lines_multiprocess(
+                    path, mode, allow_multiline_strings=True
+                )
+                self.assertIs(result.had_errors, had_errors, f"{path} {mode.name}")
+
+    def test_async_multiprocess_had_errors(self):
+        path = self.write_reviews(200)
+        parser = AsyncCsvParser(
+            lambda: MultiProcessCsvParser.from_path(
+                path,
+                BadLineMode.SKIP,
+                NullWriter(),
+                True,
+                chunk_bytes=1024,
+                max_workers=2,
+            )
+        )
+
+        async def parse():
+            return [row async for row in parser.parse()]
+
+        asyncio.run(parse())
+        self.assertIs(parser.had_errors(), True)
+
+    # The block lexer might only have read part of the line yet, the raw line is still the whole line.
+    def test_block_lexer_row_lines(self):
+        generator = random.Random(2)
+        for _ in range(100):
+            text = generate_csv(generator, 5)
+            expected = get_row_lines(CsvLexer(io.StringIO(text), True))
+            for block_size in (1, 3, 1 << 20):
+                lexer = BlockCsvLexer(io.StringIO(text), True, block_size)
+                name = f"{text!r} {block_size}"
+                self.assertEqual(expected, get_row_lines(lexer), name)
@@ -0,0 +1,103 @@
+import unittest
+from unittest import mock
+import matplotlib
+
+matplotlib.use("Agg")
+
+from matplotlib import pyplot
+from plots.animated import AnimatedPlot, BatchMode
+
+
+# Stands in for time.perf_counter, so how long folding and drawing take is up to the test.
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# Keeps every record it folded and how many there were per frame, and takes the time it is told to.
+class RecordingPlot(AnimatedPlot):
+    def __init__(
+        self, data, clock: FakeClock, fold_seconds=0.0, draw_seconds=0.0
+    ) -> None:
+        super().__init__(data)
+        self.clock = clock
+        self.fold_seconds = fold_seconds
+        self.draw_seconds = draw_seconds
+        self.folded = []
+        self.frames = []
+        self._drawn = 0
+
+    def _fold(self, data_point):
+        self.clock.now += self.fold_seconds
+        self.folded.append(data_point)
+
+    def _draw(self):
+        self.clock.now += self.draw_seconds
+        self.frames.append(len(self.folded) - self._drawn)
+        self._drawn = len(self.folded)
+
+
+class BatchModeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.addCleanup(pyplot.close, "all")
+        self.clock = FakeClock()
+        self.enterContext(mock.patch("time.perf_counter", self.clock))
+
+    def run_plot(self, plot: RecordingPlot, data: list) -> list[int]:
+        self.assertEqual(plot.run_frames(render_every_frame=False), len(data))
+        # Every record is folded in exactly once, in order, whatever the batches are.
+        self.assertEqual(plot.folded, data)
+        return plot.frames
+
+    def test_single(self):
+        data = list(range(5))
+        plot = RecordingPlot(data, self.clock)
+        self.assertEqual(self.run_plot(plot, data), [1] * 5)
+
+    def test_count(self):
+        data = list(range(10))
+        for batch_size, frames in ((1, [1] * 10), (3, [3, 3, 3, 1]), (20, [10])):
+            plot = RecordingPlot(data, self.clock)
+            plot.set_batching(BatchMode.COUNT, batch_size)
+            self.assertEqual(self.run_plot(plot, data), frames, batch_size)
+        with self.assertRaises(ValueError):
+            RecordingPlot(data, self.clock).set_batching(BatchMode.COUNT, 0)
+
+    def test_time(self):
+        data = list(range(10))
+        # 4ms per record and the default interval of 10ms, so it is past the interval after the third.
+        plot = RecordingPlot(data, self.clock, fold_seconds=0.004)
+        plot.set_batching(BatchMode.TIME)
+        self.assertEqual(self.run_plot(plot, data), [3, 3, 3, 1])
+
+    def test_duration(self):
+        # Drawing takes an eighth of the second all 80 records should take, so every frame after the first gets 10.
+        # (Times a float can hold exactly, so there is no rounding in how many are due.)
+        data = list(range(80))
+        plot = RecordingPlot(data, self.clock, draw_seconds=0.125)
+        plot.set_batching(BatchMode.DURATION, duration=1.0, total_records=80)
+        self.assertEqual(self.run_plot(plot, data), [1, 9] + [10] * 7)
+
+        # More records than expected still all come in, at the same rate.
+        data = list(range(120))
+        plot = RecordingPlot(data, self.clock, draw_seconds=0.125)
+        plot.set_batching(BatchMode.DURATION, duration=1.0, total_records=80)
+        self.assertEqual(self.run_plot(plot, data), [1, 9] + [10] * 11)
+
+        with self.assertRaises(ValueError):
+            RecordingPlot(data, self.clock).set_batching(BatchMode.DURATION)
+
+    def test_no_new_data(self):
+        # None is what a followed file gives while nothing was appended, which ends the batch without a redraw.
+        data = [1, 2, None, None, 3, 4, 5, None, 6]
+        records = [value for value in data if value is not None]
+        for mode, frames in (
+            (BatchMode.SINGLE, [1] * 6),
+            (BatchMode.COUNT, [2, 2, 1, 1]),
+        ):
+            plot = RecordingPlot(data, self.clock)
+            plot.set_batching(mode, 2)
+            self.assertEqual(self.run_plot(plot, records), frames, mode.name)
@@ -0,0 +1,149 @@
+import io
+import logging
+import os
+import matplotlib
+from unittest import mock
+from benchmarks import (
+    REVIEW_COLUMNS,
+    STAGES,
+    ReviewGenerator,
+    StageResult,
+    find_regressions,
+    load_baseline,
+    run_stage,
+    save_baseline,
+)
+from .parser_cases import (
+    BAD_LINE_MODES,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    parse_path,
+)
+
+# Narrow and wide rows, with and without multi-line reviews and bad lines.
+GENERATOR_KWARGS = [
+    {"review_words": 3, "multiline_rate": 0.0},
+    {"review_words": 60, "multiline_rate": 0.3},
+    {"review_words": 10, "multiline_rate": 0.1, "bad_line_rate": 0.2},
+]
+
+
+def generate(generator: ReviewGenerator, **write_kwargs) -> str:
+    file = io.StringIO()
+    generator.write(file, **write_kwargs)
+    return file.getvalue()
+
+
+class ReviewGeneratorTest(CsvFileTestCase):
+    def test_deterministic(self):
+        for generator_kwargs in GENERATOR_KWARGS:
+            text = generate(ReviewGenerator(5, **generator_kwargs), row_count=200)
+            again = generate(ReviewGenerator(5, **generator_kwargs), row_count=200)
+            self.assertEqual(text, again, generator_kwargs)
+            other = generate(ReviewGenerator(6, **generator_kwargs), row_count=200)
+            self.assertNotEqual(text, other, generator_kwargs)
+            # The start doesn't depend on how much is written.
+            shorter = generate(ReviewGenerator(5, **generator_kwargs), row_count=50)
+            self.assertTrue(text.startswith(shorter), generator_kwargs)
+
+    def test_size(self):
+        generator = ReviewGenerator()
+        self.assertEqual(generator.write(io.StringIO(), row_count=30), 30)
+        text = generate(generator, max_bytes=10_000)
+        # Stops at the first row past the limit, which is in bytes.
+        size = len(text.encode())
+        self.assertGreaterEqual(size, 10_000)
+        self.assertLess(size, 11_000)
+        self.assertLess(len(text), size)
+        self.assertEqual(
+            generator.write(io.StringIO(), row_count=5, max_bytes=10_000), 5
+        )
+        with self.assertRaises(ValueError):
+            generator.write(io.StringIO())
+
+    def test_backends_agree_on_generated_reviews(self):
+        for generator_kwargs in GENERATOR_KWARGS:
+            path = os.path.join(self._directory, "generated.csv")
+            generator = ReviewGenerator(seed=2, game_count=20, **generator_kwargs)
+            row_count = generator.write_to_path(path, 300)
+            for mode in BAD_LINE_MODES:
+                expected = parse_path(
+                    path, REFERENCE_BACKEND, mode, allow_multiline_strings=True
+                )
+                name = f"{generator_kwargs} {mode.name}"
+                # Only the broken rows are bad, and every other row is parsed.
+                self.assertEqual(
+                    expected.had_errors, "bad_line_rate" in generator_kwargs, name
+                )
+                if not expected.had_errors:
+                    self.assertEqual(len(expected.rows), row_count, name)
+                    self.assertEqual(len(expected.rows[0]), len(REVIEW_COLUMNS))
+                for backend in OTHER_BACKENDS:
+                    actual = parse_path(
+                        path, backend, mode, allow_multiline_strings=True
+                    )
+                    self.assert_same_result(expected, actual, f"{backend.name} {name}")
+
+
+class BenchmarkStagesTest(CsvFileTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        # The plot stages use the fonts of main.py, which shouldn't stick around for the other tests,
+        # and which don't have to be installed.
+        self.enterContext(matplotlib.rc_context())
+        font_logger = logging.getLogger("matplotlib.font_manager")
+        self.enterContext(mock.patch.object(font_logger, "disabled", True))
+
+    def test_stages_run(self):
+        path = self.write_reviews(200, bad_line_rate=0.01)
+        results = {
+            stage: run_stage(stage, path, repeat=1, frame_count=20) for stage in STAGES
+        }
+        file_size = os.path.getsize(path)
+        parsed = results["parse_python"].item_count
+        for stage, result in results.items():
+            self.assertGreater(result.item_count, 0, stage)
+            if stage.startswith(("parse", "lex")):
+                self.assertEqual(result.byte_count, file_size, stage)
+            if stage.startswith("parse"):
+                self.assertEqual(result.item_count, parsed, stage)
+            if stage in ("top_n_update", "top_n_draw", "top_n_draw_blit"):
+                self.assertEqual(result.item_count, 20, stage)
+        self.assertEqual(results["lex"].item_count, results["lex_block"].item_count)
+
+    # Broken rows that still parse (like "n/a" instead of the hours) are left out of the plot.
+    def test_plot_skips_broken_rows(self):
+        rows = [
+            f"Game {i},{'n/a' if i % 3 == 0 else i},ok,english,True" for i in range(9)
+        ]
+        path = self.write_csv(",".join(REVIEW_COLUMNS) + "\n" + "\n".join(rows))
+        for stage in ("top_n_update", "top_n_draw_batched"):
+            result = run_stage(stage, path, repeat=1, frame_count=3)
+            self.assertEqual(result.item_count, 6 if "batched" in stage else 3, stage)
+
+    def test_baseline(self):
+        path = os.path.join(self._directory, "baseline.json")
+        old = [
+            StageResult("parse", 1.0, 1000, 10_000, 100_000),
+            StageResult("plot", 1.0, 100, None, None),
+        ]
+        config = ReviewGenerator(seed=3).get_config()
+        save_baseline(path, config, old)
+        loaded_config, baseline = load_baseline(path)
+        self.assertEqual(loaded_config, config)
+        self.assertEqual(
+            [result.to_dict() for result in old],
+            [baseline[result.stage].to_dict() for result in old],
+        )
+
+        unchanged = [
+            StageResult("parse", 1.05, 1000, 10_000, 105_000),
+            StageResult("plot", 0.5, 100, None, None),
+            StageResult("new", 9.0, 1, None, None),
+        ]
+        self.assertEqual(find_regressions(unchanged, baseline, 0.1), [])
+        slower = [StageResult("parse", 2.0, 1000, 10_000, 200_000)]
+        regressions = find_regressions(slower, baseline, 0.1)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(message.startswith("parse:") for message in regressions))
@@ -0,0 +1,172 @@
+import array
+import os
+import sys
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.column_cache import ColumnCache
+from csv_parsing.error import CsvError
+from .parser_cases import (
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    DIRTY_CSV,
+    CsvFileTestCase,
+    parse_path,
+)
+
+# Without numeric columns, so the rows of the cache have the same values as the parsed ones.
+CACHE_KWARGS = {"batch_size": 50, "dictionary_columns": ["game", "language"]}
+
+
+def get_cached_rows(cache: ColumnCache) -> list[tuple[str, ...]]:
+    return [tuple(row.get_raw_values()) for row in cache.stream_rows()]
+
+
+class ColumnCacheTest(CsvFileTestCase):
+    def create_cache(
+        self, path: str, backend=REFERENCE_BACKEND, **cache_kwargs
+    ) -> ColumnCache:
+        return ColumnCache.open(
+            path,
+            lambda: self.create_parser(
+                path, backend, BadLineMode.SKIP, allow_multiline_strings=True
+            ),
+            **(cache_kwargs or CACHE_KWARGS),
+        )
+
+    def load_cache(self, path: str) -> ColumnCache | None:
+        return ColumnCache.load(
+            path, dictionary_columns=CACHE_KWARGS["dictionary_columns"]
+        )
+
+    def test_backends_agree_on_cache(self):
+        path = self.write_reviews(300)
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.SKIP, allow_multiline_strings=True
+        )
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            cache = self.create_cache(path, backend)
+            self.assertEqual(expected.rows, get_cached_rows(cache), backend.name)
+            del cache
+            os.remove(ColumnCache.get_cache_path(path))
+
+    def test_numeric_columns(self):
+        path = self.write_csv("game,hours\nPortal,12\nDoom,3\nPortal,7\n")
+        cache_kwargs = {
+            "batch_size": 2,
+            "numeric_columns": {"hours": "q"},
+            "dictionary_columns": ["game"],
+        }
+        self.create_cache(path, **cache_kwargs)
+        # Read back from the file, without parsing.
+        del cache_kwargs["batch_size"]
+        cache = ColumnCache.load(path, **cache_kwargs)
+        self.assertEqual(cache.get_row_count(), 3)
+        batches = list(cache.stream_batches())
+        self.assertEqual([batch.get_row_count() for batch in batches], [2, 1])
+        self.assertEqual(list(batches[0].get_column("hours")), [12, 3])
+        self.assertEqual(batches[1].get_column("game"), array.array("I", [0]))
+        self.assertEqual(list(batches[1].get_dictionary("game")), ["Portal", "Doom"])
+        self.assertEqual(batches[1].decode_column("hours"), [7])
+
+    # The values short rows don't have stay missing in the cache.
+    def test_short_rows(self):
+        path = self.write_csv("game,hours\nPortal,12\nDoom\nQuake,3\n")
+        cache_kwargs = {"numeric_columns": {"hours": "q"}, "dictionary_columns": []}
+        self.create_cache(path, **cache_kwargs)
+        cache = ColumnCache.load(path, **cache_kwargs)
+        self.assertEqual(
+            get_cached_rows(cache), [("Portal", "12"), ("Doom",), ("Quake", "3")]
+        )
+        (batch,) = cache.stream_batches()
+        self.assertEqual(batch.decode_column("hours"), [12, None, 3])
+
+    # A cache made with other settings is parsed and written again.
+    def test_key(self):
+        path = self.write_reviews(50)
+        ColumnCache.open(
+            path,
+            lambda: self.create_parser(
+                path,
+                REFERENCE_BACKEND,
+                BadLineMode.SKIP,
+                allow_multiline_strings=True,
+            ),
+            key="english",
+        )
+        self.assertIsNotNone(ColumnCache.load(path, key="english"))
+        self.assertIsNone(ColumnCache.load(path, key="german"))
+        self.assertIsNone(
+            ColumnCache.load(path, key="english", dictionary_columns=["game"])
+        )
+
+    # Loading the cache reports the bad lines that parsing the file found.
+    def test_bad_lines(self):
+        path = self.write_csv(DIRTY_CSV)
+        expected = parse_path(path, REFERENCE_BACKEND, BadLineMode.COLLECT)
+        ColumnCache.open(
+            path,
+            lambda: self.create_parser(path, REFERENCE_BACKEND, BadLineMode.COLLECT),
+        )
+        bad_lines = ColumnCache.load(path).get_bad_lines()
+        self.assertEqual(bad_lines.get_count(), 5)
+        self.assertEqual(
+            [record.line_num for record in bad_lines.get_records()], [4, 5, 6, 7, 9]
+        )
+        self.assertEqual(
+            expected.bad_lines,
+            [
+                (record.line_num, record.column, record.reason, record.raw_line)
+                for record in bad_lines.get_records()
+            ],
+        )
+
+        # Not there in the other modes.
+        os.remove(ColumnCache.get_cache_path(path))
+        self.create_cache(path, dictionary_columns=[])
+        self.assertIsNone(ColumnCache.load(path).get_bad_lines())
+
+    # A cache that fails half way isn't left behind, not even as the temporary file it is written to.
+    def test_failed_write(self):
+        path = self.write_csv(DIRTY_CSV)
+        with self.assertRaises(CsvError):
+            ColumnCache.open(
+                path,
+                lambda: self.create_parser(path, REFERENCE_BACKEND, BadLineMode.ERROR),
+            )
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["input.csv"])
+
+    def test_corrupt_cache_is_stale(self):
+        path = self.write_reviews(100)
+        expected = get_cached_rows(self.create_cache(path))
+        cache_path = ColumnCache.get_cache_path(path)
+        with open(cache_path, "rb") as file:
+            original = file.read()
+        # The metadata size comes right before the magic at the end, the metadata right before that.
+        size_start = len(original) - 16
+        size = int.from_bytes(original[size_start : size_start + 8], sys.byteorder)
+        metadata_start = size_start - size
+
+        corruptions = {
+            "magic": b"X" + original[1:],
+            "size": original[:size_start] + b"\xff" * 8 + original[size_start + 8 :],
+            "json": original[: size_start - 1] + b"!" + original[size_start:],
+            "not an object": original[:metadata_start]
+            + b"[]".rjust(size)
+            + original[size_start:],
+            "utf-8": original[: size_start - 2] + b"\xff" + original[size_start - 1 :],
+        }
+        for name, corrupt in corruptions.items():
+            with open(cache_path, "wb") as file:
+                file.write(corrupt)
+            self.assertIsNone(self.load_cache(path), name)
+            self.assertNotIn(cache_path, get_mapped_paths(), name)
+            # Parsed and written again.
+            self.assertEqual(expected, get_cached_rows(self.create_cache(path)), name)
+
+
+# The files this process has memory mapped, empty where /proc isn't there.
+def get_mapped_paths() -> set[str]:
+    try:
+        with open("/proc/self/maps", encoding="utf-8") as maps:
+            return {line.split(maxsplit=5)[-1].strip() for line in maps}
+    except FileNotFoundError:
+        return set()
@@ -0,0 +1,155 @@
+import array
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.error import CsvError
+from csv_parsing.parsing.base_parser import BaseCsvParser
+from csv_parsing.value_type import ValueType
+from .parser_cases import (
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    ParserBackend,
+)
+
+COLUMNAR_KWARGS = {
+    "batch_size": 7,
+    "numeric_columns": {"author_playtime_forever": "q"},
+    "dictionary_columns": ["game", "language"],
+}
+
+
+# The columns of every batch decoded, plus the dictionaries of the last batch and how many distinct ones there were.
+class ColumnarResult:
+    def __init__(self, parser: BaseCsvParser) -> None:
+        batches = list(parser.parse_columnar(**COLUMNAR_KWARGS))
+        header = batches[0].get_header()
+        column_types = [
+            header.lookup_column_type(i) for i in range(header.get_column_count())
+        ]
+        self.rows = [
+            row
+            for batch in batches
+            for row in zip(*(batch.decode_column(name) for name in column_types))
+        ]
+        self.dictionaries = {
+            name: batches[-1].get_dictionary(name)
+            for name in COLUMNAR_KWARGS["dictionary_columns"]
+        }
+        self.dictionary_ids = {
+            id(batch.get_dictionary(name))
+            for batch in batches
+            for name in COLUMNAR_KWARGS["dictionary_columns"]
+        }
+
+
+class ColumnarTest(CsvFileTestCase):
+    def parse(
+        self, path: str, backend: ParserBackend, **parser_kwargs
+    ) -> ColumnarResult:
+        parser = self.create_parser(
+            path,
+            backend,
+            BadLineMode.SKIP,
+            allow_multiline_strings=True,
+            **parser_kwargs,
+        )
+        return ColumnarResult(parser)
+
+    def assert_same_result(
+        self, expected: ColumnarResult, actual: ColumnarResult, name: str
+    ):
+        self.assertEqual(expected.rows, actual.rows, name)
+        self.assertEqual(expected.dictionaries, actual.dictionaries, name)
+        # One dictionary per column for the whole parse, so the codes mean the same in every batch.
+        self.assertEqual(len(actual.dictionary_ids), 2, name)
+
+    def test_backends_agree_on_batches(self):
+        path = self.write_reviews(500, bad_line_rate=0)
+        expected = self.parse(path, REFERENCE_BACKEND)
+        self.assertEqual(len(expected.rows), 500)
+        for backend in OTHER_BACKENDS:
+            self.assert_same_result(expected, self.parse(path, backend), backend.name)
+
+    def test_batches(self):
+        path = self.write_csv(
+            "game,hours,review\n"
+            "Portal,12,great\n"
+            "Doom,3,fast\n"
+            "Portal,7,again\n"
+            "Quake,1,short\n"
+            "Doom,2,ok\n"
+        )
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            parser = self.create_parser(path, backend, BadLineMode.SKIP)
+            batches = list(
+                parser.parse_columnar(
+                    batch_size=2,
+                    numeric_columns={"hours": "q"},
+                    dictionary_columns=["game"],
+                )
+            )
+            self.assertEqual(
+                [batch.get_row_count() for batch in batches], [2, 2, 1], backend.name
+            )
+            self.assertEqual(batches[1].get_column("hours"), array.array("q", [7, 1]))
+            self.assertEqual(batches[1].get_column("review"), ["again", "short"])
+            # Codes in the order the values were first seen, the same for every batch.
+            self.assertEqual(batches[1].get_column("game"), array.array("I", [0, 2]))
+            self.assertEqual(batches[2].get_column("game"), array.array("I", [1]))
+            self.assertEqual(
+                batches[2].get_dictionary("game"), ["Portal", "Doom", "Quake"]
+            )
+            self.assertEqual(batches[1].decode_column("game"), ["Portal", "Quake"])
+            self.assertIsNone(batches[0].get_dictionary("hours"))
+
+    # Short rows just don't have the last columns, in the batches as well as in the rows they turn back into.
+    def test_short_rows(self):
+        path = self.write_csv(
+            "game,hours,review\nPortal,12,great\nDoom,3\nQuake\nMyst,5,ok\n"
+        )
+        value_types = {"hours": ValueType.INT}
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            parser = self.create_parser(
+                path, backend, BadLineMode.SKIP, value_types=value_types
+            )
+            rows = [tuple(row.get_raw_values()) for row in parser.parse()]
+            self.assertEqual(
+                rows,
+                [("Portal", 12, "great"), ("Doom", 3), ("Quake",), ("Myst", 5, "ok")],
+                backend.name,
+            )
+
+            parser = self.create_parser(
+                path, backend, BadLineMode.SKIP, value_types=value_types
+            )
+            batches = list(parser.parse_columnar(dictionary_columns=["review"]))
+            self.assertFalse(parser.had_errors(), backend.name)
+            batch_rows = [
+                tuple(row.get_raw_values())
+                for batch in batches
+                for row in batch.stream_rows()
+            ]
+            self.assertEqual(rows, batch_rows, backend.name)
+            batch = batches[0]
+            self.assertEqual(batch.decode_column("hours"), [12, 3, None, 5])
+            self.assertEqual(batch.decode_column("review"), ["great", None, None, "ok"])
+            self.assertEqual(
+                batch.get_missing_mask("hours"), [False, False, True, False]
+            )
+            self.assertIsNone(batch.get_missing_mask("game"))
+            # Selecting rows keeps track of which of them are short.
+            selected = batch.select_rows([False, True, True, False])
+            self.assertEqual(selected.decode_column("hours"), [3, None])
+
+    # A value that can't be converted is a bad line, which leaves its row out of the batch.
+    def test_conversion_error(self):
+        path = self.write_csv("game,hours\nPortal,12\nDoom,n/a\nQuake,3\n")
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            parser = self.create_parser(path, backend, BadLineMode.SKIP)
+            batches = list(parser.parse_columnar(numeric_columns={"hours": "q"}))
+            self.assertEqual(batches[0].decode_column("game"), ["Portal", "Quake"])
+            self.assertEqual(batches[0].get_column("hours"), array.array("q", [12, 3]))
+            self.assertTrue(parser.had_errors(), backend.name)
+
+            parser = self.create_parser(path, backend, BadLineMode.ERROR)
+            with self.assertRaises(CsvError, msg=backend.name):
+                list(parser.parse_columnar(numeric_columns={"hours": "q"}))
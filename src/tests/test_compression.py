@@ -0,0 +1,78 @@
+import bz2
+import gzip
+import io
+import lzma
+from csv_parsing.compression import Compression, detect_compression
+from csv_parsing.lexing.decompression_reader import DecompressionReader
+from .parser_cases import (
+    BAD_LINE_MODES,
+    DIRTY_CSV,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    parse_path_or_error,
+)
+
+COMPRESSIONS = {
+    Compression.GZIP: (".gz", gzip.compress),
+    Compression.BZ2: (".bz2", bz2.compress),
+    Compression.XZ: (".xz", lzma.compress),
+}
+
+
+class CompressionTest(CsvFileTestCase):
+    def write_compressed(self, data: bytes, name: str) -> dict[Compression, str]:
+        paths = {}
+        for compression, (extension, compress) in COMPRESSIONS.items():
+            path = self.write_csv("", name + extension)
+            with open(path, "wb") as file:
+                file.write(compress(data))
+            paths[compression] = path
+        return paths
+
+    def assert_backends_agree(self, path: str, **parser_kwargs):
+        with open(path, "rb") as file:
+            paths = self.write_compressed(file.read(), "compressed.csv")
+        for mode in BAD_LINE_MODES:
+            expected = parse_path_or_error(
+                path, REFERENCE_BACKEND, mode, **parser_kwargs
+            )
+            for compression, compressed_path in paths.items():
+                self.assertEqual(detect_compression(compressed_path), compression)
+                for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+                    actual = parse_path_or_error(
+                        compressed_path, backend, mode, **parser_kwargs
+                    )
+                    name = f"{compression.name} {backend.name} {mode.name}"
+                    self.assert_same_result(expected, actual, name)
+
+    def test_reviews(self):
+        self.assert_backends_agree(
+            self.write_reviews(500), allow_multiline_strings=True
+        )
+
+    def test_dirty(self):
+        self.assert_backends_agree(self.write_csv(DIRTY_CSV))
+
+    # Windows line endings are left alone, whether the file is compressed or not.
+    def test_line_endings(self):
+        text = "game,hours\r\nPortal,12\r\n\"Doom\r\n2\",3\r\nQuake\r,4\n"
+        path = self.write_csv("", "crlf.csv")
+        with open(path, "wb") as file:
+            file.write(text.encode())
+        self.assert_backends_agree(path, allow_multiline_strings=True)
+
+    # Tiny blocks, so line endings and characters are split over blocks.
+    def test_reader_blocks(self):
+        text = "a,好\r\nb\r\rc\n\r\n\rd"
+        expected = "a,好\nb\n\nc\n\n\nd"
+        for block_size in (1, 2, 7, 1 << 20):
+            with DecompressionReader(
+                lambda: io.BytesIO(text.encode()), block_size=block_size
+            ) as reader:
+                self.assertEqual("".join(iter(reader.read, "")), expected, block_size)
+            with DecompressionReader(
+                lambda: io.BytesIO(text.encode()), block_size=block_size
+            ) as reader:
+                lines = list(reader)
+            self.assertEqual(lines, expected.splitlines(keepends=True), block_size)
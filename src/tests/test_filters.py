@@ -0,0 +1,127 @@
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.error import CsvError
+from csv_parsing.row_filter import CsvFilter, FilterOp
+from .parser_cases import (
+    BAD_LINE_MODES,
+    DIRTY_CSV,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    parse_path,
+    parse_path_or_error,
+)
+
+
+# Module level, so it can be sent to the worker processes.
+def is_long_review(raw: str) -> bool:
+    return len(raw) > 40
+
+
+REVIEW_FILTERS = {
+    "number": [CsvFilter.from_string("author_playtime_forever>500")],
+    "string": [CsvFilter.from_string("language==english")],
+    "last column": [CsvFilter.from_string("voted_up!=True")],
+    "callable": [CsvFilter("review", is_long_review)],
+    "several": [
+        CsvFilter.from_string("author_playtime_forever>=100"),
+        CsvFilter.from_string("author_playtime_forever<2000"),
+        CsvFilter.from_string("voted_up==True"),
+    ],
+}
+
+
+class FiltersTest(CsvFileTestCase):
+    def test_backends_agree_on_filters(self):
+        path = self.write_reviews(500)
+        for filter_name, filters in REVIEW_FILTERS.items():
+            for mode in BAD_LINE_MODES:
+                expected = parse_path(
+                    path,
+                    REFERENCE_BACKEND,
+                    mode,
+                    allow_multiline_strings=True,
+                    filters=filters,
+                )
+                self.assertNotEqual(expected.rows, [], filter_name)
+                for backend in OTHER_BACKENDS:
+                    actual = parse_path(
+                        path,
+                        backend,
+                        mode,
+                        allow_multiline_strings=True,
+                        filters=filters,
+                    )
+                    name = f"{filter_name} {backend.name} {mode.name}"
+                    self.assert_same_result(expected, actual, name)
+
+    # Filtering while parsing keeps the same rows as filtering the parsed rows.
+    def test_filters_keep_matching_rows(self):
+        path = self.write_reviews(500)
+        everything = parse_path(
+            path, REFERENCE_BACKEND, BAD_LINE_MODES[0], allow_multiline_strings=True
+        )
+        playtime = [
+            row for row in everything.rows if row[1].isdigit() and int(row[1]) > 500
+        ]
+        filtered = parse_path(
+            path,
+            REFERENCE_BACKEND,
+            BAD_LINE_MODES[0],
+            allow_multiline_strings=True,
+            filters=REVIEW_FILTERS["number"],
+        )
+        self.assertEqual(playtime, filtered.rows)
+
+    def test_backends_agree_on_dirty_filters(self):
+        path = self.write_csv(DIRTY_CSV)
+        for text in ("hours>4", "game==Doom", "review!=ok"):
+            filters = [CsvFilter.from_string(text)]
+            for mode in BAD_LINE_MODES:
+                expected = parse_path_or_error(
+                    path, REFERENCE_BACKEND, mode, filters=filters
+                )
+                for backend in OTHER_BACKENDS:
+                    actual = parse_path_or_error(path, backend, mode, filters=filters)
+                    name = f"{text} {backend.name} {mode.name}"
+                    self.assert_same_result(expected, actual, name)
+
+    # The rest of a row the filters reject is skipped without lexing it, so a string that is never closed in it
+    # isn't an error.
+    def test_rejected_rows_are_skipped(self):
+        path = self.write_csv('game,review\nDoom,fast\nMyst,"never closed\nQuake,ok\n')
+        filters = [CsvFilter.from_string("game!=Myst")]
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            for mode in (BadLineMode.ERROR, *BAD_LINE_MODES):
+                actual = parse_path(path, backend, mode, filters=filters)
+                name = f"{backend.name} {mode.name}"
+                self.assertEqual([("Doom", "fast"), ("Quake", "ok")], actual.rows, name)
+                self.assertFalse(actual.had_errors, name)
+
+    def test_dirty_filters(self):
+        path = self.write_csv(DIRTY_CSV)
+        filters = [CsvFilter.from_string("hours>4"), CsvFilter.from_string("game>=P")]
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            actual = parse_path(path, backend, BAD_LINE_MODES[0], filters=filters)
+            # 'Quake' has too many values and 'Doom' no hours, so neither is kept.
+            expected = [
+                ("Portal", "12", "great"),
+                ("Portal 2", "30", "funny, and short"),
+            ]
+            self.assertEqual(expected, actual.rows, backend.name)
+
+    def test_unknown_column(self):
+        path = self.write_csv(DIRTY_CSV)
+        filters = [CsvFilter.from_string("score>1")]
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            with self.assertRaises(CsvError, msg=backend.name):
+                parse_path(path, backend, BAD_LINE_MODES[0], filters=filters)
+
+    def test_from_string(self):
+        # Numbers are compared as numbers, everything else as text.
+        self.assertTrue(CsvFilter.from_string("hours<=10").predicate("9.5"))
+        self.assertFalse(CsvFilter.from_string("hours<=10").predicate("n/a"))
+        self.assertTrue(CsvFilter.from_string("game>=P").predicate("Portal"))
+        self.assertTrue(CsvFilter.compare("game", FilterOp.EQUAL, "1").predicate("1"))
+        for text in ("hours", "==10"):
+            with self.assertRaises(CsvError, msg=text):
+                CsvFilter.from_string(text)
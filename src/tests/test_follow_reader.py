@@ -0,0 +1,139 @@
+import os
+import random
+import threading
+import time
+from csv_parsing.error import CsvError
+from csv_parsing.lexing.follow_reader import FollowReader
+from csv_parsing.lexing.lexer_mode import LexerMode
+from csv_parsing.parsing.fused_parser import FusedCsvParser
+from csv_parsing.parsing.parser import CsvParser
+from .parser_cases import (
+    BAD_LINE_MODES,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    NullWriter,
+    ParseResult,
+    parse_path,
+)
+
+# Short, so the tests don't spend their time waiting for the next poll.
+POLL_INTERVAL = 0.005
+# Only there so a parser that waits for more than it should fails instead of hanging.
+IDLE_TIMEOUT = 5
+
+PARSERS = {
+    "fused": lambda reader: FusedCsvParser(
+        reader, BAD_LINE_MODES[0], NullWriter(), allow_multiline_strings=True
+    ),
+    "char lexer": lambda reader: CsvParser(
+        reader,
+        BAD_LINE_MODES[0],
+        NullWriter(),
+        allow_multiline_strings=True,
+        lexer_mode=LexerMode.CHARACTER,
+    ),
+    "block lexer": lambda reader: CsvParser(
+        reader, BAD_LINE_MODES[0], NullWriter(), allow_multiline_strings=True
+    ),
+}
+
+
+def append(path: str, data: bytes):
+    with open(path, "ab", buffering=0) as file:
+        file.write(data)
+
+
+class FollowReaderTest(CsvFileTestCase):
+    def create_reader(self, path: str) -> FollowReader:
+        reader = FollowReader(
+            path, poll_interval=POLL_INTERVAL, idle_timeout=IDLE_TIMEOUT
+        )
+        self.addCleanup(reader.close)
+        return reader
+
+    # The file is appended to in random pieces, which split rows, quoted values and multi-byte characters.
+    def test_parsers_agree_with_reference(self):
+        source = self.write_reviews(300)
+        expected = parse_path(
+            source, REFERENCE_BACKEND, BAD_LINE_MODES[0], allow_multiline_strings=True
+        )
+        with open(source, "rb") as file:
+            data = file.read()
+
+        generator = random.Random(1)
+        for name, create_parser in PARSERS.items():
+            path = self.write_csv("", f"{name}.csv")
+            reader = self.create_reader(path)
+
+            def write():
+                start = 0
+                while start < len(data):
+                    end = start + generator.randrange(1, 300)
+                    append(path, data[start:end])
+                    start = end
+                    time.sleep(0.0005)
+                reader.stop()
+
+            writer = threading.Thread(target=write)
+            writer.start()
+            actual = ParseResult(create_parser(reader))
+            writer.join()
+            self.assert_same_result(expected, actual, name)
+
+    # A row is handed out as soon as its line is complete, without waiting for what comes after it.
+    def test_rows_come_as_they_are_appended(self):
+        path = self.write_csv("game,hours,review\nPortal,12,great\n")
+        reader = self.create_reader(path)
+        rows = PARSERS["fused"](reader).parse()
+        self.assertEqual(next(rows).get_raw_values(), ("Portal", "12", "great"))
+
+        append(path, "Doom,3".encode())
+        append(path, ',"fast\nand'.encode())
+        # Ends in the middle of a character.
+        next_row = ' loud"\n游戏,1,ok\n'.encode()
+        append(path, next_row[:9])
+        append(path, next_row[9:])
+        self.assertEqual(next(rows).get_raw_values(), ("Doom", "3", "fast\nand loud"))
+        self.assertEqual(next(rows).get_raw_values(), ("游戏", "1", "ok"))
+
+        # The last line doesn't need a newline once the reader is stopped.
+        append(path, b"Tetris,1,classic")
+        reader.stop()
+        self.assertEqual(
+            [row.get_raw_values() for row in rows], [("Tetris", "1", "classic")]
+        )
+
+    # Like a file opened in text mode, also when an append ends between the '\r' and the '\n'.
+    def test_line_endings(self):
+        path = self.write_csv("game,hours\r\n")
+        reader = self.create_reader(path)
+        append(path, b"Portal,12\r")
+        self.assertEqual(next(reader), "game,hours\n")
+        append(path, b"\nDoom,3\rTetris,1\r")
+        reader.stop()
+        self.assertEqual(list(reader), ["Portal,12\n", "Doom,3\n", "Tetris,1\n"])
+
+        path = self.write_csv("game,hours,review\r\n", "quoted.csv")
+        reader = self.create_reader(path)
+        append(path, b'Portal,12,"great\r\nfun"\r\nDoom,3,fast\r\n')
+        reader.stop()
+        rows = PARSERS["fused"](reader).parse()
+        self.assertEqual(
+            [row.get_raw_values() for row in rows],
+            [("Portal", "12", "great\nfun"), ("Doom", "3", "fast")],
+        )
+
+    def test_idle_timeout(self):
+        path = self.write_csv("game,hours\nPortal,12\n")
+        reader = FollowReader(path, poll_interval=POLL_INTERVAL, idle_timeout=0.05)
+        self.addCleanup(reader.close)
+        lines = list(reader)
+        self.assertEqual(lines, ["game,hours\n", "Portal,12\n"])
+
+    def test_truncated_file(self):
+        path = self.write_csv("game,hours\nPortal,12\nDoom,3\n")
+        reader = self.create_reader(path)
+        self.assertEqual(next(reader), "game,hours\n")
+        os.truncate(path, 5)
+        with self.assertRaises(CsvError):
+            list(reader)
@@ -0,0 +1,46 @@
+import random
+from csv_parsing.bad_line_mode import BadLineMode
+from .parser_cases import (
+    BAD_LINE_MODES,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    ParserBackend,
+    generate_csv,
+    parse_path,
+    parse_path_or_error,
+)
+
+
+class FusedParserTest(CsvFileTestCase):
+    # Small blocks too, so rows are split over blocks all the time.
+    def test_agrees_with_reference_on_random_input(self):
+        generator = random.Random(1)
+        for case in range(150):
+            text = generate_csv(generator, generator.randrange(1, 15))
+            path = self.write_csv(text)
+            multiline = generator.random() < 0.5
+            for mode in (BadLineMode.ERROR, *BAD_LINE_MODES):
+                expected = parse_path_or_error(
+                    path, REFERENCE_BACKEND, mode, allow_multiline_strings=multiline
+                )
+                for block_size in (3, 1 << 20):
+                    actual = parse_path_or_error(
+                        path,
+                        ParserBackend.FUSED,
+                        mode,
+                        allow_multiline_strings=multiline,
+                        block_size=block_size,
+                    )
+                    name = f"{case} {text!r} {mode.name} {block_size}"
+                    self.assert_same_result(expected, actual, name)
+
+    def test_backends_agree_on_reviews(self):
+        path = self.write_reviews(500)
+        for mode in BAD_LINE_MODES:
+            expected = parse_path(
+                path, REFERENCE_BACKEND, mode, allow_multiline_strings=True
+            )
+            for backend in OTHER_BACKENDS:
+                actual = parse_path(path, backend, mode, allow_multiline_strings=True)
+                self.assert_same_result(expected, actual, f"{backend.name} {mode.name}")
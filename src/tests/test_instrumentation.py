@@ -0,0 +1,71 @@
+import os
+from csv_parsing.instrumentation import PipelineStats
+from csv_parsing.parsing.parser_backend import ParserBackend
+from .parser_cases import (
+    BAD_LINE_MODES,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    parse_lines_multiprocess,
+    parse_path,
+)
+
+
+class InstrumentationTest(CsvFileTestCase):
+    def test_backends_agree_on_parse_stage(self):
+        path = self.write_reviews(300)
+        stats = PipelineStats()
+        parse_path(
+            path,
+            REFERENCE_BACKEND,
+            BAD_LINE_MODES[0],
+            allow_multiline_strings=True,
+            stats=stats,
+        )
+        expected = stats.get_stage("parse")
+        self.assertGreater(expected.error_count, 5)
+        for backend in OTHER_BACKENDS:
+            stats = PipelineStats()
+            parse_path(
+                path,
+                backend,
+                BAD_LINE_MODES[0],
+                allow_multiline_strings=True,
+                stats=stats,
+            )
+            actual = stats.get_stage("parse")
+            self.assertEqual(expected.item_count, actual.item_count, backend.name)
+            self.assertEqual(expected.error_count, actual.error_count, backend.name)
+
+    # Every chunk is counted once its result is taken, with what was read for it.
+    def test_multiprocess_chunk_stages(self):
+        path = self.write_reviews(300)
+        with open(path, encoding="utf-8") as file:
+            header = file.readline()
+            data = file.read()
+
+        stats = PipelineStats()
+        parse_path(
+            path,
+            ParserBackend.MULTIPROCESS,
+            BAD_LINE_MODES[0],
+            allow_multiline_strings=True,
+            stats=stats,
+        )
+        chunks = stats.get_stage("chunks")
+        self.assertGreater(chunks.item_count, 1)
+        self.assertEqual(chunks.item_count, chunks.timed_count)
+        self.assertEqual(
+            stats.get_stage("read").byte_count,
+            os.path.getsize(path) - len(header.encode("utf-8")),
+        )
+
+        stats = PipelineStats()
+        parse_lines_multiprocess(
+            path, BAD_LINE_MODES[0], allow_multiline_strings=True, stats=stats
+        )
+        chunks = stats.get_stage("chunks")
+        self.assertGreater(chunks.item_count, 1)
+        self.assertEqual(chunks.item_count, chunks.timed_count)
+        # Lines are counted by their length in characters.
+        self.assertEqual(stats.get_stage("read").byte_count, len(data))
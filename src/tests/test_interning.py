@@ -0,0 +1,98 @@
+from csv_parsing.interning import StringPool
+from csv_parsing.value_type import ValueType
+from .parser_cases import (
+    BAD_LINE_MODES,
+    DIRTY_CSV,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    parse_path,
+)
+
+INTERN_COLUMNS = ["game", "language"]
+
+
+class InterningTest(CsvFileTestCase):
+    def test_backends_agree_on_interning(self):
+        path = self.write_reviews(500)
+        for parser_kwargs in (
+            {},
+            {"columns": ["language", "review"]},
+            # Converted, so not a string anymore by the time it could be interned.
+            {"value_types": {"voted_up": ValueType.BOOL}},
+        ):
+            for mode in BAD_LINE_MODES:
+                expected = parse_path(
+                    path,
+                    REFERENCE_BACKEND,
+                    mode,
+                    allow_multiline_strings=True,
+                    **parser_kwargs,
+                )
+                for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+                    actual = parse_path(
+                        path,
+                        backend,
+                        mode,
+                        allow_multiline_strings=True,
+                        intern_columns=[*INTERN_COLUMNS, "voted_up"],
+                        **parser_kwargs,
+                    )
+                    name = f"{parser_kwargs} {backend.name} {mode.name}"
+                    self.assert_same_result(expected, actual, name)
+
+    def test_dirty_interning(self):
+        header, body = DIRTY_CSV.split("\n", 1)
+        path = self.write_csv(header + "\n" + body * 2)
+        expected = [
+            ("Portal", 12, "great"),
+            ("Portal 2", 30, "funny, and short"),
+            ("Tetris", 1, "classic"),
+            ("Doom", 3, "again"),
+        ] * 2
+        for mode in BAD_LINE_MODES:
+            for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+                actual = parse_path(
+                    path,
+                    backend,
+                    mode,
+                    intern_columns=["game"],
+                    value_types={"hours": ValueType.INT},
+                )
+                name = f"{backend.name} {mode.name}"
+                self.assertEqual(expected, actual.rows, name)
+                # The two copies of the body are on different lines, so only interning makes them one object.
+                self.assertIs(actual.rows[0][0], actual.rows[4][0], name)
+
+    # Every copy of a value in an interned column is the same object, for the whole parse.
+    def test_values_are_shared(self):
+        path = self.write_reviews(500)
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            parser = self.create_parser(
+                path,
+                backend,
+                BAD_LINE_MODES[0],
+                allow_multiline_strings=True,
+                columns=["game", "language", "voted_up"],
+                intern_columns=INTERN_COLUMNS,
+            )
+            rows = [row.get_raw_values() for row in parser.parse()]
+            for index in (0, 1):
+                values = [row[index] for row in rows]
+                self.assertEqual(
+                    len(set(values)), len(set(map(id, values))), backend.name
+                )
+            # Not interned, so every copy is still one of its own.
+            voted_up = [row[2] for row in rows]
+            self.assertGreater(len(set(map(id, voted_up))), len(set(voted_up)))
+
+    def test_pool_size(self):
+        pool = StringPool(2)
+        first = pool.intern("".join(["a", "b"]))
+        self.assertIs(pool.intern("".join(["a", "b"])), first)
+        pool.intern("c")
+        # Full, so new values are passed through as they are.
+        value = "".join(["d", "e"])
+        self.assertIs(pool.intern(value), value)
+        self.assertIsNot(pool.intern("".join(["d", "e"])), value)
+        self.assertEqual(pool.get_size(), 2)
@@ -0,0 +1,85 @@
+import io
+import random
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.lexing.block_lexer import BlockCsvLexer
+from csv_parsing.lexing.lexer import CsvLexer
+from csv_parsing.lexing.lexer_mode import LexerMode
+from csv_parsing.lexing.token import CsvTokenType
+from .parser_cases import (
+    BAD_LINE_MODES,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    lex_all,
+    parse_path,
+    parse_path_or_error,
+)
+
+# Whatever the lexers have to tell apart, plus text of more than one char.
+PIECES = ["a", "bc", "好", ",", ",", '"', '"', "\n", "\n"]
+
+
+class LexersTest(CsvFileTestCase):
+    # Small blocks, so values, strings and lines are split over blocks all the time.
+    def test_block_lexer_agrees_with_char_lexer(self):
+        generator = random.Random(1)
+        for _ in range(500):
+            text = "".join(generator.choices(PIECES, k=generator.randrange(30)))
+            for multiline in (False, True):
+                expected = lex_all(CsvLexer(io.StringIO(text), multiline))
+                for block_size in (1, 3, 1 << 20):
+                    lexer = BlockCsvLexer(io.StringIO(text), multiline, block_size)
+                    name = f"{text!r} {multiline} {block_size}"
+                    self.assertEqual(expected, lex_all(lexer), name)
+                # Lines instead of a file, which are joined into blocks instead.
+                lines = io.StringIO(text).readlines()
+                lexer = BlockCsvLexer(lines, multiline, 4)
+                self.assertEqual(expected, lex_all(lexer), f"{text!r} lines")
+
+    def test_multiline_strings(self):
+        text = 'a,"b\nc",d\ne\n'
+        for lexer_type in (CsvLexer, BlockCsvLexer):
+            name = lexer_type.__name__
+            tokens = lex_all(lexer_type(io.StringIO(text), True))
+            # The newline stays in the value, and the line numbers go on after it.
+            self.assertEqual(tokens[2][3], "b\nc", name)
+            self.assertEqual([token[1] for token in tokens if token[3] == "e"], [3])
+            # Without multi-line strings the string ends up unterminated.
+            tokens = lex_all(lexer_type(io.StringIO(text), False))
+            self.assertIsInstance(tokens[-1], str, name)
+            tokens = lex_all(lexer_type(io.StringIO('a,"never closed'), True))
+            self.assertIsInstance(tokens[-1], str, name)
+
+    def test_skip_to_next_row(self):
+        text = 'a,"b\nc",d\ne,f\ng'
+        for block_size in (1, 1 << 20):
+            lexer = BlockCsvLexer(io.StringIO(text), True, block_size)
+            # The string is skipped as a whole, newline and all.
+            self.assertTrue(lexer.skip_to_next_row())
+            self.assertEqual(lexer.line_num, 3)
+            self.assertEqual(lexer.get_line(), "e,f")
+            self.assertTrue(lexer.skip_to_next_row())
+            self.assertEqual(lex_all(lexer)[0], (CsvTokenType.VALUE, 4, 1, "g"))
+            # The last row has no newline to skip.
+            lexer = BlockCsvLexer(io.StringIO(text), True, block_size)
+            for expected in (True, True, False, False):
+                self.assertEqual(lexer.skip_to_next_row(), expected)
+
+    def test_lexer_modes_agree_on_parsing(self):
+        path = self.write_reviews(500)
+        for mode in BAD_LINE_MODES:
+            expected = parse_path(
+                path, REFERENCE_BACKEND, mode, allow_multiline_strings=True
+            )
+            actual = parse_path(
+                path,
+                REFERENCE_BACKEND,
+                mode,
+                allow_multiline_strings=True,
+                lexer_mode=LexerMode.CHARACTER,
+            )
+            self.assert_same_result(expected, actual, mode.name)
+        expected = parse_path_or_error(path, REFERENCE_BACKEND, BadLineMode.ERROR)
+        actual = parse_path_or_error(
+            path, REFERENCE_BACKEND, BadLineMode.ERROR, lexer_mode=LexerMode.CHARACTER
+        )
+        self.assert_same_result(expected, actual, "error")
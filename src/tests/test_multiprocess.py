@@ -0,0 +1,225 @@
+from itertools import islice
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.lexing.lexer_mode import LexerMode
+from csv_parsing.parsing.chunk_transport import ChunkTransport
+from csv_parsing.parsing.multiprocess_parser import MultiProcessCsvParser
+from csv_parsing.parsing.parse_options import ParseOptions
+from .parser_cases import (
+    REFERENCE_BACKEND,
+    DIRTY_CSV,
+    CsvFileTestCase,
+    NullWriter,
+    ParserBackend,
+    get_shared_memory_names,
+    parse_lines_multiprocess,
+    parse_path,
+)
+
+
+# The values and the positions of every row.
+def get_rows(rows) -> list[tuple]:
+    return [
+        (
+            row.get_raw_values(),
+            tuple(
+                (token.line_num, token.char_index) for token in row.debug_get_tokens()
+            ),
+        )
+        for row in rows
+    ]
+
+
+class MultiProcessTest(CsvFileTestCase):
+    def parse_reference(self, path: str, **parser_kwargs) -> list[tuple]:
+        parser = self.create_parser(
+            path,
+            REFERENCE_BACKEND,
+            BadLineMode.SKIP,
+            keep_debug_tokens=True,
+            **parser_kwargs,
+        )
+        return get_rows(parser.parse())
+
+    # Parses the byte ranges one after another in this process, the same way the workers would.
+    def parse_ranges(
+        self, path: str, chunk_bytes: int = 256, **parser_kwargs
+    ) -> list[tuple]:
+        parser = MultiProcessCsvParser.from_path(
+            path,
+            BadLineMode.SKIP,
+            NullWriter(),
+            chunk_bytes=chunk_bytes,
+            options=ParseOptions(keep_debug_tokens=True),
+            **parser_kwargs,
+        )
+        parser._parse_header()
+        rows = []
+        ranges = list(parser._split_chunks())
+        self.assertGreater(len(ranges), 3)
+        for byte_range in ranges:
+            chunk, _ = MultiProcessCsvParser._parse_chunk(
+                parser._header, parser._get_parser_kwargs(), byte_range
+            )
+            rows.extend(get_rows(chunk.stream_rows(parser._header)))
+        return rows
+
+    def test_ranges_agree_with_reference(self):
+        path = self.write_reviews(300)
+        expected = self.parse_reference(path, allow_multiline_strings=True)
+        # None parses the chunks with FusedCsvParsers.
+        for lexer_mode in (None, *LexerMode):
+            actual = self.parse_ranges(
+                path, allow_multiline_strings=True, lexer_mode=lexer_mode
+            )
+            self.assertEqual(expected, actual, str(lexer_mode))
+
+    def test_ranges_end_on_row_boundaries(self):
+        path = self.write_csv(
+            "game,review\n" + 'Portal,"line\nanother line"\nDoom,fast\n' * 40
+        )
+        parser = MultiProcessCsvParser.from_path(
+            path,
+            BadLineMode.SKIP,
+            NullWriter(),
+            allow_multiline_strings=True,
+            chunk_bytes=20,
+        )
+        parser._parse_header()
+        ranges = list(parser._split_chunks())
+        self.assertEqual(ranges[0].start, len("game,review\n"))
+        for previous, byte_range in zip(ranges, ranges[1:]):
+            self.assertEqual(previous.end, byte_range.start)
+            # Never in the middle of the multi-line string.
+            self.assertTrue(byte_range.read().getvalue().startswith(("Portal", "Doom")))
+        self.assertEqual(
+            [byte_range.first_line_num for byte_range in ranges[:3]], [2, 4, 7]
+        )
+
+    # The line numbers go on from range to range, across multi-line strings and bad rows.
+    def test_ranges_keep_line_numbers(self):
+        path = self.write_csv(
+            "game,review\n" + 'Portal,"line\nanother line"\nDoom,,fast\nQuake,ok\n' * 3
+        )
+        expected = []
+        for line_num in (2, 6, 10):
+            positions = ((line_num, 1), (line_num + 1, 8))
+            expected.append((("Portal", "line\nanother line"), positions))
+            positions = ((line_num + 3, 1), (line_num + 3, 7))
+            expected.append((("Quake", "ok"), positions))
+        reference = self.parse_reference(path, allow_multiline_strings=True)
+        self.assertEqual(reference, expected)
+        for lexer_mode in (None, *LexerMode):
+            actual = self.parse_ranges(
+                path,
+                chunk_bytes=20,
+                allow_multiline_strings=True,
+                lexer_mode=lexer_mode,
+            )
+            self.assertEqual(expected, actual, str(lexer_mode))
+
+    # Like in a file opened in text mode, '\r\n' and a lone '\r' end a line too, in the values and the line numbers.
+    def test_line_endings(self):
+        with open(self.write_reviews(300), "rb") as file:
+            lines = file.read().split(b"\n")
+        endings = [b"\r\n", b"\n", b"\r\n", b"\r"]
+        data = b"".join(
+            line + endings[i % len(endings)] for i, line in enumerate(lines[:-1])
+        )
+        path = self.write_csv("", "line_endings.csv")
+        with open(path, "wb") as file:
+            file.write(data + lines[-1])
+
+        expected = self.parse_reference(path, allow_multiline_strings=True)
+        self.assertFalse(any("\r" in "".join(values) for values, _ in expected))
+        actual = self.parse_ranges(path, allow_multiline_strings=True)
+        self.assertEqual(expected, actual)
+
+    # The chunk parsers don't parse a header, so the first token of a chunk has nothing before it.
+    def test_range_starting_with_empty_value(self):
+        path = self.write_csv("a,b\n" + ",1\n2,\n3,4\n" * 20)
+        expected = self.parse_reference(path)
+        self.assertEqual([values for values, _ in expected], [("3", "4")] * 20)
+        self.assertEqual(expected, self.parse_ranges(path, chunk_bytes=8))
+
+    def test_chunks_agree_with_reference(self):
+        path = self.write_reviews(300)
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.COLLECT, allow_multiline_strings=True
+        )
+        for transport in ChunkTransport:
+            for lexer_mode in (None, *LexerMode):
+                actual = parse_path(
+                    path,
+                    ParserBackend.MULTIPROCESS,
+                    BadLineMode.COLLECT,
+                    allow_multiline_strings=True,
+                    transport=transport,
+                    lexer_mode=lexer_mode,
+                )
+                name = f"{transport.name} {lexer_mode}"
+                self.assert_same_result(expected, actual, name)
+
+    # Lines can only be split into chunks when there are no multi-line strings.
+    def test_lines_agree_with_reference(self):
+        header, body = DIRTY_CSV.split("\n", 1)
+        path = self.write_csv(header + "\n" + body * 10)
+        expected = parse_path(path, REFERENCE_BACKEND, BadLineMode.COLLECT)
+        rows = [
+            ("Portal", "12", "great"),
+            ("Portal 2", "30", "funny, and short"),
+            ("Tetris", "1", "classic"),
+            ("Doom", "3", "again"),
+        ]
+        self.assertEqual(expected.rows, rows * 10)
+        # Every copy of the body is 9 lines further down.
+        bad_line_nums = [
+            line_num + 9 * i for i in range(10) for line_num in (4, 5, 6, 7, 9)
+        ]
+        self.assertEqual(expected.get_bad_line_nums(), bad_line_nums)
+        for backend in (ParserBackend.MULTIPROCESS, None):
+            if backend is None:
+                actual = parse_lines_multiprocess(path, BadLineMode.COLLECT)
+            else:
+                actual = parse_path(path, backend, BadLineMode.COLLECT)
+            self.assertEqual(actual.get_bad_line_nums(), bad_line_nums, str(backend))
+            self.assert_same_result(expected, actual, str(backend))
+
+    # However few chunks are in flight, the rows still come out in the order of the input.
+    def test_chunks_in_flight_agree_with_reference(self):
+        path = self.write_reviews(300)
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.COLLECT, allow_multiline_strings=True
+        )
+        for transport in ChunkTransport:
+            for max_chunks_in_flight in (1, 2, 5):
+                actual = parse_path(
+                    path,
+                    ParserBackend.MULTIPROCESS,
+                    BadLineMode.COLLECT,
+                    allow_multiline_strings=True,
+                    transport=transport,
+                    max_chunks_in_flight=max_chunks_in_flight,
+                )
+                name = f"{transport.name} {max_chunks_in_flight}"
+                self.assert_same_result(expected, actual, name)
+
+    # The chunks nobody is going to read are dropped (and their shared memory freed) when the consumer stops early.
+    def test_stop_early(self):
+        path = self.write_reviews(300)
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.SKIP, allow_multiline_strings=True
+        )
+        shared_memory = get_shared_memory_names()
+        for transport in ChunkTransport:
+            parser = self.create_parser(
+                path,
+                ParserBackend.MULTIPROCESS,
+                BadLineMode.SKIP,
+                allow_multiline_strings=True,
+                transport=transport,
+            )
+            rows = parser.parse()
+            first_rows = [tuple(row.get_raw_values()) for row in islice(rows, 5)]
+            self.assertEqual(expected.rows[:5], first_rows, transport.name)
+            rows.close()
+            self.assertEqual(shared_memory, get_shared_memory_names(), transport.name)
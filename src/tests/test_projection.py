@@ -0,0 +1,149 @@
+import io
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.lexing.block_lexer import BlockCsvLexer
+from csv_parsing.lexing.lexer import CsvLexer
+from csv_parsing.lexing.lexer_mode import LexerMode
+from csv_parsing.lexing.token import CsvTokenType
+from csv_parsing.row_filter import CsvFilter
+from .parser_cases import (
+    BAD_LINE_MODES,
+    DIRTY_CSV,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    lex_all,
+    parse_path,
+)
+
+COLUMNS = ["language", "game"]
+# On a column that isn't selected, so its values are still needed.
+FILTERS = [CsvFilter.from_string("voted_up==True")]
+
+
+class ProjectionTest(CsvFileTestCase):
+    def test_backends_agree_on_projection(self):
+        path = self.write_reviews(500)
+        for parser_kwargs in (
+            {"columns": COLUMNS},
+            {"columns": COLUMNS, "filters": FILTERS},
+        ):
+            for mode in BAD_LINE_MODES:
+                expected = parse_path(
+                    path,
+                    REFERENCE_BACKEND,
+                    mode,
+                    allow_multiline_strings=True,
+                    **parser_kwargs,
+                )
+                self.assertEqual(len(expected.rows[0]), 2)
+                for backend in OTHER_BACKENDS:
+                    actual = parse_path(
+                        path,
+                        backend,
+                        mode,
+                        allow_multiline_strings=True,
+                        **parser_kwargs,
+                    )
+                    name = f"{backend.name} {mode.name}"
+                    self.assert_same_result(expected, actual, name)
+                actual = parse_path(
+                    path,
+                    REFERENCE_BACKEND,
+                    mode,
+                    allow_multiline_strings=True,
+                    lexer_mode=LexerMode.CHARACTER,
+                    **parser_kwargs,
+                )
+                self.assert_same_result(expected, actual, f"character lexer {mode.name}")
+
+    def test_dirty_projection(self):
+        path = self.write_csv(DIRTY_CSV)
+        for mode in BAD_LINE_MODES:
+            for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+                actual = parse_path(path, backend, mode, columns=["review", "game"])
+                # In the order of the file, the bad rows are still dropped.
+                expected = [
+                    ("Portal", "great"),
+                    ("Portal 2", "funny, and short"),
+                    ("Tetris", "classic"),
+                    ("Doom", "again"),
+                ]
+                self.assertEqual(expected, actual.rows, f"{backend.name} {mode.name}")
+                self.assertTrue(actual.had_errors)
+
+    # The rows the filters reject never get to be bad, the others still do.
+    def test_dirty_projection_with_filters(self):
+        header, body = DIRTY_CSV.split("\n", 1)
+        path = self.write_csv(header + "\n" + body * 2)
+        for mode in BAD_LINE_MODES:
+            for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+                actual = parse_path(
+                    path,
+                    backend,
+                    mode,
+                    columns=["game", "hours"],
+                    filters=[CsvFilter.from_string("game!=Portal")],
+                )
+                name = f"{backend.name} {mode.name}"
+                expected = [("Portal 2", "30"), ("Tetris", "1"), ("Doom", "3")] * 2
+                self.assertEqual(expected, actual.rows, name)
+                if mode == BadLineMode.COLLECT:
+                    self.assertEqual(
+                        actual.get_bad_line_nums(),
+                        [4, 5, 6, 7, 9, 13, 14, 15, 16, 18],
+                        name,
+                    )
+
+    # The rows get a header of their own, with only the projected columns.
+    def test_projected_header(self):
+        path = self.write_csv(DIRTY_CSV)
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            parser = self.create_parser(
+                path, backend, BAD_LINE_MODES[0], columns=["review", "game"]
+            )
+            row = next(iter(parser.parse()))
+            self.assertEqual(
+                {"game": "Portal", "review": "great"},
+                dict(row.as_mapping()),
+                backend.name,
+            )
+            self.assertEqual("great", row.get_value("review").get_value())
+
+    # The values that aren't kept are still lexed, so everything but their value is the same.
+    def test_lexers_skip_values(self):
+        inputs = [
+            'a,b,c\n1,"x, y",3\n"4"5,6,"7\n8"\n',
+            'a,b\n1,"never closed\n2,3\n',
+            'a,b\n1,2\n3,"never closed',
+            'a,b\n1,2,3,4\n5,"a""b"c\n',
+        ]
+        keep_columns = [True, False]
+        for text in inputs:
+            for multiline in (False, True):
+                expected = lex_all(CsvLexer(io.StringIO(text), multiline))
+                # Where the value would have been built, it is empty instead.
+                skipped = [
+                    (
+                        token[:3] + ("",)
+                        if isinstance(token, tuple)
+                        and token[3] is not None
+                        and not get_keep(expected, i, keep_columns)
+                        else token
+                    )
+                    for i, token in enumerate(expected)
+                ]
+                for lexer_type in (CsvLexer, BlockCsvLexer):
+                    name = f"{lexer_type.__name__} {text!r} {multiline}"
+                    lexer = lexer_type(io.StringIO(text), multiline)
+                    self.assertEqual(skipped, lex_all(lexer, keep_columns), name)
+
+
+# Whether the value at 'position' in the tokens is in a kept column, by counting the commas since the last newline.
+def get_keep(tokens: list, position: int, keep_columns: list[bool]) -> bool:
+    column = 0
+    for token in tokens[:position]:
+        if token[0] == CsvTokenType.COMMA:
+            column += 1
+        elif token[0] == CsvTokenType.NEWLINE:
+            column = 0
+    return column < len(keep_columns) and keep_columns[column]
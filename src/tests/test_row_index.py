@@ -0,0 +1,154 @@
+import os
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.error import CsvError
+from csv_parsing.parsing.multiprocess_parser import MultiProcessCsvParser
+from csv_parsing.parsing.parse_options import ParseOptions
+from csv_parsing.parsing.parser import CsvParser
+from csv_parsing.parsing.row_index import RowIndex
+from .parser_cases import (
+    MULTIPROCESS_KWARGS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    NullWriter,
+    ParseResult,
+    ParserBackend,
+    parse_path,
+)
+
+# Small strides, so most rows are found by skipping lines from a stored row.
+STRIDES = [1, 7, 1024]
+ROW_RANGES = [(0, None), (0, 1), (5, 40), (13, 14), (150, None), (190, 500)]
+
+
+# The line every row starts on, next to its values.
+def get_numbered_rows(parser) -> list[tuple[int, tuple[str, ...]]]:
+    return [
+        (row.debug_get_tokens()[0].line_num, tuple(row.get_raw_values()))
+        for row in parser.parse()
+    ]
+
+
+class RowIndexTest(CsvFileTestCase):
+    def test_row_ranges_agree_with_reference(self):
+        path = self.write_reviews(200, bad_line_rate=0)
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.SKIP, allow_multiline_strings=True
+        )
+        for stride in STRIDES:
+            index = RowIndex.build(path, True, stride)
+            self.assertEqual(index.get_row_count(), 200)
+            for start_row, end_row in ROW_RANGES:
+                parser = CsvParser.from_index(
+                    index, BadLineMode.SKIP, NullWriter(), start_row, end_row
+                )
+                name = f"{stride} {start_row} {end_row}"
+                rows = ParseResult(parser).rows
+                self.assertEqual(expected.rows[start_row:end_row], rows, name)
+
+    def test_seek_row(self):
+        path = self.write_reviews(200, bad_line_rate=0)
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.SKIP, allow_multiline_strings=True
+        )
+        parser = CsvParser.from_index(
+            RowIndex.build(path, True, 7), BadLineMode.SKIP, NullWriter(), 0, 50
+        )
+        for row in (30, 0, 49, 50, 10):
+            parser.seek_row(row)
+            self.assertEqual(expected.rows[row:50], ParseResult(parser).rows, row)
+
+    # The bad rows are counted as rows too, and the rows keep the line numbers of the whole file.
+    def assert_rows_agree(self, path: str):
+        expected = get_numbered_rows(
+            self.create_parser(
+                path,
+                REFERENCE_BACKEND,
+                BadLineMode.SKIP,
+                allow_multiline_strings=True,
+                keep_debug_tokens=True,
+            )
+        )
+        for stride in STRIDES:
+            index = RowIndex.build(path, True, stride)
+            self.assertGreater(index.get_row_count(), len(expected) + 5)
+            for start_row, end_row in ROW_RANGES:
+                parser = CsvParser.from_index(
+                    index,
+                    BadLineMode.SKIP,
+                    NullWriter(),
+                    start_row,
+                    end_row,
+                    options=ParseOptions(keep_debug_tokens=True),
+                )
+                first_line_num = index.find_row(start_row)[1]
+                end_line_num = (
+                    index.find_row(end_row)[1] if end_row is not None else None
+                )
+                rows = [
+                    row
+                    for row in expected
+                    if row[0] >= first_line_num
+                    and (end_line_num is None or row[0] < end_line_num)
+                ]
+                name = f"{stride} {start_row} {end_row}"
+                self.assertEqual(rows, get_numbered_rows(parser), name)
+
+    def test_bad_rows_agree_with_reference(self):
+        self.assert_rows_agree(self.write_reviews(300))
+
+    # Like in a file opened in text mode, a lone '\r' ends a row (or a line in a string) too.
+    def test_line_endings(self):
+        with open(self.write_reviews(300), "rb") as file:
+            lines = file.read().split(b"\n")
+        endings = [b"\r\n", b"\n", b"\r\n", b"\r"]
+        path = self.write_csv("", "line_endings.csv")
+        with open(path, "wb") as file:
+            for i, line in enumerate(lines[:-1]):
+                file.write(line + endings[i % len(endings)])
+            file.write(lines[-1])
+        self.assert_rows_agree(path)
+
+    def test_multiprocess_index_agrees_with_reference(self):
+        path = self.write_reviews(300)
+        index = RowIndex.build(path, True, 7)
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.SKIP, allow_multiline_strings=True
+        )
+        actual = parse_path(
+            path,
+            ParserBackend.MULTIPROCESS,
+            BadLineMode.SKIP,
+            allow_multiline_strings=True,
+            index=index,
+        )
+        self.assertEqual(expected.rows, actual.rows)
+
+        # Without the quotes the index can't tell which newlines end a row.
+        with self.assertRaises(CsvError):
+            MultiProcessCsvParser.from_path(
+                path,
+                BadLineMode.SKIP,
+                NullWriter(),
+                True,
+                index=RowIndex.build(path, False),
+                chunk_bytes=MULTIPROCESS_KWARGS["chunk_bytes"],
+            )
+
+    def test_index_is_invalidated(self):
+        path = self.write_reviews(100, bad_line_rate=0)
+        self.assertIsNone(RowIndex.load(path, True))
+        index = RowIndex.open(path, True)
+        self.assertEqual(index.get_row_count(), 100)
+        self.assertIsNotNone(RowIndex.load(path, True))
+        # Built with other settings.
+        self.assertIsNone(RowIndex.load(path, False))
+        self.assertIsNone(RowIndex.load(path, True, stride=7))
+
+        with open(path, "a", encoding="utf-8") as file:
+            file.write("Portal,1,one more,english,True\n")
+        self.assertIsNone(RowIndex.load(path, True))
+        self.assertEqual(RowIndex.open(path, True).get_row_count(), 101)
+
+        with open(RowIndex.get_index_path(path), "r+b") as file:
+            file.truncate(os.path.getsize(file.name) - 1)
+        self.assertIsNone(RowIndex.load(path, True))
@@ -0,0 +1,122 @@
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.utils import row_to_dict, row_to_view
+from .parser_cases import (
+    DIRTY_CSV,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    ParserBackend,
+)
+
+# The backends that can keep the tokens of the values, see CsvRow.debug_get_tokens.
+TOKEN_BACKENDS = [ParserBackend.FUSED, ParserBackend.MULTIPROCESS]
+
+
+# The values of every row, as the CsvValues of the row would have them.
+def get_values(parser) -> list[list[tuple[str, str]]]:
+    return [
+        [(value.get_column_type(), value.get_value()) for value in row.get_all_values()]
+        for row in parser.parse()
+    ]
+
+
+def get_tokens(parser) -> list[list[tuple[int, int, str]]]:
+    return [
+        [
+            (token.line_num, token.char_index, token.value)
+            for token in row.debug_get_tokens()
+        ]
+        for row in parser.parse()
+    ]
+
+
+class RowsTest(CsvFileTestCase):
+    def test_backends_agree_on_values(self):
+        path = self.write_reviews(300)
+        expected = get_values(
+            self.create_parser(
+                path,
+                REFERENCE_BACKEND,
+                BadLineMode.SKIP,
+                allow_multiline_strings=True,
+            )
+        )
+        for backend in OTHER_BACKENDS:
+            parser = self.create_parser(
+                path, backend, BadLineMode.SKIP, allow_multiline_strings=True
+            )
+            self.assertEqual(expected, get_values(parser), backend.name)
+
+    def test_values(self):
+        path = self.write_csv(DIRTY_CSV)
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            rows = list(self.create_parser(path, backend, BadLineMode.SKIP).parse())
+            self.assertEqual(
+                rows[1].get_raw_values(), ("Portal 2", "30", "funny, and short")
+            )
+            value = rows[1].get_value("review")
+            self.assertEqual(value.get_column_type(), "review", backend.name)
+            self.assertEqual(value.get_value(), "funny, and short", backend.name)
+            self.assertIsNone(rows[1].get_value("missing"), backend.name)
+            # Only kept when asked for.
+            self.assertIsNone(rows[1].debug_get_tokens(), backend.name)
+            self.assertIsNone(value.debug_get_token(), backend.name)
+
+    # Every row of a parse shares the header, instead of having a copy of its own.
+    def test_rows_share_header(self):
+        path = self.write_reviews(100)
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            parser = self.create_parser(
+                path, backend, BadLineMode.SKIP, allow_multiline_strings=True
+            )
+            headers = {id(row.get_header()) for row in parser.parse()}
+            self.assertEqual(len(headers), 1, backend.name)
+
+    def test_backends_agree_on_debug_tokens(self):
+        path = self.write_csv(DIRTY_CSV)
+        expected = get_tokens(
+            self.create_parser(
+                path, REFERENCE_BACKEND, BadLineMode.SKIP, keep_debug_tokens=True
+            )
+        )
+        # The second value of the second row, at the position it has in the file.
+        self.assertEqual(expected[1][1], (3, 10, "30"))
+        for backend in TOKEN_BACKENDS:
+            parser = self.create_parser(
+                path, backend, BadLineMode.SKIP, keep_debug_tokens=True
+            )
+            self.assertEqual(expected, get_tokens(parser), backend.name)
+
+    # The views read the same as the copied dicts.
+    def test_backends_agree_on_views(self):
+        path = self.write_reviews(300)
+        expected = [
+            row_to_dict(row)
+            for row in self.create_parser(
+                path,
+                REFERENCE_BACKEND,
+                BadLineMode.SKIP,
+                allow_multiline_strings=True,
+            ).parse()
+        ]
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            parser = self.create_parser(
+                path, backend, BadLineMode.SKIP, allow_multiline_strings=True
+            )
+            views = [row_to_view(row) for row in parser.parse()]
+            self.assertEqual(expected, [dict(view) for view in views], backend.name)
+            for view, row in zip(views, expected):
+                self.assertEqual(list(view), list(row))
+                self.assertEqual(view["game"], row["game"])
+                self.assertNotIn("not a column", view)
+
+    def test_view_of_short_row(self):
+        path = self.write_csv("game,hours,review\nPortal,12")
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            parser = self.create_parser(path, backend, BadLineMode.SKIP)
+            view = row_to_view(next(iter(parser.parse())))
+            expected = {"game": "Portal", "hours": "12"}
+            self.assertEqual(expected, dict(view), backend.name)
+            self.assertEqual(len(view), 2)
+            with self.assertRaises(KeyError):
+                view["review"]
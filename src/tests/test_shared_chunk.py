@@ -0,0 +1,42 @@
+import pickle
+import unittest
+from csv_parsing.parsing.csv_header import CsvHeader
+from csv_parsing.parsing.shared_chunk import SharedRowChunk, write_shared_chunk
+from .parser_cases import get_shared_memory_names
+
+ROWS = [
+    ("Portal", "12", "great"),
+    ("", "", ""),
+    ("游戏 0", "3", "好玩\nwith a newline"),
+    ("short",),
+    (),
+]
+
+
+class SharedChunkTest(unittest.TestCase):
+    def test_round_trip(self):
+        header = CsvHeader(["game", "hours", "review"])
+        chunk = SharedRowChunk(write_shared_chunk(ROWS))
+        self.assertEqual(chunk.get_row_count(), len(ROWS))
+        rows = list(chunk.stream_rows(header))
+        self.assertEqual(ROWS, [tuple(row.get_raw_values()) for row in rows])
+        self.assertEqual(rows[2].get_raw_values()[-1], ROWS[2][-1])
+        self.assertEqual(rows[2].get_raw_values()[1:], ROWS[2][1:])
+        self.assertEqual(rows[0].get_value("review").get_value(), "great")
+        # Pickled as the values themselves, the shared memory is only there in this process.
+        values = pickle.loads(pickle.dumps(rows[0].get_raw_values()))
+        self.assertEqual(values, ROWS[0])
+
+    # Attaching unlinks the shared memory, closing unmaps it, after which the rows can't be read anymore.
+    def test_close(self):
+        handle = write_shared_chunk(ROWS)
+        chunk = SharedRowChunk(handle)
+        self.assertNotIn(handle.name.lstrip("/"), get_shared_memory_names())
+        (row, *_) = chunk.stream_rows(CsvHeader(["game", "hours", "review"]))
+        chunk.close()
+        chunk.close()
+        with self.assertRaises(ValueError):
+            row.get_raw_values()[0]
+
+    def test_no_rows(self):
+        self.assertIsNone(write_shared_chunk([]))
@@ -0,0 +1,132 @@
+import gzip
+import io
+import os
+import random
+from unittest import mock
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.error import CsvError
+from csv_parsing.parsing.parse_options import ParseOptions
+from csv_parsing.parsing.parser import CsvParser
+from csv_parsing.parsing.parser_backend import ParserBackend, choose_backend
+from csv_parsing.parsing.stdlib_parser import StdlibCsvParser
+from csv_parsing.row_filter import CsvFilter
+from .parser_cases import (
+    BAD_LINE_MODES,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    NullWriter,
+    ParseResult,
+    generate_csv,
+    parse_path,
+)
+
+# Where the csv module differs from our format: carriage returns and quotes.
+EXTRAS = ["\r", '""', '"', "a\"b"]
+
+
+def parse_text_or_error(
+    create_parser, text: str, bad_line_mode: BadLineMode, **parser_kwargs
+) -> ParseResult | str:
+    try:
+        return ParseResult(
+            create_parser(
+                io.StringIO(text), bad_line_mode, NullWriter(), **parser_kwargs
+            )
+        )
+    except CsvError as error:
+        return type(error).__name__
+
+
+class StdlibParserTest(CsvFileTestCase):
+    def test_agrees_with_reference_on_random_input(self):
+        generator = random.Random(3)
+        for _ in range(300):
+            text = generate_csv(generator, generator.randrange(8))
+            for _ in range(generator.randrange(3)):
+                position = generator.randrange(len(text) + 1)
+                text = text[:position] + generator.choice(EXTRAS) + text[position:]
+            for multiline in (False, True):
+                for mode in (BadLineMode.ERROR, *BAD_LINE_MODES):
+                    expected = parse_text_or_error(
+                        CsvParser, text, mode, allow_multiline_strings=multiline
+                    )
+                    # Small blocks, so rows and strings are split over blocks.
+                    for block_size in (8, 1 << 20):
+                        actual = parse_text_or_error(
+                            StdlibCsvParser,
+                            text,
+                            mode,
+                            allow_multiline_strings=multiline,
+                            block_size=block_size,
+                        )
+                        name = f"{text!r} {multiline} {mode.name} {block_size}"
+                        self.assert_same_result(expected, actual, name)
+
+    def test_agrees_with_reference_on_columns_and_filters(self):
+        generator = random.Random(4)
+        options = ParseOptions(
+            columns=["c2", "c0"], filters=[CsvFilter.from_string("c1!=a")]
+        )
+        for _ in range(100):
+            text = generate_csv(generator, 6)
+            for mode in BAD_LINE_MODES:
+                expected = parse_text_or_error(CsvParser, text, mode, options=options)
+                actual = parse_text_or_error(
+                    StdlibCsvParser, text, mode, block_size=8, options=options
+                )
+                self.assert_same_result(expected, actual, f"{text!r} {mode.name}")
+
+    # Where the csv module would do something else: the carriage return stays in the value, and the line numbers go on
+    # after a multi-line string.
+    def test_edge_cases(self):
+        text = 'a,b\r\n"x, y",2\r\n"1\n2",3\n4,,5\n7,8\n'
+        for create_parser, parser_kwargs in (
+            (CsvParser, {}),
+            (StdlibCsvParser, {}),
+            (StdlibCsvParser, {"block_size": 8}),
+        ):
+            name = f"{create_parser.__name__} {parser_kwargs}"
+            result = parse_text_or_error(
+                create_parser,
+                text,
+                BadLineMode.COLLECT,
+                allow_multiline_strings=True,
+                **parser_kwargs,
+            )
+            self.assertEqual(
+                result.rows, [("x, y", "2\r"), ("1\n2", "3"), ("7", "8")], name
+            )
+            self.assertEqual(result.bad_lines, [(5, 3, "Empty value!", "4,,5")], name)
+            result = parse_text_or_error(
+                create_parser, text, BadLineMode.COLLECT, **parser_kwargs
+            )
+            self.assertEqual(result, "CsvLexerError", name)
+
+    def test_choose_backend(self):
+        unquoted = self.write_csv("game,hours\nPortal,12\n", "unquoted.csv")
+        quoted = self.write_csv('game,hours\n"Portal",12\n', "quoted.csv")
+        compressed = self.write_csv("", "quoted.csv.gz")
+        with gzip.open(compressed, "wt", encoding="utf-8") as file:
+            file.write('game,hours\n"Portal",12\n')
+        self.assertEqual(choose_backend(unquoted), ParserBackend.FUSED)
+        self.assertEqual(choose_backend(quoted), ParserBackend.STDLIB)
+        self.assertEqual(choose_backend(compressed), ParserBackend.STDLIB)
+        # Only the reference parser keeps the tokens.
+        self.assertEqual(
+            choose_backend(quoted, keep_debug_tokens=True), ParserBackend.PYTHON
+        )
+
+        # The worker processes never catch up with a single process, however many there are.
+        with mock.patch.object(os, "cpu_count", return_value=64):
+            self.assertEqual(choose_backend(unquoted), ParserBackend.FUSED)
+
+    def test_auto_agrees_with_reference(self):
+        path = self.write_reviews(300)
+        for mode in BAD_LINE_MODES:
+            expected = parse_path(
+                path, REFERENCE_BACKEND, mode, allow_multiline_strings=True
+            )
+            actual = parse_path(
+                path, ParserBackend.AUTO, mode, allow_multiline_strings=True
+            )
+            self.assert_same_result(expected, actual, mode.name)
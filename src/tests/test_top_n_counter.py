@@ -0,0 +1,59 @@
+import random
+import unittest
+import matplotlib
+
+matplotlib.use("Agg")
+
+from matplotlib import pyplot
+from plots.animated import BatchMode, TopNBarPlot
+from plots.animated.top_n_counter import TopNCounter
+
+
+# The top the way it was found before, by sorting every key. The sort is stable, so ties go to the key added first.
+def get_sorted_top(totals: dict, size: int) -> list[tuple]:
+    return sorted(totals.items(), key=lambda item: -item[1])[:size]
+
+
+class TopNCounterTest(unittest.TestCase):
+    def test_agrees_with_sorting(self):
+        generator = random.Random(2)
+        for _ in range(200):
+            size = generator.randrange(1, 6)
+            key_count = generator.randrange(1, 15)
+            # Mostly growing sums like the plot has, but also ties and sums that go down.
+            values = generator.choice([[0, 1, 2, 5], [1, 1, 1], [-3, 0, 1, 4]])
+            counter = TopNCounter(size)
+            totals = {}
+            for _ in range(generator.randrange(60)):
+                key = f"game {generator.randrange(key_count)}"
+                value = generator.choice(values)
+                totals[key] = totals.get(key, 0) + value
+                self.assertEqual(counter.add(key, value), totals[key])
+                # Asked for now and then, so the top has to stay right between those.
+                if generator.random() < 0.3:
+                    self.assertEqual(get_sorted_top(totals, size), counter.get_top())
+            self.assertEqual(get_sorted_top(totals, size), counter.get_top())
+            self.assertEqual(len(counter), len(totals))
+            for key, total in totals.items():
+                self.assertEqual(counter.get(key), total)
+            self.assertEqual(counter.get("missing"), 0)
+
+    def test_bar_plot_top(self):
+        self.addCleanup(pyplot.close, "all")
+        generator = random.Random(3)
+        reviews = [
+            {"game": f"Game {generator.randrange(30)}", "hours": generator.random()}
+            for _ in range(500)
+        ]
+        plot = TopNBarPlot(
+            reviews, lambda item: item["game"], lambda item: item["hours"], top_n=5
+        ).set_xticks_title("Hours")
+        # Every review is folded in, but only a few frames are drawn.
+        plot.set_batching(BatchMode.COUNT, 50)
+        self.assertEqual(plot.run_frames(), len(reviews))
+
+        totals = {}
+        for review in reviews:
+            totals[review["game"]] = totals.get(review["game"], 0) + review["hours"]
+        self.assertEqual(get_sorted_top(totals, 5), plot._get_top_items())
+        plot.close()
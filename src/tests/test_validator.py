@@ -0,0 +1,194 @@
+import re
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.bad_lines import BadLineCollector
+from csv_parsing.instrumentation import PipelineStats
+from csv_parsing.validator import CsvTypeValidator, FastCsvTypeValidator
+from .parser_cases import (
+    BAD_LINE_MODES,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    NullWriter,
+    ParserBackend,
+    parse_path,
+)
+
+PATTERNS = {
+    "game": re.compile(r"Game \d+"),
+    "author_playtime_forever": re.compile(r"\d+"),
+    "review": re.compile(r".+", re.DOTALL),
+    "language": re.compile(r"[a-z]+"),
+    "voted_up": re.compile(r"True|False"),
+}
+CACHED_COLUMNS = ["game", "language", "voted_up"]
+# Without a pattern for 'review' every row is an error.
+MISSING_PATTERNS = {
+    name: pattern for name, pattern in PATTERNS.items() if name != "review"
+}
+
+
+# Keeps the warnings, to compare them.
+class ListWriter:
+    def __init__(self) -> None:
+        self.lines = []
+
+    def write(self, text: str) -> int:
+        self.lines.append(text)
+        return len(text)
+
+
+def create_validators(
+    patterns: dict, mode: BadLineMode, writer, bad_lines=None
+) -> dict:
+    return {
+        "slow": CsvTypeValidator(patterns, mode, writer, bad_lines=bad_lines),
+        "fast": FastCsvTypeValidator(
+            patterns, mode, writer, CACHED_COLUMNS, bad_lines=bad_lines
+        ),
+        # Forgets most verdicts again right away.
+        "small cache": FastCsvTypeValidator(
+            patterns, mode, writer, CACHED_COLUMNS, cache_size=2, bad_lines=bad_lines
+        ),
+    }
+
+
+class ValidatorTest(CsvFileTestCase):
+    # The validator collects into the collector of the parser, so the bad lines of both are compared at once.
+    def parse_validated(self, path, backend, mode, validator_name, patterns):
+        bad_lines = BadLineCollector() if mode == BadLineMode.COLLECT else None
+        validator = create_validators(patterns, mode, None, bad_lines)[validator_name]
+        result = parse_path(
+            path,
+            backend,
+            mode,
+            allow_multiline_strings=True,
+            validator=validator,
+            bad_lines=bad_lines,
+        )
+        return result, validator.had_errors()
+
+    def test_backends_agree_on_validation(self):
+        path = self.write_reviews(500, bad_line_rate=0.1)
+        for patterns in (PATTERNS, MISSING_PATTERNS):
+            for mode in BAD_LINE_MODES:
+                expected, expected_errors = self.parse_validated(
+                    path, REFERENCE_BACKEND, mode, "slow", patterns
+                )
+                self.assertTrue(expected_errors)
+                for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+                    for validator_name in ("slow", "fast", "small cache"):
+                        actual, actual_errors = self.parse_validated(
+                            path, backend, mode, validator_name, patterns
+                        )
+                        name = f"{len(patterns)} {backend.name} {mode.name}"
+                        name += f" {validator_name}"
+                        self.assert_same_result(expected, actual, name)
+                        self.assertEqual(expected_errors, actual_errors, name)
+
+    # The errors of the validators in the worker processes are counted as validation errors, not as parse errors.
+    def test_multiprocess_stats(self):
+        path = self.write_reviews(300, bad_line_rate=0.1)
+        for mode in BAD_LINE_MODES:
+            error_counts = []
+            for backend in (REFERENCE_BACKEND, ParserBackend.MULTIPROCESS):
+                stats = PipelineStats()
+                bad_lines = BadLineCollector() if mode == BadLineMode.COLLECT else None
+                validator = FastCsvTypeValidator(
+                    PATTERNS, mode, None, stats=stats, bad_lines=bad_lines
+                )
+                parse_path(
+                    path,
+                    backend,
+                    mode,
+                    allow_multiline_strings=True,
+                    validator=validator,
+                    stats=stats,
+                    bad_lines=bad_lines,
+                )
+                error_counts.append(
+                    (
+                        stats.get_stage("validate").error_count,
+                        validator.error_count,
+                    )
+                )
+                if mode == BadLineMode.COLLECT:
+                    error_counts[-1] += (stats.get_stage("parse").error_count,)
+            self.assertGreater(error_counts[0][0], 0)
+            self.assertEqual(error_counts[0], error_counts[1], mode.name)
+
+    def test_validation(self):
+        path = self.write_csv(
+            "game,author_playtime_forever,review,language,voted_up\n"
+            "Game 1,12,great,english,True\n"
+            "Game 2,n/a,boring,english,False\n"
+            "Portal,3,fun,german,True\n"
+            "Game 3,4,ok,german,maybe\n"
+            "Game 1,5,again,english,True\n"
+        )
+        for backend in [REFERENCE_BACKEND, *OTHER_BACKENDS]:
+            for validator_name, validator in create_validators(
+                PATTERNS, BadLineMode.WARNING, NullWriter()
+            ).items():
+                result = parse_path(
+                    path, backend, BadLineMode.WARNING, validator=validator
+                )
+                name = f"{backend.name} {validator_name}"
+                self.assertEqual(
+                    [row[0] for row in result.rows], ["Game 1", "Game 1"], name
+                )
+                self.assertTrue(validator.had_errors(), name)
+
+    # Validating a batch keeps the same rows and reports the same errors as validating its rows, just without positions.
+    def test_validate_batch(self):
+        path = self.write_reviews(500, bad_line_rate=0.1)
+        for patterns in (PATTERNS, MISSING_PATTERNS):
+            expected_lines = ListWriter()
+            validator = CsvTypeValidator(patterns, BadLineMode.WARNING, expected_lines)
+            parser = self.create_parser(
+                path,
+                REFERENCE_BACKEND,
+                BadLineMode.WARNING,
+                allow_multiline_strings=True,
+            )
+            rows = validator.validate(parser.parse())
+            expected = [tuple(row.get_raw_values()) for row in rows]
+
+            actual_lines = ListWriter()
+            validator = FastCsvTypeValidator(
+                patterns, BadLineMode.WARNING, actual_lines
+            )
+            parser = self.create_parser(
+                path,
+                REFERENCE_BACKEND,
+                BadLineMode.WARNING,
+                allow_multiline_strings=True,
+            )
+            batches = parser.parse_columnar(
+                batch_size=7, dictionary_columns=CACHED_COLUMNS
+            )
+            actual = [
+                tuple(row.get_raw_values())
+                for batch in batches
+                for row in validator.validate_batch(batch).stream_rows()
+            ]
+            self.assertEqual(expected, actual, len(patterns))
+            if patterns is PATTERNS:
+                self.assertGreater(len(expected_lines.lines), 5)
+                self.assertEqual(expected_lines.lines, actual_lines.lines)
+
+    # Numeric columns aren't checked by how their numbers look as text, and the values short rows don't have aren't
+    # checked at all, the same as when validating rows.
+    def test_validate_batch_converted_and_missing(self):
+        path = self.write_csv("game,hours\nGame 1,12\nGame 2\nBad,3\nGame 4,5\n")
+        patterns = {"game": re.compile(r"Game \d+"), "hours": re.compile(r"\d+$")}
+        lines = ListWriter()
+        validator = FastCsvTypeValidator(patterns, BadLineMode.WARNING, lines)
+        parser = self.create_parser(path, REFERENCE_BACKEND, BadLineMode.WARNING)
+        (batch,) = parser.parse_columnar(numeric_columns={"hours": "d"})
+        batch = validator.validate_batch(batch)
+        self.assertEqual(
+            [tuple(row.get_raw_values()) for row in batch.stream_rows()],
+            [("Game 1", "12.0"), ("Game 2",), ("Game 4", "5.0")],
+        )
+        self.assertEqual("".join(lines.lines).count("BAD LINE WARNING!"), 1)
+        self.assertIn("Value was 'Bad'", lines.lines[0])
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+from csv_parsing.bad_line_mode import BadLineMode
+from csv_parsing.column_cache import ColumnCache
+from csv_parsing.value_type import ValueType
+from .parser_cases import (
+    BAD_LINE_MODES,
+    OTHER_BACKENDS,
+    REFERENCE_BACKEND,
+    CsvFileTestCase,
+    parse_path,
+)
+
+VALUE_TYPES = {"hours": ValueType.INT, "posted": ValueType.TIMESTAMP}
+
+# Seconds since the epoch (before it too) and ISO 8601 dates with and without a time zone or fractional seconds.
+TIMESTAMP_CSV = (
+    "game,hours,posted\n"
+    "Portal,12,1700000000\n"
+    "Doom,3,-86400\n"
+    "Myst,7,2024-01-02T03:04:05\n"
+    "Riven,5,2024-01-02T03:04:05+02:00\n"
+    "Zork,2,2024-01-02T03:04:05.000250\n"
+    "Quake,1,soon\n"
+    "Tetris,x,0\n"
+)
+
+
+class ValueTypesTest(CsvFileTestCase):
+    def test_timestamps(self):
+        path = self.write_csv(TIMESTAMP_CSV)
+        result = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.SKIP, value_types=VALUE_TYPES
+        )
+        self.assertEqual([row[1] for row in result.rows], [12, 3, 7, 5, 2])
+        self.assertEqual(
+            [row[2] for row in result.rows],
+            [
+                datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc),
+                datetime(1969, 12, 31, tzinfo=timezone.utc),
+                datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+                datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=2))),
+                datetime(2024, 1, 2, 3, 4, 5, 250, tzinfo=timezone.utc),
+            ],
+        )
+        # 'soon' and 'x' can't be converted.
+        self.assertTrue(result.had_errors)
+
+    def test_backends_agree_on_value_types(self):
+        path = self.write_csv(TIMESTAMP_CSV)
+        for mode in BAD_LINE_MODES:
+            expected = parse_path(
+                path, REFERENCE_BACKEND, mode, value_types=VALUE_TYPES
+            )
+            for backend in OTHER_BACKENDS:
+                actual = parse_path(path, backend, mode, value_types=VALUE_TYPES)
+                self.assert_same_result(expected, actual, f"{backend.name} {mode.name}")
+
+    # The columnar batches (and so the cache) store timestamps as microseconds since the epoch,
+    # but hand out the same datetimes as the rows when they are turned back into rows.
+    def test_columnar_rows_agree_with_rows(self):
+        path = self.write_csv(TIMESTAMP_CSV)
+        expected = parse_path(
+            path, REFERENCE_BACKEND, BadLineMode.SKIP, value_types=VALUE_TYPES
+        )
+
+        def create():
+            return self.create_parser(
+                path, REFERENCE_BACKEND, BadLineMode.SKIP, value_types=VALUE_TYPES
+            )
+
+        batches = list(create().parse_columnar(batch_size=2))
+        columnar = [
+            tuple(row.get_raw_values())
+            for batch in batches
+            for row in batch.stream_rows()
+        ]
+        self.assertEqual(expected.rows, columnar)
+        posted = [value for batch in batches for value in batch.get_column("posted")]
+        self.assertEqual(
+            posted,
+            [
+                1_700_000_000_000_000,
+                -86_400_000_000,
+                1_704_164_645_000_000,
+                1_704_157_445_000_000,
+                1_704_164_645_000_250,
+            ],
+        )
+
+        cache = ColumnCache.open(path, create, batch_size=2)
+        cached = [tuple(row.get_raw_values()) for row in cache.stream_rows()]
+        self.assertEqual(expected.rows, cached)